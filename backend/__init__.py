@@ -1 +1,8 @@
-from .main import app  # noqa: F401 
\ No newline at end of file
+def __getattr__(name: str):
+    # Resolve ``backend.app`` on demand so importing a submodule (process pool
+    # workers do this) does not build the whole API.
+    if name == "app":
+        from .main import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,145 @@
+"""Detect the document open in the foreground window (Windows only)."""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import psutil  # type: ignore
+
+# pygetwindow and pywin32 are Windows-only and imported where they are used,
+# so the API can start (and fail only /read-doc) on other platforms.
+
+# Supported document extensions we know how to read
+SUPPORTED_EXTENSIONS = {".docx", ".xlsx", ".pdf"}
+
+
+class WindowDetectionUnavailable(RuntimeError):
+    """Raised when the platform has no window-detection support (pygetwindow missing)."""
+
+
+# ---------------------------------------------------------------------------
+# Helpers for path extraction
+# ---------------------------------------------------------------------------
+
+
+def _extract_from_title(title: str) -> Optional[str]:
+    """Find a pathname in the window title (best-effort heuristic)."""
+    lowered = title.lower()
+    for ext in SUPPORTED_EXTENSIONS:
+        if ext in lowered:
+            parts = title.replace(" – ", " - ").split(" - ")
+            for p in parts:
+                if p.lower().strip().endswith(ext):
+                    return p.strip()
+    return None
+
+
+def _extract_from_cmdline(pid: int) -> Optional[str]:
+    """Inspect process command-line for a supported document path."""
+    try:
+        proc = psutil.Process(pid)
+        for token in proc.cmdline():
+            # Word wraps the path in quotes sometimes → strip them
+            token = token.strip('"')
+            if os.path.splitext(token)[1].lower() in SUPPORTED_EXTENSIONS and Path(token).exists():
+                return token
+    except Exception:
+        pass
+    return None
+
+
+def _extract_from_office_com(process_name: str) -> Optional[str]:
+    """Use COM Automation to query active document path for Word/Excel."""
+    try:
+        import win32com.client  # type: ignore
+
+        if process_name.lower() == "winword.exe":
+            word = win32com.client.GetActiveObject("Word.Application")  # type: ignore
+            doc = word.ActiveDocument  # pyright: ignore[reportAny]
+            return doc.FullName if doc else None
+        if process_name.lower() == "excel.exe":
+            excel = win32com.client.GetActiveObject("Excel.Application")  # type: ignore
+            wb = excel.ActiveWorkbook  # pyright: ignore[reportAny]
+            return wb.FullName if wb else None
+    except Exception:
+        # COM call failed (e.g., no running instance or security restrictions)
+        return None
+    return None
+
+
+def _detect_path(hwnd, title: str) -> Optional[str]:
+    # 1. Try COM or command-line inspection via PID
+    try:
+        import win32process  # type: ignore
+
+        pid = win32process.GetWindowThreadProcessId(hwnd)[1]  # type: ignore
+    except Exception:
+        pid = None
+
+    file_path: Optional[str] = None
+    process_name = ""
+
+    if pid:
+        try:
+            process_name = psutil.Process(pid).name()
+        except Exception:
+            process_name = ""
+
+        # Office COM first (most reliable for Word/Excel)
+        file_path = _extract_from_office_com(process_name)
+
+        # Next: command-line args
+        if not file_path:
+            file_path = _extract_from_cmdline(pid)
+
+    # 2. Heuristic window-title fallback
+    if not file_path:
+        file_path = _extract_from_title(title)
+    return file_path
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+# The COM / process lookups are the slow part, so the last answer is reused
+# while the same window keeps focus with the same title (Word and Excel put
+# the file name in the title, so "Save As" changes it).
+_last_window: tuple | None = None
+_last_path: str | None = None
+_lock = threading.Lock()
+
+
+def get_active_document_path() -> str:
+    """Return the absolute path of the document in the foreground window."""
+    global _last_window, _last_path
+    try:
+        import pygetwindow as gw
+    except ImportError as exc:
+        raise WindowDetectionUnavailable("Active window detection is only supported on Windows.") from exc
+
+    active = gw.getActiveWindow()
+    if not active:
+        raise FileNotFoundError("No active window detected.")
+
+    title = active.title or ""
+    hwnd = active._hWnd  # pygetwindow exposes private
+    with _lock:
+        file_path = _last_path if _last_window == (hwnd, title) else None
+    if not file_path or not Path(file_path).exists():
+        file_path = _detect_path(hwnd, title)
+
+    if not file_path or not Path(file_path).exists():
+        raise FileNotFoundError("Could not determine path of active document.")
+
+    file_path = os.path.abspath(file_path)
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise FileNotFoundError(f"Unsupported extension: {ext}")
+
+    with _lock:
+        _last_window, _last_path = (hwnd, title), file_path
+    return file_path
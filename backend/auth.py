@@ -1,5 +1,6 @@
 import os
 import datetime
+import threading
 from typing import Dict
 
 import jwt
@@ -10,13 +11,27 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 # NOTE: In production, load users securely from vault or encrypted store.
-USERS_DB: Dict[str, str] = {
-    "admin": PWD_CONTEXT.hash("password")  # default credentials – change after first run!
+# Plain passwords here are hashed into USERS_DB on first use, not at import:
+# bcrypt is deliberately slow and would add to every worker's cold start.
+DEFAULT_USERS: Dict[str, str] = {
+    "admin": "password"  # default credentials – change after first run!
 }
+USERS_DB: Dict[str, str] = {}
+_users_lock = threading.Lock()
 
 SECRET_KEY = os.getenv("JWT_SECRET", "change_me")
 
 
+def get_users() -> Dict[str, str]:
+    """Return the user store, hashing the default credentials the first time."""
+    if len(USERS_DB) < len(DEFAULT_USERS):
+        with _users_lock:
+            for username, password in DEFAULT_USERS.items():
+                if username not in USERS_DB:
+                    USERS_DB[username] = PWD_CONTEXT.hash(password)
+    return USERS_DB
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Return True if the plain password matches the hashed password."""
     return PWD_CONTEXT.verify(plain_password, hashed_password)
@@ -24,7 +39,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def authenticate_user(username: str, password: str) -> bool:
     """Validate the user credentials against the in-memory store."""
-    hashed = USERS_DB.get(username)
+    hashed = get_users().get(username)
     if not hashed:
         return False
     return verify_password(password, hashed)
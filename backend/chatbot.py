@@ -1,21 +1,34 @@
-"""Chatbot abstraction now backed by Google's Gemini models."""
+"""Chatbot abstraction now backed by Google's Gemini models (or the fake provider)."""
 from __future__ import annotations
 
-import os
+import json
+import logging
+import re
+from typing import Iterator
+
 from dotenv import load_dotenv
-import google.generativeai as genai  # type: ignore
+
+from backend import diff_engine
+from backend import llm_provider
+from backend import metrics
+from backend.llm_cache import cached
+from backend.prompt_builder import PromptBuilder
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure Gemini client using API key from environment
-API_KEY = os.getenv("GEMINI_API_KEY")
-if API_KEY:
-    genai.configure(api_key=API_KEY)
-else:
-    raise EnvironmentError("GEMINI_API_KEY not found in environment variables.")
+logger = logging.getLogger(__name__)
+
+# Part of every cache key, so replies of the fake provider never mix with real ones.
+MODEL_NAME = llm_provider.MODEL_NAME if llm_provider.LLM_PROVIDER == "gemini" else llm_provider.LLM_PROVIDER
+
+_llm = llm_provider.get_provider
+
+
+def warm_up() -> None:
+    """Load the provider's SDK ahead of the first request (no-op without an API key)."""
+    _llm().warm_up()
 
-MODEL_NAME = "gemini-2.0-flash"
 
 SYSTEM_PROMPT = (
     "You are a helpful assistant that answers questions using the provided document "
@@ -23,159 +36,321 @@ SYSTEM_PROMPT = (
 )
 
 
-def ask(question: str, context: str) -> str:
-    """Send *question* and *context* to Gemini and return the reply text."""
-    model = genai.GenerativeModel(MODEL_NAME)
-    prompt = (
-        f"{SYSTEM_PROMPT}\n\nDocument contents:\n{context}\n\nQuestion: {question}"
-    )
+ASK_CONFIG = {"temperature": 0.7, "max_output_tokens": 512}
+SUMMARISE_CONFIG = {"temperature": 0.3, "max_output_tokens": 256}
+EXPLAIN_CONFIG = {"temperature": 0.3, "max_output_tokens": 300}
+# JSON mode (google-generativeai >= 0.5): the model must answer with a single object
+# (see _DIGEST_INSTRUCTIONS); parse_digest still copes with replies that are not.
+DIGEST_CONFIG = {"temperature": 0.3, "max_output_tokens": 768, "response_mime_type": "application/json"}
+SECTION_SUMMARY_CONFIG = {"temperature": 0.3, "max_output_tokens": 256}
+
+FALLBACK_SUGGESTIONS = ["What are the main topics?", "Any important dates?", "What are the key requirements?"]
+
 
+def _is_reply(value: object) -> bool:
+    """False for error/fallback values that must not be cached."""
+    if isinstance(value, str):
+        return not value.startswith(("[Gemini error]", "[Error]"))
+    return value != FALLBACK_SUGGESTIONS
+
+
+def _stream(prompt: str, generation_config: dict, error_prefix: str = "[Gemini error]") -> Iterator[str]:
+    """Yield the model's reply to *prompt* piece by piece as it is generated."""
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "max_output_tokens": 512,
-            },
-        )
-        return response.text.strip()
+        yield from _llm().stream(prompt, generation_config)
+    except Exception as exc:
+        yield f"{error_prefix} {exc}"
+
+
+def _ask_prompt(question: str, context: str, history: str = "") -> str:
+    prompt = PromptBuilder("ask").add(SYSTEM_PROMPT)
+    if history:
+        prompt.add(history)
+    return prompt.add_context(context, "Document contents:").add(f"Question: {question}").build()
+
+
+@cached(MODEL_NAME, ASK_CONFIG, cacheable=_is_reply)
+def ask(question: str, context: str, history: str = "") -> str:
+    """Send *question*, *context* and the compacted chat *history* to Gemini and return the reply text."""
+    prompt = _ask_prompt(question, context, history)
+
+    try:
+        return _llm().generate(prompt, ASK_CONFIG)
     except Exception as exc:  # pragma: no cover
         return f"[Gemini error] {exc}" 
 
 
+def ask_stream(question: str, context: str, history: str = "") -> Iterator[str]:
+    """Streaming variant of :func:`ask`."""
+    return _stream(_ask_prompt(question, context, history), ASK_CONFIG)
+
+
+def _summarise_prompt(text: str) -> str:
+    return (
+        PromptBuilder("summarise")
+        .add_context(text, "Provide a concise summary in 5 bullet points of the following document:")
+        .build()
+    )
+
+
+@cached(MODEL_NAME, SUMMARISE_CONFIG, cacheable=_is_reply)
 def summarise(text: str) -> str:
     """Return a concise 5-bullet summary of *text* using Gemini."""
-    model = genai.GenerativeModel(MODEL_NAME)
+    prompt = _summarise_prompt(text)
+    try:
+        return _llm().generate(prompt, SUMMARISE_CONFIG)
+    except Exception as exc:
+        return f"[Gemini error] {exc}"
+
+
+def summarise_stream(text: str) -> Iterator[str]:
+    """Streaming variant of :func:`summarise`."""
+    return _stream(_summarise_prompt(text), SUMMARISE_CONFIG)
+
+
+@cached(MODEL_NAME, SECTION_SUMMARY_CONFIG, cacheable=_is_reply)
+def summarise_section(text: str) -> str:
+    """Summarise one section of a long document (map step of map-reduce)."""
     prompt = (
-        "Provide a concise summary in 5 bullet points of the following document:"
-        f"\n{text[:15000]}"
+        "The following is one section of a longer document. Summarise the key facts, "
+        "requirements, dates and decisions it contains in at most 5 concise bullet points:"
+        f"\n{text}"
     )
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config={"temperature": 0.3, "max_output_tokens": 256},
-        )
-        return response.text.strip()
+        return _llm().generate(prompt, SECTION_SUMMARY_CONFIG)
     except Exception as exc:
         return f"[Gemini error] {exc}"
 
 
-def generate_auto_suggestions(text: str) -> list[str]:
-    """Generate smart question suggestions based on document content."""
-    if not API_KEY:
-        return ["What is this document about?", "What are the key points?", "Are there any deadlines?"]
-    
-    model = genai.GenerativeModel(MODEL_NAME)
-    prompt = (
-        "Based on the following document, generate 3 smart, specific questions that users might want to ask. "
-        "Focus on deadlines, risks, key decisions, requirements, or important details. "
-        "Return only the questions, one per line:\n\n"
-        f"{text[:8000]}"
+def _combine_prompt(summaries: list[str], final: bool) -> str:
+    target = "a concise summary in 5 bullet points" if final else "at most 8 concise bullet points"
+    joined = "\n\n".join(f"Section {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+    return (
+        "The following are summaries of consecutive sections of one document. "
+        f"Combine them into {target} covering the whole document:\n{joined}"
     )
-    
+
+
+@cached(MODEL_NAME, SUMMARISE_CONFIG, cacheable=_is_reply)
+def combine_summaries(summaries: list[str], final: bool = True) -> str:
+    """Merge section summaries into one summary (reduce step of map-reduce)."""
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config={"temperature": 0.5, "max_output_tokens": 200}
-        )
-        suggestions = [q.strip() for q in response.text.strip().split('\n') if q.strip()]
-        return suggestions[:3] if suggestions else ["What are the main topics?", "Any important dates?", "What are the key requirements?"]
-    except Exception:
-        return ["What are the main topics?", "Any important dates?", "What are the key requirements?"]
+        return _llm().generate(_combine_prompt(summaries, final), SUMMARISE_CONFIG)
+    except Exception as exc:
+        return f"[Gemini error] {exc}"
+
+
+def combine_summaries_stream(summaries: list[str]) -> Iterator[str]:
+    """Streaming variant of the final :func:`combine_summaries` step."""
+    return _stream(_combine_prompt(summaries, True), SUMMARISE_CONFIG)
+
+
+_DIGEST_INSTRUCTIONS = (
+    "Reply with one JSON object and nothing else, with these keys:\n"
+    '"summary": list of 5 concise bullet points (strings) summarising the document;\n'
+    '"questions": list of 3 smart, specific questions a reader might want to ask, focusing on '
+    "deadlines, risks, key decisions, requirements or important details;\n"
+    '"key_terms": list of up to 10 key terms or names;\n'
+    '"deadlines": list of objects {"date": string, "description": string} for every deadline or '
+    "due date mentioned (empty list if none)."
+)
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+_BULLET = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s*")
+
+
+def _digest_prompt(text: str, sections: bool) -> str:
+    intro = (
+        "The following are summaries of consecutive sections of one document."
+        if sections else "Read the following document."
+    )
+    heading = "Section summaries:" if sections else "Document:"
+    return PromptBuilder("digest").add(f"{intro} {_DIGEST_INSTRUCTIONS}").add_context(text, heading).build()
 
 
+def _strings(value: object, limit: int) -> list[str]:
+    if isinstance(value, str):
+        value = value.splitlines()
+    if not isinstance(value, list):
+        return []
+    items = [_BULLET.sub("", str(item)).strip() for item in value if isinstance(item, (str, int, float))]
+    return [item for item in items if item][:limit]
+
+
+def _deadlines(value: object) -> list[dict]:
+    deadlines = []
+    for item in value if isinstance(value, list) else []:
+        if isinstance(item, dict):
+            date = str(item.get("date") or "").strip()
+            description = str(item.get("description") or item.get("item") or "").strip()
+        elif isinstance(item, str):
+            date, description = "", item.strip()
+        else:
+            continue
+        if date or description:
+            deadlines.append({"date": date, "description": description})
+    return deadlines
+
+
+def parse_digest(reply: str) -> dict:
+    """Parse a digest reply, tolerating code fences, chatter around the JSON and missing keys.
+
+    A reply that is not JSON at all is read as plain bullet lines: lines ending
+    in "?" become questions, the rest the summary. Such digests are marked
+    ``partial`` and are not cached.
+    """
+    body = _FENCE.sub("", reply.strip())
+    start, end = body.find("{"), body.rfind("}")
+    data = None
+    if start != -1 and end > start:
+        try:
+            data = json.loads(body[start:end + 1])
+        except ValueError:
+            data = None
+    if not isinstance(data, dict):
+        lines = _strings(reply, 50)
+        questions = [line for line in lines if line.endswith("?")][:3]
+        summary = [line for line in lines if not line.endswith("?")][:5]
+        return {
+            "summary": "\n".join(f"- {line}" for line in summary) or reply.strip(),
+            "questions": questions or list(FALLBACK_SUGGESTIONS),
+            "key_terms": [],
+            "deadlines": [],
+            "partial": True,
+        }
+    summary = _strings(data.get("summary"), 8)
+    questions = _strings(data.get("questions"), 3)
+    return {
+        "summary": "\n".join(f"- {line}" for line in summary),
+        "questions": questions or list(FALLBACK_SUGGESTIONS),
+        "key_terms": _strings(data.get("key_terms"), 10),
+        "deadlines": _deadlines(data.get("deadlines")),
+        "partial": not summary or not questions,
+    }
+
+
+def _digest_failed(exc: Exception) -> dict:
+    return {
+        "summary": f"[Gemini error] {exc}",
+        "questions": list(FALLBACK_SUGGESTIONS),
+        "key_terms": [],
+        "deadlines": [],
+        "partial": True,
+    }
+
+
+def _is_digest(value: dict) -> bool:
+    return not value.get("partial")
+
+
+def _digest(prompt: str) -> dict:
+    try:
+        return parse_digest(_llm().generate(prompt, DIGEST_CONFIG))
+    except Exception as exc:
+        return _digest_failed(exc)
+
+
+@cached(MODEL_NAME, DIGEST_CONFIG, cacheable=_is_digest)
+def digest(text: str) -> dict:
+    """Summary bullets, suggested questions, key terms and deadlines of *text* in one call.
+
+    Returns a dict with ``summary`` (bullet text), ``questions``,
+    ``key_terms``, ``deadlines`` (``{"date", "description"}``) and
+    ``partial`` (True when the reply could not be fully parsed).
+    """
+    return _digest(_digest_prompt(text, sections=False))
+
+
+@cached(MODEL_NAME, DIGEST_CONFIG, cacheable=_is_digest)
+def digest_sections(summaries: list[str]) -> dict:
+    """:func:`digest` of a long document from its section summaries (final map-reduce step)."""
+    joined = "\n\n".join(f"Section {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+    return _digest(_digest_prompt(joined, sections=True))
+
+
+def _explain_prompt(text: str, context: str) -> str:
+    prompt = PromptBuilder("explain").add(
+        "Explain the following text in simple, clear terms. If it's technical, break it down for easy understanding:"
+        f"\n\nText to explain: {text}"
+    )
+    if context:
+        prompt.add_context(context, "Document context:")
+    return prompt.build()
+
+
+@cached(MODEL_NAME, EXPLAIN_CONFIG, cacheable=_is_reply)
 def explain_text(text: str, context: str = "") -> str:
     """Provide a simplified explanation of selected text."""
-    if not API_KEY:
+    if not _llm().available:
         return "Explanation unavailable - Gemini API key missing."
     
-    model = genai.GenerativeModel(MODEL_NAME)
-    context_part = f"\n\nDocument context: {context[:3000]}" if context else ""
-    prompt = (
-        f"Explain the following text in simple, clear terms. If it's technical, break it down for easy understanding:"
-        f"\n\nText to explain: {text}"
-        f"{context_part}"
-    )
+    prompt = _explain_prompt(text, context)
     
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config={"temperature": 0.3, "max_output_tokens": 300}
-        )
-        return response.text.strip()
+        return _llm().generate(prompt, EXPLAIN_CONFIG)
     except Exception as exc:
         return f"[Error] {exc}"
 
 
+def explain_text_stream(text: str, context: str = "") -> Iterator[str]:
+    """Streaming variant of :func:`explain_text`."""
+    if not _llm().available:
+        return iter(["Explanation unavailable - Gemini API key missing."])
+    return _stream(_explain_prompt(text, context), EXPLAIN_CONFIG, error_prefix="[Error]")
+
+
+COMPARE_UNAVAILABLE = "Comparison unavailable - Gemini API key missing."
+
+
+def is_comparison(result: tuple[str, list[dict]]) -> bool:
+    """False for fallback comparisons (no model summary) that must not be cached."""
+    summary, changes = result
+    return summary != COMPARE_UNAVAILABLE and summary != compare_fallback(changes)
+
+
 def compare_documents(text1: str, text2: str, filename1: str, filename2: str) -> tuple[str, list[dict]]:
     """Compare two documents and return summary of changes."""
-    if not API_KEY:
-        return "Comparison unavailable - Gemini API key missing.", []
-    
-    # Clean and normalize texts for better comparison
-    clean_text1 = text1.strip().replace('\r\n', '\n').replace('\r', '\n')
-    clean_text2 = text2.strip().replace('\r\n', '\n').replace('\r', '\n')
+    if not _llm().available:
+        return COMPARE_UNAVAILABLE, []
     
-    print(f"[DEBUG] Text1 length: {len(clean_text1)}, Text2 length: {len(clean_text2)}")
-    print(f"[DEBUG] Texts identical: {clean_text1 == clean_text2}")
-    
-    # Enhanced change detection using difflib
-    import difflib
-    differ = difflib.unified_diff(
-        clean_text1.splitlines(keepends=True),
-        clean_text2.splitlines(keepends=True),
-        fromfile=filename1,
-        tofile=filename2,
-        lineterm="",
-        n=3  # More context lines
-    )
-    
-    changes = []
-    diff_lines = list(differ)
-    
-    for line in diff_lines:
-        if line.startswith('+++') or line.startswith('---') or line.startswith('@@'):
-            continue
-        elif line.startswith('+') and line[1:].strip():  # Only non-empty additions
-            changes.append({"type": "Addition", "text": line[1:].strip(), "description": f"Added: {line[1:].strip()[:100]}..."})
-        elif line.startswith('-') and line[1:].strip():  # Only non-empty removals
-            changes.append({"type": "Removal", "text": line[1:].strip(), "description": f"Removed: {line[1:].strip()[:100]}..."})
-    
-    print(f"[DEBUG] Found {len(changes)} changes")
+    # Paragraph-aligned, word-level change detection over the full texts
+    with metrics.timed("diff", characters1=len(text1), characters2=len(text2)) as log:
+        changes = diff_engine.diff_texts(text1, text2)
+        log["changes"] = len(changes)
     
     # If no changes detected, documents are identical
     if not changes:
         return "The two documents are identical - no differences found.", []
     
     # Create AI prompt with focus on actual differences
-    model = genai.GenerativeModel(MODEL_NAME)
-    
-    # Create a focused comparison prompt
     prompt = (
-        f"Compare these two documents and analyze the differences:\n\n"
-        f"Document 1 ({filename1}):\n{clean_text1[:8000]}\n\n"
-        f"Document 2 ({filename2}):\n{clean_text2[:8000]}\n\n"
-        f"I detected {len(changes)} differences. Please provide:\n"
-        f"1. **Summary of Key Differences:** What are the main changes between these documents?\n"
-        f"2. **What was Added, Removed, or Changed:** Provide specific details about the differences.\n\n"
-        f"Be specific and focus on the actual content changes, not just formatting."
+        PromptBuilder("compare")
+        .add("Compare these two documents and analyze the differences:")
+        .add_context(text1.strip(), f"Document 1 ({filename1}):")
+        .add_context(text2.strip(), f"Document 2 ({filename2}):")
+        .add(
+            f"I detected {len(changes)} differences. Please provide:\n"
+            f"1. **Summary of Key Differences:** What are the main changes between these documents?\n"
+            f"2. **What was Added, Removed, or Changed:** Provide specific details about the differences.\n\n"
+            f"Be specific and focus on the actual content changes, not just formatting."
+        )
+        .build()
     )
     
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config={"temperature": 0.3, "max_output_tokens": 800}
-        )
+        reply = _llm().generate(prompt, {"temperature": 0.3, "max_output_tokens": 800})
         
-        summary = response.text.strip() if response.text else f"Found {len(changes)} differences between the documents."
-        return summary, changes[:50]  # Limit changes for performance
+        summary = reply or f"Found {len(changes)} differences between the documents."
+        return summary, changes
     except Exception as exc:
-        print(f"[ERROR] Gemini API error: {exc}")
-        # Fallback summary if AI fails
-        fallback_summary = f"Found {len(changes)} differences:\n"
-        for i, change in enumerate(changes[:5]):
-            fallback_summary += f"• {change['type']}: {change['description']}\n"
-        if len(changes) > 5:
-            fallback_summary += f"... and {len(changes) - 5} more changes"
-        
-        return fallback_summary, changes[:50]
+        logger.warning("Comparison summary failed, using fallback: %s", exc)
+        return compare_fallback(changes), changes
+
+
+def compare_fallback(changes: list[dict]) -> str:
+    """Summary used when the model cannot describe *changes*."""
+    fallback_summary = f"Found {len(changes)} differences:\n"
+    for i, change in enumerate(changes[:5]):
+        fallback_summary += f"• {change['type']}: {change['description']}\n"
+    if len(changes) > 5:
+        fallback_summary += f"... and {len(changes) - 5} more changes"
+    return fallback_summary
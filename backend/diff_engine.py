@@ -0,0 +1,153 @@
+"""Paragraph-aligned, word-level diff engine for document comparison."""
+from __future__ import annotations
+
+import difflib
+import os
+import re
+
+from backend import workers
+
+# Changed regions with more words than this (on both sides combined) are
+# diffed on the worker pool; smaller ones are cheaper to do inline.
+DIFF_PARALLEL_MIN_WORDS = int(os.getenv("DIFF_PARALLEL_MIN_WORDS", "20000"))
+
+# Paragraphs with more words than this are aligned sentence by sentence.
+DIFF_BLOCK_MAX_WORDS = 120
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t\r\f\v]*\n\s*")
+_SENTENCE_END = re.compile(r"[.!?;:][\"')\]]*\s+")
+_WORD = re.compile(r"\S+")
+
+
+def _blocks(text: str) -> list[tuple[int, int, str]]:
+    """Split *text* into (start, end, key) alignment blocks.
+
+    Blocks are paragraphs; paragraphs longer than ``DIFF_BLOCK_MAX_WORDS``
+    (common in PDF output, which rarely has blank lines) are further split at
+    sentence ends. The key collapses all whitespace so a block re-wrapped by
+    PDF extraction still aligns with its original.
+    """
+    spans = []
+    start = 0
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+
+    blocks = []
+    for start, end in spans:
+        chunk = text[start:end]
+        if len(chunk.split()) > DIFF_BLOCK_MAX_WORDS:
+            cuts = [start] + [start + m.end() for m in _SENTENCE_END.finditer(chunk)] + [end]
+            pieces = zip(cuts, cuts[1:])
+        else:
+            pieces = [(start, end)]
+        for lo, hi in pieces:
+            key = " ".join(text[lo:hi].split())
+            if key:
+                blocks.append((lo, hi, key))
+    return blocks
+
+
+def _change(kind: str, text: str, start1: int, end1: int, start2: int, end2: int, old: str = "") -> dict:
+    if kind == "Addition":
+        description = f"Added: {text[:100]}..."
+    elif kind == "Removal":
+        description = f"Removed: {text[:100]}..."
+    else:
+        description = f"Changed: {old[:50]} → {text[:50]}"
+    return {
+        "type": kind,
+        "text": text,
+        "description": description,
+        "start1": start1,
+        "end1": end1,
+        "start2": start2,
+        "end2": end2,
+    }
+
+
+def word_diff(text1: str, base1: int, text2: str, base2: int) -> list[dict]:
+    """Word-level changes between two regions; offsets are shifted by *base1*/*base2*."""
+    words1 = [(m.start() + base1, m.end() + base1, m.group()) for m in _WORD.finditer(text1)]
+    words2 = [(m.start() + base2, m.end() + base2, m.group()) for m in _WORD.finditer(text2)]
+
+    # Common prefix/suffix trimming keeps SequenceMatcher's quadratic work
+    # confined to the part that actually changed.
+    lo = 0
+    while lo < len(words1) and lo < len(words2) and words1[lo][2] == words2[lo][2]:
+        lo += 1
+    hi1, hi2 = len(words1), len(words2)
+    while hi1 > lo and hi2 > lo and words1[hi1 - 1][2] == words2[hi2 - 1][2]:
+        hi1 -= 1
+        hi2 -= 1
+    end1, end2 = base1 + len(text1), base2 + len(text2)
+
+    def span(words: list, i: int, j: int, end: int) -> tuple[int, int]:
+        if i < j:
+            return words[i][0], words[j - 1][1]
+        # Empty side: the change sits right before word i (or at the end)
+        position = words[i][0] if i < len(words) else end
+        return position, position
+
+    matcher = difflib.SequenceMatcher(
+        None, [w[2] for w in words1[lo:hi1]], [w[2] for w in words2[lo:hi2]], autojunk=False
+    )
+    changes = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        i1, i2, j1, j2 = i1 + lo, i2 + lo, j1 + lo, j2 + lo
+        s1, e1 = span(words1, i1, i2, end1)
+        s2, e2 = span(words2, j1, j2, end2)
+        old = " ".join(w[2] for w in words1[i1:i2])
+        new = " ".join(w[2] for w in words2[j1:j2])
+        if tag == "delete":
+            changes.append(_change("Removal", old, s1, e1, s2, e2))
+        elif tag == "insert":
+            changes.append(_change("Addition", new, s1, e1, s2, e2))
+        else:
+            changes.append(_change("Modification", new, s1, e1, s2, e2, old=old))
+    return changes
+
+
+def diff_texts(text1: str, text2: str) -> list[dict]:
+    """Return every change between *text1* and *text2* in document order.
+
+    Blocks (paragraphs or sentences) are aligned by their whitespace-
+    normalised content first; blocks that only exist on one side are
+    reported as they are, and block ranges that were edited are diffed word
+    by word. Each
+    change carries ``start1/end1`` and ``start2/end2`` character offsets into
+    the original texts.
+    """
+    blocks1, blocks2 = _blocks(text1), _blocks(text2)
+    matcher = difflib.SequenceMatcher(None, [p[2] for p in blocks1], [p[2] for p in blocks2], autojunk=False)
+
+    # Each slot is either a finished list of changes or a pending future
+    slots: list = []
+    pool = None
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        start1 = blocks1[i1][0] if i1 < len(blocks1) else len(text1)
+        end1 = blocks1[i2 - 1][1] if i1 < i2 else start1
+        start2 = blocks2[j1][0] if j1 < len(blocks2) else len(text2)
+        end2 = blocks2[j2 - 1][1] if j1 < j2 else start2
+        if tag == "delete":
+            slots.append([_change("Removal", " ".join(p[2] for p in blocks1[i1:i2]), start1, end1, start2, end2)])
+        elif tag == "insert":
+            slots.append([_change("Addition", " ".join(p[2] for p in blocks2[j1:j2]), start1, end1, start2, end2)])
+        else:
+            region1, region2 = text1[start1:end1], text2[start2:end2]
+            words = sum(len(p[2].split()) for p in blocks1[i1:i2]) + sum(len(p[2].split()) for p in blocks2[j1:j2])
+            if words >= DIFF_PARALLEL_MIN_WORDS and workers.CPU_WORKERS > 1:
+                pool = pool or workers.get_process_pool()
+                slots.append(pool.submit(word_diff, region1, start1, region2, start2))
+            else:
+                slots.append(word_diff(region1, start1, region2, start2))
+
+    changes: list[dict] = []
+    for slot in slots:
+        changes.extend(slot if isinstance(slot, list) else slot.result())
+    return changes
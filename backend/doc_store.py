@@ -0,0 +1,200 @@
+"""Bounded, compressed, content-addressed store for extracted document texts."""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Callable, Iterator
+
+# Uncompressed texts kept in memory (most recently used first to go cold).
+DOC_STORE_HOT_BYTES = int(os.getenv("DOC_STORE_HOT_BYTES", str(64 * 1024 * 1024)))
+# Total in-memory budget: hot texts plus compressed cold texts.
+DOC_STORE_MAX_BYTES = int(os.getenv("DOC_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Spilled texts on disk; beyond this the least recently used documents are forgotten.
+DOC_STORE_DISK_MAX_BYTES = int(os.getenv("DOC_STORE_DISK_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+DOC_STORE_SPILL_DIR = os.getenv("DOC_STORE_SPILL_DIR", os.path.join(tempfile.gettempdir(), "docbot-docs"))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class DocumentStore(MutableMapping):
+    """Dict-like ``document_id -> text`` mapping with a memory budget.
+
+    Texts live in one of three tiers: *hot* (plain ``str``), *cold*
+    (zlib-compressed bytes in memory) and *spilled* (compressed file in
+    a subdirectory of ``spill_dir`` private to this store, so processes
+    sharing ``spill_dir`` never remove each other's files). Reads promote a
+    text back to hot; writes and promotions demote the least recently used
+    texts until the budgets hold again. Identical texts are stored once,
+    whatever the number of document ids pointing at them.
+    """
+
+    def __init__(
+        self,
+        hot_bytes: int = DOC_STORE_HOT_BYTES,
+        max_bytes: int = DOC_STORE_MAX_BYTES,
+        disk_max_bytes: int = DOC_STORE_DISK_MAX_BYTES,
+        spill_dir: str = DOC_STORE_SPILL_DIR,
+        on_discard: Callable[[str], None] | None = None,
+    ):
+        self.hot_bytes = hot_bytes
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.spill_dir = Path(spill_dir) / f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.on_discard = on_discard
+        self._lock = threading.RLock()
+        self._ids: dict[str, str] = {}  # document_id -> content hash
+        self._owners: dict[str, set[str]] = {}  # content hash -> document ids
+        self._hot: OrderedDict[str, str] = OrderedDict()
+        self._cold: OrderedDict[str, bytes] = OrderedDict()
+        self._disk: OrderedDict[str, int] = OrderedDict()  # content hash -> file size
+        self._hot_size = 0
+        self._cold_size = 0
+        self._disk_size = 0
+        self.evictions = 0
+        self.discarded = 0
+        self.dedup_hits = 0
+
+    # -- tier management -------------------------------------------------
+
+    def _spill_path(self, digest: str) -> Path:
+        return self.spill_dir / f"{digest}.z"
+
+    def _remove_blob(self, digest: str) -> None:
+        if digest in self._hot:
+            self._hot_size -= sys.getsizeof(self._hot.pop(digest))
+        if digest in self._cold:
+            self._cold_size -= len(self._cold.pop(digest))
+        if digest in self._disk:
+            self._disk_size -= self._disk.pop(digest)
+            self._spill_path(digest).unlink(missing_ok=True)
+
+    def _rebalance(self) -> None:
+        while self._hot_size > self.hot_bytes and len(self._hot) > 1:
+            digest, text = self._hot.popitem(last=False)
+            self._hot_size -= sys.getsizeof(text)
+            blob = zlib.compress(text.encode("utf-8", "surrogatepass"), 6)
+            self._cold[digest] = blob
+            self._cold_size += len(blob)
+        while self._hot_size + self._cold_size > self.max_bytes and self._cold:
+            digest, blob = self._cold.popitem(last=False)
+            self._cold_size -= len(blob)
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._spill_path(digest).write_bytes(blob)
+            self._disk[digest] = len(blob)
+            self._disk_size += len(blob)
+            self.evictions += 1
+        while self._disk_size > self.disk_max_bytes and self._disk:
+            digest = next(iter(self._disk))
+            for doc_id in list(self._owners.get(digest, ())):
+                self._discard(doc_id)
+
+    def _load(self, digest: str) -> str:
+        if digest in self._hot:
+            self._hot.move_to_end(digest)
+            return self._hot[digest]
+        if digest in self._cold:
+            blob = self._cold.pop(digest)
+            self._cold_size -= len(blob)
+        else:
+            self._disk_size -= self._disk.pop(digest)
+            try:
+                blob = self._spill_path(digest).read_bytes()
+            except FileNotFoundError:
+                # Removed behind our back (e.g. by a temp cleaner): forget its documents
+                for doc_id in list(self._owners.get(digest, ())):
+                    self._discard(doc_id)
+                raise KeyError(digest) from None
+            self._spill_path(digest).unlink(missing_ok=True)
+        text = zlib.decompress(blob).decode("utf-8", "surrogatepass")
+        self._hot[digest] = text
+        self._hot_size += sys.getsizeof(text)
+        self._rebalance()
+        return text
+
+    def _unlink_id(self, doc_id: str) -> None:
+        digest = self._ids.pop(doc_id)
+        owners = self._owners[digest]
+        owners.discard(doc_id)
+        if not owners:
+            del self._owners[digest]
+            self._remove_blob(digest)
+
+    def _discard(self, doc_id: str) -> None:
+        self._unlink_id(doc_id)
+        self.discarded += 1
+        if self.on_discard:
+            self.on_discard(doc_id)
+
+    # -- mapping interface -----------------------------------------------
+
+    def __getitem__(self, doc_id: str) -> str:
+        with self._lock:
+            return self._load(self._ids[doc_id])
+
+    def __setitem__(self, doc_id: str, text: str) -> None:
+        digest = content_hash(text)
+        with self._lock:
+            if self._ids.get(doc_id) == digest:
+                return
+            if doc_id in self._ids:
+                self._unlink_id(doc_id)
+            self._ids[doc_id] = digest
+            if digest in self._owners:
+                self.dedup_hits += 1
+                self._owners[digest].add(doc_id)
+                return
+            self._owners[digest] = {doc_id}
+            self._hot[digest] = text
+            self._hot_size += sys.getsizeof(text)
+            self._rebalance()
+
+    def __delitem__(self, doc_id: str) -> None:
+        with self._lock:
+            self._unlink_id(doc_id)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._ids))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def close(self) -> None:
+        """Remove this store's spill directory; spilled documents are forgotten."""
+        with self._lock:
+            for digest in list(self._disk):
+                for doc_id in list(self._owners.get(digest, ())):
+                    self._discard(doc_id)
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def digest_of(self, doc_id: str) -> str | None:
+        """Content hash of the text stored under *doc_id*, if any."""
+        return self._ids.get(doc_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._ids),
+                "unique_texts": len(self._owners),
+                "resident_bytes": self._hot_size + self._cold_size,
+                "hot_bytes": self._hot_size,
+                "compressed_bytes": self._cold_size,
+                "spilled_bytes": self._disk_size,
+                "spilled_texts": len(self._disk),
+                "evictions": self.evictions,
+                "discarded": self.discarded,
+                "dedup_hits": self.dedup_hits,
+            }
@@ -1,139 +1,141 @@
-"""Utilities for detecting the active document window and extracting its text contents."""
+"""Text of the active document, cached by file identity so repeated reads are cheap."""
 from __future__ import annotations
 
 import os
-from pathlib import Path
-from typing import Optional, Tuple
-
-import pygetwindow as gw
-import psutil  # type: ignore
-
-try:
-    import win32gui, win32process, win32com.client  # type: ignore
-except ImportError:
-    # On non-Windows OS this module won't import, but the util is Windows-only anyway.
-    pass
-
-# Supported document extensions we know how to read
-SUPPORTED_EXTENSIONS = {".docx", ".xlsx", ".pdf"}
-
-
-# ---------------------------------------------------------------------------
-# Helpers for path extraction
-# ---------------------------------------------------------------------------
-
-
-def _extract_from_title(title: str) -> Optional[str]:
-    """Find a pathname in the window title (best-effort heuristic)."""
-    lowered = title.lower()
-    for ext in SUPPORTED_EXTENSIONS:
-        if ext in lowered:
-            parts = title.replace(" – ", " - ").split(" - ")
-            for p in parts:
-                if p.lower().strip().endswith(ext):
-                    return p.strip()
-    return None
-
-
-def _extract_from_cmdline(pid: int) -> Optional[str]:
-    """Inspect process command-line for a supported document path."""
-    try:
-        proc = psutil.Process(pid)
-        for token in proc.cmdline():
-            # Word wraps the path in quotes sometimes → strip them
-            token = token.strip('"')
-            if os.path.splitext(token)[1].lower() in SUPPORTED_EXTENSIONS and Path(token).exists():
-                return token
-    except Exception:
-        pass
-    return None
-
-
-def _extract_from_office_com(process_name: str) -> Optional[str]:
-    """Use COM Automation to query active document path for Word/Excel."""
-    try:
-        if process_name.lower() == "winword.exe":
-            word = win32com.client.GetActiveObject("Word.Application")  # type: ignore
-            doc = word.ActiveDocument  # pyright: ignore[reportAny]
-            return doc.FullName if doc else None
-        if process_name.lower() == "excel.exe":
-            excel = win32com.client.GetActiveObject("Excel.Application")  # type: ignore
-            wb = excel.ActiveWorkbook  # pyright: ignore[reportAny]
-            return wb.FullName if wb else None
-    except Exception:
-        # COM call failed (e.g., no running instance or security restrictions)
-        return None
-    return None
-
-
-# ---------------------------------------------------------------------------
-# Public API
-# ---------------------------------------------------------------------------
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from backend import active_window
+from backend import extraction
+
+# Extracted files kept in memory, keyed by path and checked against (mtime, size).
+READ_DOC_CACHE_ENTRIES = int(os.getenv("READ_DOC_CACHE_ENTRIES", "16"))
+# When > 0, cached files are polled this often and re-extracted in the
+# background as soon as they change, so the next read is already warm.
+READ_DOC_REFRESH_SECONDS = float(os.getenv("READ_DOC_REFRESH_SECONDS", "0"))
+
+
+def _signature(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class DocumentReader:
+    """Per-path extraction cache invalidated by (mtime, size).
+
+    Concurrent reads of the same file share one extraction. A result is only
+    cached when the file did not change while it was being parsed.
+    """
+
+    def __init__(self, max_entries: int = READ_DOC_CACHE_ENTRIES, refresh_seconds: float = READ_DOC_REFRESH_SECONDS):
+        self.max_entries = max_entries
+        self.refresh_seconds = refresh_seconds
+        self._entries: OrderedDict[str, tuple[tuple[int, int], extraction.ExtractionResult]] = OrderedDict()
+        self._path_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _cached(self, path: str, signature: tuple[int, int]) -> extraction.ExtractionResult | None:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != signature:
+                return None
+            self._entries.move_to_end(path)
+            return entry[1]
+
+    def _extract(self, path: str) -> extraction.ExtractionResult:
+        with self._lock:
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+        with path_lock:
+            signature = _signature(path)
+            cached = self._cached(path, signature)
+            if cached is not None:
+                return cached  # extracted by a concurrent caller meanwhile
+            result = extraction.extract_file(path)
+            if _signature(path) == signature:
+                with self._lock:
+                    self._entries[path] = (signature, result)
+                    self._entries.move_to_end(path)
+                    while len(self._entries) > self.max_entries:
+                        evicted, _ = self._entries.popitem(last=False)
+                        self._path_locks.pop(evicted, None)
+            return result
+
+    def read(self, path: str) -> extraction.ExtractionResult:
+        """Extraction of the file at *path*, re-parsed only when it changed on disk."""
+        path = os.path.abspath(path)
+        cached = self._cached(path, _signature(path))
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached
+        result = self._extract(path)
+        self._ensure_watcher()
+        return result
+
+    # -- background refresh ----------------------------------------------------
+
+    def _ensure_watcher(self) -> None:
+        if self.refresh_seconds <= 0 or self._watcher is not None:
+            return
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="read-doc-refresh", daemon=True)
+                self._watcher.start()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            self.refresh()
+
+    def refresh(self) -> int:
+        """Re-extract cached files that changed on disk; returns how many were refreshed."""
+        with self._lock:
+            entries = [(path, signature) for path, (signature, _) in self._entries.items()]
+        refreshed = 0
+        for path, signature in entries:
+            try:
+                if _signature(path) == signature:
+                    continue
+                self._extract(path)
+            except OSError:
+                # Deleted or mid-save; forget it rather than serve stale text
+                with self._lock:
+                    self._entries.pop(path, None)
+                continue
+            except Exception:
+                continue  # half-written file; retried on the next poll or read
+            refreshed += 1
+        with self._lock:
+            self.refreshes += refreshed
+        return refreshed
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+            }
+
+
+reader = DocumentReader()
 
 
 def get_active_document_text() -> Tuple[str, str]:
     """Return (absolute_path, extracted_text) for the current foreground document."""
-    active = gw.getActiveWindow()
-    if not active:
-        raise FileNotFoundError("No active window detected.")
-
-    title = active.title or ""
-
-    # 1. Try COM or command-line inspection via PID
-    hwnd = active._hWnd  # pygetwindow exposes private
-    try:
-        pid = win32process.GetWindowThreadProcessId(hwnd)[1]  # type: ignore
-    except Exception:
-        pid = None
-
-    file_path: Optional[str] = None
-    process_name = ""
-
-    if pid:
-        try:
-            process_name = psutil.Process(pid).name()
-        except Exception:
-            process_name = ""
-
-        # Office COM first (most reliable for Word/Excel)
-        file_path = _extract_from_office_com(process_name)
-
-        # Next: command-line args
-        if not file_path:
-            file_path = _extract_from_cmdline(pid)
-
-    # 2. Heuristic window-title fallback
-    if not file_path:
-        file_path = _extract_from_title(title)
-
-    if not file_path or not Path(file_path).exists():
-        raise FileNotFoundError("Could not determine path of active document.")
-
-    file_path = os.path.abspath(file_path)
-    ext = os.path.splitext(file_path)[1].lower()
-
-    text: str = ""
-    if ext == ".docx":
-        from docx import Document  # type: ignore
-
-        doc = Document(file_path)
-        text = "\n".join(p.text for p in doc.paragraphs)
-    elif ext == ".xlsx":
-        import openpyxl  # type: ignore
-
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        for ws in wb.worksheets:
-            for row in ws.iter_rows(values_only=True):
-                line = " ".join(str(c) for c in row if c is not None)
-                text += line + "\n"
-    elif ext == ".pdf":
-        import pdfplumber  # type: ignore
-
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text() or ""
-                text += extracted + "\n"
-    else:
-        raise FileNotFoundError(f"Unsupported extension: {ext}")
-
-    return file_path, text 
\ No newline at end of file
+    file_path = active_window.get_active_document_path()
+    return file_path, reader.read(file_path).text
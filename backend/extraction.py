@@ -0,0 +1,313 @@
+"""Shared text extraction engine used by uploads, comparisons and the desktop reader."""
+from __future__ import annotations
+
+import hashlib
+import io
+import mmap
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import BinaryIO, Iterable, Iterator, Union
+
+from backend import metrics
+from backend import workers
+from backend.extraction_cache import extraction_cache
+
+# A filesystem path, raw bytes, or an open binary file (e.g. a spooled upload)
+Source = Union[str, bytes, BinaryIO]
+
+# PDFs with fewer pages than this are parsed in-process; bigger ones are
+# split into page ranges across the worker pool.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+# Page ranges handed out per worker; >1 smooths out uneven page costs.
+PDF_RANGES_PER_WORKER = 4
+# Bump when extractor output changes so stale cache entries are ignored.
+EXTRACTOR_VERSION = 3
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised for file types the extraction engine cannot read."""
+
+
+@dataclass(frozen=True)
+class Block:
+    """A unit of extracted text and where it came from (``page 3``, ``Sheet1 row 12``, ...)."""
+
+    text: str
+    location: str
+
+
+@dataclass
+class ExtractionResult:
+    text: str
+    # Character offset at which each page starts in ``text``
+    page_offsets: list[int] = field(default_factory=list)
+    # Start offset and source location of every block in ``text``
+    block_offsets: list[int] = field(default_factory=list)
+    block_locations: list[str] = field(default_factory=list)
+
+
+def _join_blocks(blocks: Iterable[Block]) -> ExtractionResult:
+    """Concatenate *blocks* (one per line) while recording where each one starts."""
+    parts: list[str] = []
+    offsets: list[int] = []
+    locations: list[str] = []
+    position = 0
+    for block in blocks:
+        offsets.append(position)
+        locations.append(block.location)
+        parts.append(block.text)
+        parts.append("\n")
+        position += len(block.text) + 1
+    return ExtractionResult(text="".join(parts), block_offsets=offsets, block_locations=locations)
+
+
+# -- block readers -------------------------------------------------------------
+#
+# Each reader yields the document as ``Block``s in reading order, releasing
+# parsed pages and rows as it goes; the extractors below join them.
+
+
+def _page_blocks(pdf) -> Iterator[Block]:
+    for number, page in enumerate(pdf.pages, 1):
+        text = page.extract_text() or ""
+        page.close()  # drop the parsed layout objects of finished pages
+        yield Block(text, f"page {number}")
+
+
+def _docx_blocks(source: Source) -> Iterator[Block]:
+    from docx import Document  # type: ignore
+    from docx.table import Table  # type: ignore
+
+    doc = Document(io.BytesIO(source) if isinstance(source, bytes) else source)
+    paragraphs = tables = 0
+    # Paragraphs and tables interleaved in body order
+    for item in doc.iter_inner_content():
+        if not isinstance(item, Table):
+            paragraphs += 1
+            yield Block(item.text, f"paragraph {paragraphs}")
+            continue
+        tables += 1
+        for number, row in enumerate(item.rows, 1):
+            cells, seen = [], set()
+            for cell in row.cells:
+                # Merged cells are repeated once per grid column they span
+                if id(cell._tc) not in seen:
+                    seen.add(id(cell._tc))
+                    cells.append(cell.text.strip())
+            yield Block(" | ".join(cells), f"table {tables} row {number}")
+
+
+def _xlsx_blocks(source: Source) -> Iterator[Block]:
+    import openpyxl  # type: ignore
+
+    # Read-only mode streams rows from the sheet XML instead of building every cell
+    wb = openpyxl.load_workbook(
+        io.BytesIO(source) if isinstance(source, bytes) else source, read_only=True, data_only=True
+    )
+    try:
+        for ws in wb.worksheets:
+            # Read-only iter_rows starts at row 1 whatever the sheet's min_row
+            for number, row in enumerate(ws.iter_rows(values_only=True), 1):
+                text = " ".join(str(c) for c in row if c is not None)
+                if text:
+                    yield Block(text, f"{ws.title} row {number}")
+    finally:
+        wb.close()
+
+
+# Text mode ends lines at "\r" as well; readline() on a map only splits at "\n"
+_LONE_CR = re.compile(r"(?<=\r)(?!\n)")
+
+
+def _mapped_lines(path: str) -> Iterator[str]:
+    """Decoded lines of the file at *path*, read through a memory map instead of a read buffer."""
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return  # empty files cannot be mapped
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for raw in iter(mapped.readline, b""):
+                line = raw.decode("utf-8", errors="replace")
+                if "\r" in line:
+                    yield from (part for part in _LONE_CR.split(line) if part)
+                else:
+                    yield line
+
+
+def _txt_blocks(source: Source) -> Iterator[Block]:
+    # Blocks are paragraphs; blank lines stay with the paragraph before them
+    # so the joined text keeps the original layout.
+    if isinstance(source, bytes):
+        lines = io.StringIO(source.decode("utf-8", errors="replace"))
+    elif isinstance(source, str):
+        lines = _mapped_lines(source)
+    else:
+        lines = io.TextIOWrapper(source, encoding="utf-8", errors="replace")
+    try:
+        buffer: list[str] = []
+        first = 1
+        has_text = blank_after = False
+        for number, line in enumerate(lines, 1):
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                blank_after = has_text
+                buffer.append(line)
+                continue
+            if blank_after:
+                yield Block("\n".join(buffer), f"line {first}")
+                buffer, has_text, blank_after = [], False, False
+            if not has_text:
+                first, has_text = number, True
+            buffer.append(line)
+        if buffer:
+            yield Block("\n".join(buffer), f"line {first}")
+    finally:
+        # Leave a caller's file open; only close what was opened here
+        if isinstance(lines, io.TextIOWrapper) and not isinstance(source, str):
+            lines.detach()
+        else:
+            lines.close()
+
+
+# -- whole-document extractors ---------------------------------------------------
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> list[str]:
+    """Extract the text of pages [start, stop) of the PDF at *path* (worker entrypoint)."""
+    import pdfplumber  # type: ignore
+
+    with pdfplumber.open(path) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _join_pages(blocks: Iterable[Block]) -> ExtractionResult:
+    result = _join_blocks(blocks)
+    result.page_offsets = list(result.block_offsets)
+    return result
+
+
+def _extract_pdf_path(path: str) -> ExtractionResult:
+    import pdfplumber  # type: ignore
+
+    with pdfplumber.open(path) as pdf:
+        page_count = len(pdf.pages)
+        if page_count < PDF_PARALLEL_MIN_PAGES or workers.CPU_WORKERS < 2:
+            return _join_pages(_page_blocks(pdf))
+
+    pool = workers.get_process_pool()
+    step = max(1, -(-page_count // (workers.CPU_WORKERS * PDF_RANGES_PER_WORKER)))
+    futures = [
+        pool.submit(_extract_page_range, path, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+    # Futures are collected in submission order, which keeps pages in order
+    pages: list[str] = []
+    for future in futures:
+        pages.extend(future.result())
+    return _join_pages(Block(text, f"page {number}") for number, text in enumerate(pages, 1))
+
+
+def extract_pdf(source: Source) -> ExtractionResult:
+    """Extract text from a PDF given as a filesystem path, raw bytes or an open file."""
+    if isinstance(source, str):
+        return _extract_pdf_path(source)
+    import pdfplumber  # type: ignore
+
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source) as pdf:
+        if len(pdf.pages) < PDF_PARALLEL_MIN_PAGES or workers.CPU_WORKERS < 2:
+            return _join_pages(_page_blocks(pdf))
+    # Workers open the file themselves, so hand them a path instead of
+    # pickling the whole document into every task.
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        if isinstance(source, bytes):
+            tmp.write(source)
+        else:
+            source.seek(0)
+            shutil.copyfileobj(source, tmp)
+    try:
+        return _extract_pdf_path(tmp.name)
+    finally:
+        os.unlink(tmp.name)
+
+
+def _extract_docx(source: Source) -> ExtractionResult:
+    return _join_blocks(_docx_blocks(source))
+
+
+def _extract_xlsx(source: Source) -> ExtractionResult:
+    return _join_blocks(_xlsx_blocks(source))
+
+
+def _extract_txt(source: Source) -> ExtractionResult:
+    return _join_blocks(_txt_blocks(source))
+
+
+_EXTRACTORS = {
+    ".pdf": extract_pdf,
+    ".docx": _extract_docx,
+    ".doc": _extract_docx,
+    ".xlsx": _extract_xlsx,
+    ".txt": _extract_txt,
+}
+
+
+def _extension(filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in _EXTRACTORS:
+        raise UnsupportedFormatError(f"Unsupported file type: {filename}")
+    return ext
+
+
+def warm_up() -> None:
+    """Import the parser libraries ahead of the first upload; they load lazily otherwise."""
+    import docx  # type: ignore  # noqa: F401
+    import openpyxl  # type: ignore  # noqa: F401
+    import pdfplumber  # type: ignore  # noqa: F401
+
+
+def is_supported(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in _EXTRACTORS
+
+
+def extract_file(source: Source, filename: str | None = None) -> ExtractionResult:
+    """Extract text from a path, raw bytes or an open file, picking the extractor from *filename*."""
+    ext = _extension(filename or str(source))
+    with metrics.timed("extraction", detail=ext[1:]) as log:
+        result = _EXTRACTORS[ext](source)
+        log["characters"] = len(result.text)
+    return result
+
+
+def extract_upload(source: Source, filename: str, digest: str | None = None) -> ExtractionResult:
+    """Extract an uploaded file, reusing the cached result for identical bytes.
+
+    *source* is the upload (path, in-memory bytes or its spooled file) and *digest* its
+    SHA-256, when already computed while receiving it.
+    """
+    ext = _extension(filename)
+    if digest is None:
+        if isinstance(source, bytes):
+            digest = hashlib.sha256(source).hexdigest()
+        else:
+            hasher = hashlib.sha256()
+            fh = open(source, "rb") if isinstance(source, str) else source
+            fh.seek(0)
+            for block in iter(lambda: fh.read(1024 * 1024), b""):
+                hasher.update(block)
+            if fh is source:
+                fh.seek(0)
+            else:
+                fh.close()
+            digest = hasher.hexdigest()
+    key = f"{digest}-{ext[1:]}-v{EXTRACTOR_VERSION}"
+    with metrics.timed("extraction", detail=ext[1:]) as log:
+        cached = extraction_cache.get(key)
+        log["cache"] = "hit" if cached is not None else "miss"
+        if cached is not None:
+            return ExtractionResult(**cached)
+        result = _EXTRACTORS[ext](source)
+        log["characters"] = len(result.text)
+    extraction_cache.put(key, asdict(result))
+    return result
@@ -0,0 +1,522 @@
+"""Background batch jobs for bulk summarisation and comparison."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from backend import state_store
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(tempfile.gettempdir(), "docbot-jobs"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+# Files accepted by one POST /jobs/upload request (each up to UPLOAD_MAX_BYTES).
+JOB_UPLOAD_MAX_FILES = int(os.getenv("JOB_UPLOAD_MAX_FILES", "50"))
+# With STATE_BACKEND=sqlite: how long a claimed item stays with its worker
+# (renewed while it runs) and how often idle workers look for new items.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+
+Handler = Callable[[dict], Awaitable[dict]]
+
+logger = logging.getLogger(__name__)
+
+
+class JobsUnavailableError(RuntimeError):
+    """Raised when this process cannot accept jobs (another process owns ``JOBS_DIR``)."""
+
+
+def _try_lock(fh) -> bool:
+    """Take a non-blocking exclusive lock on the open file *fh*; released when it is closed."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _retry_delay(attempts: int) -> float:
+    """Jittered exponential backoff before the next attempt of an item."""
+    return JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+
+
+@dataclass
+class JobItem:
+    input: dict
+    status: str = "pending"  # pending | running | done | failed
+    attempts: int = 0
+    result: dict | None = None
+    error: str | None = None
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    items: list[JobItem]
+    created: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+
+    def counts(self) -> dict:
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        for item in self.items:
+            counts[item.status] += 1
+        return counts
+
+    @property
+    def status(self) -> str:
+        counts = self.counts()
+        if counts["pending"] or counts["running"]:
+            return "running" if self.started else "queued"
+        return "failed" if counts["failed"] == len(self.items) else "completed"
+
+    def summary(self) -> dict:
+        counts = self.counts()
+        completed = counts["done"] + counts["failed"]
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": len(self.items),
+            **counts,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_minute": round(completed / elapsed * 60, 2) if elapsed else 0.0,
+        }
+
+
+class JobManager:
+    """Queue of job items drained by a fixed pool of asyncio workers.
+
+    *handlers* map a job kind to the coroutine that processes one item; a
+    handler signals failure by raising. Failed items are retried with
+    jittered exponential backoff up to ``JOB_MAX_ATTEMPTS`` times. Every job
+    is written to ``JOBS_DIR`` (on a thread) after each item, so results
+    survive restarts and unfinished items are picked up again on the next
+    start.
+
+    Jobs live in this process, so only one process may run them: the first
+    to start locks ``JOBS_DIR`` and the others reject submissions with
+    ``JobsUnavailableError``. ``SharedJobManager`` lifts this restriction.
+    """
+
+    def __init__(self, handlers: dict[str, Handler], directory: str = JOBS_DIR, workers: int = JOB_WORKERS):
+        self.handlers = handlers
+        self.directory = Path(directory)
+        self.worker_count = workers
+        self.jobs: dict[str, Job] = {}
+        # asyncio primitives bind to the loop that first uses them, so they are
+        # created per start() (one app lifespan) rather than at import time.
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._changed: dict[str, asyncio.Event] = {}
+        self._saving: dict[str, asyncio.Task] = {}
+        self._dirty: set[str] = set()
+        self._lock_file = None
+
+    # -- persistence -------------------------------------------------------
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _save(self, job: Job) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(asdict(job), fh)
+        os.replace(tmp, self._path(job.job_id))
+        if job.finished:
+            shutil.rmtree(self.directory / job.job_id, ignore_errors=True)
+
+    def _schedule_save(self, job: Job) -> None:
+        """Save *job* on a thread; changes made while a save runs are written by one more save."""
+        if job.job_id in self._saving:
+            self._dirty.add(job.job_id)
+            return
+        self._saving[job.job_id] = asyncio.create_task(self._save_until_clean(job))
+
+    async def _save_until_clean(self, job: Job) -> None:
+        try:
+            while True:
+                self._dirty.discard(job.job_id)
+                await asyncio.to_thread(self._save, job)
+                if job.job_id not in self._dirty:
+                    return
+        except Exception as exc:
+            logger.warning("Saving job %s failed: %s", job.job_id, exc)
+        finally:
+            self._saving.pop(job.job_id, None)
+
+    def _load_all(self) -> None:
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob("*.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            data["items"] = [JobItem(**item) for item in data["items"]]
+            job = Job(**data)
+            for index, item in enumerate(job.items):
+                if item.status in ("pending", "running"):
+                    item.status = "pending"
+                    self._queue.put_nowait((job.job_id, index))
+            self.jobs[job.job_id] = job
+
+    def input_path(self, job_id: str, name: str) -> str:
+        """Path for an input file of *job_id*; inputs are deleted once the job finishes.
+
+        Inputs live on disk rather than in the job record so that saving
+        progress after every item stays cheap.
+        """
+        path = self.directory / job_id
+        path.mkdir(parents=True, exist_ok=True)
+        return str(path / name)
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def _own_directory(self) -> bool:
+        if self._lock_file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fh = open(self.directory / ".lock", "a+b")
+            if not _try_lock(fh):
+                fh.close()
+                return False
+            self._lock_file = fh
+        return True
+
+    async def start(self) -> None:
+        """Reload persisted jobs and start the workers (call from the running loop)."""
+        self._queue = asyncio.Queue()
+        self._changed = {}
+        if not self._own_directory():
+            # Requeueing here too would run every unfinished item once per process
+            logger.warning(
+                "%s is used by another process; batch jobs are disabled here "
+                "(use STATE_BACKEND=sqlite to run them on several workers)", self.directory,
+            )
+            return
+        self._load_all()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await asyncio.gather(*self._saving.values(), return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def _new_job(self, kind: str, inputs: list[dict], job_id: str | None) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if not inputs:
+            raise ValueError("A job needs at least one item")
+        return Job(job_id=job_id or str(uuid.uuid4()), kind=kind, items=[JobItem(input=i) for i in inputs])
+
+    def check_available(self) -> None:
+        """Raise ``JobsUnavailableError`` when this process cannot accept jobs."""
+        if not self._workers:
+            raise JobsUnavailableError(
+                "Batch jobs run in a single server process; set STATE_BACKEND=sqlite to run them on several workers"
+            )
+
+    async def submit(self, kind: str, inputs: list[dict], job_id: str | None = None) -> Job:
+        """Persist a new job and queue its items (call from the running loop)."""
+        self.check_available()
+        job = self._new_job(kind, inputs, job_id)
+        await asyncio.to_thread(self._save, job)
+        self.jobs[job.job_id] = job
+        for index in range(len(job.items)):
+            self._queue.put_nowait((job.job_id, index))
+        return job
+
+    async def wait_for_change(self, job_id: str, timeout: float) -> None:
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        event.clear()
+
+    def _notify(self, job: Job) -> None:
+        self._notify_id(job.job_id)
+
+    def _notify_id(self, job_id: str) -> None:
+        event = self._changed.get(job_id)
+        if event:
+            event.set()
+
+    # -- processing --------------------------------------------------------
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, index = await self._queue.get()
+            try:
+                await self._process(job_id, index)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job_id: str, index: int) -> None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        item = job.items[index]
+        job.started = job.started or time.time()
+        item.status = "running"
+        item.attempts += 1
+        self._notify(job)
+        try:
+            item.result = await self.handlers[job.kind](item.input)
+            item.status, item.error = "done", None
+        except asyncio.CancelledError:
+            item.status = "pending"
+            raise
+        except Exception as exc:
+            item.error = str(exc) or exc.__class__.__name__
+            if item.attempts < JOB_MAX_ATTEMPTS:
+                item.status = "pending"
+                asyncio.get_running_loop().call_later(
+                    _retry_delay(item.attempts), self._queue.put_nowait, (job_id, index)
+                )
+            else:
+                item.status = "failed"
+
+        counts = job.counts()
+        if not counts["pending"] and not counts["running"]:
+            job.finished = time.time()
+        self._schedule_save(job)
+        self._notify(job)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    input TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    -- pending: earliest next attempt (retry backoff); running: lease expiry
+    available_at REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_job_items_claim ON job_items (status, available_at);
+"""
+
+
+class SharedJobManager(JobManager):
+    """Jobs kept in the shared SQLite state database and processed by every server process.
+
+    A worker claims one item at a time by leasing it for ``JOB_LEASE_SECONDS``,
+    renewing the lease while the handler runs; an item whose lease runs out
+    (its process died) is claimed again elsewhere. The attempt number taken
+    with the lease fences writes, so a worker that lost its lease cannot
+    overwrite the item. Input files in ``JOBS_DIR`` must be visible to every
+    process, as with the state database itself.
+    """
+
+    def __init__(self, handlers: dict[str, Handler], state: state_store.SqliteState,
+                 directory: str = JOBS_DIR, workers: int = JOB_WORKERS):
+        super().__init__(handlers, directory, workers)
+        self.state = state
+        self.state.executescript(_SCHEMA)
+        self._wake: asyncio.Event | None = None
+
+    async def start(self) -> None:
+        self._changed = {}
+        self._wake = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    def get(self, job_id: str) -> Job | None:
+        row = self.state.execute(
+            "SELECT kind, created, started, finished FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        items = [
+            JobItem(
+                input=json.loads(item_input), status=item_status, attempts=attempts,
+                result=json.loads(result) if result is not None else None, error=error,
+            )
+            for item_input, item_status, attempts, result, error in self.state.execute(
+                "SELECT input, status, attempts, result, error FROM job_items WHERE job_id = ? ORDER BY position",
+                (job_id,),
+            )
+        ]
+        return Job(job_id=job_id, kind=row[0], items=items, created=row[1], started=row[2], finished=row[3])
+
+    def _insert(self, job: Job) -> None:
+        with self.state.transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, created) VALUES (?, ?, ?)", (job.job_id, job.kind, job.created)
+            )
+            conn.executemany(
+                "INSERT INTO job_items (job_id, position, input) VALUES (?, ?, ?)",
+                [(job.job_id, position, json.dumps(item.input)) for position, item in enumerate(job.items)],
+            )
+
+    async def submit(self, kind: str, inputs: list[dict], job_id: str | None = None) -> Job:
+        self.check_available()
+        job = self._new_job(kind, inputs, job_id)
+        await asyncio.to_thread(self._insert, job)
+        self._wake.set()
+        return job
+
+    async def wait_for_change(self, job_id: str, timeout: float) -> None:
+        # Items finished by other processes are only seen by reading again
+        await super().wait_for_change(job_id, min(timeout, JOB_POLL_SECONDS))
+
+    # -- claiming ----------------------------------------------------------
+
+    def _finish_job(self, conn, job_id: str, now: float) -> bool:
+        """Mark *job_id* finished once no item is left to run; True when this call did."""
+        if conn.execute(
+            "SELECT 1 FROM job_items WHERE job_id = ? AND status IN ('pending', 'running') LIMIT 1", (job_id,)
+        ).fetchone():
+            return False
+        return conn.execute(
+            "UPDATE jobs SET finished = ? WHERE job_id = ? AND finished IS NULL", (now, job_id)
+        ).rowcount > 0
+
+    def _claim(self) -> tuple[str, int, str, dict, int] | None:
+        """Lease the next runnable item: (job id, position, kind, input, attempt number)."""
+        finished: list[str] = []
+        try:
+            while True:
+                now = time.time()
+                with self.state.transaction() as conn:
+                    row = conn.execute(
+                        "SELECT i.job_id, i.position, i.input, i.status, i.attempts, j.kind "
+                        "FROM job_items i JOIN jobs j ON j.job_id = i.job_id "
+                        "WHERE i.status IN ('pending', 'running') AND i.available_at <= ? "
+                        "ORDER BY i.rowid LIMIT 1",
+                        (now,),
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    job_id, position, item_input, item_status, attempts, kind = row
+                    if item_status == "running" and attempts >= JOB_MAX_ATTEMPTS:
+                        # Its worker died on the last attempt
+                        conn.execute(
+                            "UPDATE job_items SET status = 'failed', error = ? WHERE job_id = ? AND position = ?",
+                            ("Worker stopped while processing the item", job_id, position),
+                        )
+                        if self._finish_job(conn, job_id, now):
+                            finished.append(job_id)
+                        continue
+                    conn.execute(
+                        "UPDATE job_items SET status = 'running', attempts = ?, available_at = ? "
+                        "WHERE job_id = ? AND position = ?",
+                        (attempts + 1, now + JOB_LEASE_SECONDS, job_id, position),
+                    )
+                    conn.execute("UPDATE jobs SET started = COALESCE(started, ?) WHERE job_id = ?", (now, job_id))
+                return job_id, position, kind, json.loads(item_input), attempts + 1
+        finally:
+            for job_id in finished:
+                shutil.rmtree(self.directory / job_id, ignore_errors=True)
+
+    def _renew(self, job_id: str, position: int, attempts: int) -> None:
+        self.state.execute(
+            "UPDATE job_items SET available_at = ? "
+            "WHERE job_id = ? AND position = ? AND attempts = ? AND status = 'running'",
+            (time.time() + JOB_LEASE_SECONDS, job_id, position, attempts),
+        )
+
+    def _complete(self, job_id: str, position: int, attempts: int, item_status: str,
+                  result: dict | None, error: str | None, available_at: float = 0.0) -> None:
+        now = time.time()
+        with self.state.transaction() as conn:
+            updated = conn.execute(
+                "UPDATE job_items SET status = ?, result = ?, error = ?, available_at = ? "
+                "WHERE job_id = ? AND position = ? AND attempts = ? AND status = 'running'",
+                (item_status, json.dumps(result) if result is not None else None, error, available_at,
+                 job_id, position, attempts),
+            ).rowcount
+            finished = updated > 0 and self._finish_job(conn, job_id, now)
+        if finished:
+            shutil.rmtree(self.directory / job_id, ignore_errors=True)
+
+    # -- processing --------------------------------------------------------
+
+    async def _worker(self) -> None:
+        while True:
+            claimed = await asyncio.to_thread(self._claim)
+            if claimed is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(*claimed)
+
+    async def _keep_lease(self, job_id: str, position: int, attempts: int) -> None:
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            await asyncio.to_thread(self._renew, job_id, position, attempts)
+
+    async def _run(self, job_id: str, position: int, kind: str, item_input: dict, attempts: int) -> None:
+        self._notify_id(job_id)
+        lease = asyncio.create_task(self._keep_lease(job_id, position, attempts))
+        try:
+            result = await self.handlers[kind](item_input)
+            outcome = ("done", result, None, 0.0)
+        except asyncio.CancelledError:
+            # Shutting down: hand the item back right away instead of waiting for the lease
+            self._complete(job_id, position, attempts, "pending", None, None)
+            raise
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+            if attempts < JOB_MAX_ATTEMPTS:
+                outcome = ("pending", None, error, time.time() + _retry_delay(attempts))
+            else:
+                outcome = ("failed", None, error, 0.0)
+        finally:
+            lease.cancel()
+        await asyncio.to_thread(self._complete, job_id, position, attempts, *outcome)
+        self._notify_id(job_id)
+
+
+def create_manager(handlers: dict[str, Handler]) -> JobManager:
+    """The job manager selected by ``STATE_BACKEND``: in this process, or shared through SQLite."""
+    if state_store.STATE_BACKEND == "sqlite":
+        return SharedJobManager(handlers, state_store.shared_state())
+    return JobManager(handlers)
@@ -0,0 +1,120 @@
+"""Async gateway that keeps blocking Gemini calls and CPU-heavy work off the event loop."""
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+# Dedicated threads for upstream calls so slow LLM requests never starve the
+# default executor used for extraction and other blocking work.
+_llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+# Created on first use in each event loop: a semaphore bound to the loop of an
+# earlier app lifespan (or test client) would fail in the next one.
+_semaphore: asyncio.Semaphore | None = None
+_semaphore_loop: asyncio.AbstractEventLoop | None = None
+_in_flight = 0
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when an upstream LLM call exceeds its deadline."""
+
+
+def in_flight() -> int:
+    """Number of LLM calls currently running in the gateway."""
+    return _in_flight
+
+
+def _slots() -> asyncio.Semaphore:
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore, _semaphore_loop = asyncio.Semaphore(LLM_MAX_CONCURRENCY), loop
+    return _semaphore
+
+
+def _release(semaphore: asyncio.Semaphore, _future: Any) -> None:
+    global _in_flight
+    _in_flight -= 1
+    semaphore.release()
+
+
+async def call(fn: Callable[..., T], *args: Any, timeout: float | None = LLM_TIMEOUT_SECONDS, **kwargs: Any) -> T:
+    """Run the blocking LLM function *fn* in the gateway pool and await its result.
+
+    At most ``LLM_MAX_CONCURRENCY`` calls run at once. The slot is only given
+    back once the worker thread really finishes, so a timed-out call still
+    counts against the limit until Gemini returns.
+    """
+    global _in_flight
+    semaphore = _slots()
+    await semaphore.acquire()
+    _in_flight += 1
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_llm_executor, functools.partial(fn, *args, **kwargs))
+    future.add_done_callback(functools.partial(_release, semaphore))
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError as exc:
+        raise LLMTimeoutError(f"{getattr(fn, '__name__', 'LLM call')} timed out after {timeout:g}s") from exc
+
+
+async def stream(
+    fn: Callable[..., Iterable[str]], *args: Any, timeout: float | None = LLM_TIMEOUT_SECONDS, **kwargs: Any
+) -> AsyncIterator[str]:
+    """Iterate a blocking streaming LLM function from async code.
+
+    The generator returned by *fn* is drained on a gateway thread and each
+    piece is handed to the event loop as soon as it arrives. *timeout* bounds
+    the wait for every individual piece, not the whole stream. Closing the
+    async iterator early (e.g. the client disconnected) stops the worker.
+    """
+    global _in_flight
+    semaphore = _slots()
+    await semaphore.acquire()
+    _in_flight += 1
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def _drain() -> None:
+        try:
+            for piece in fn(*args, **kwargs):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, piece)
+        except BaseException as exc:  # forwarded to the consumer
+            loop.call_soon_threadsafe(queue.put_nowait, exc)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    future = loop.run_in_executor(_llm_executor, _drain)
+    future.add_done_callback(functools.partial(_release, semaphore))
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError as exc:
+                raise LLMTimeoutError(
+                    f"{getattr(fn, '__name__', 'LLM stream')} stalled for more than {timeout:g}s"
+                ) from exc
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-heavy or blocking work (parsing, indexing) off the event loop."""
+    return await asyncio.to_thread(fn, *args, **kwargs)
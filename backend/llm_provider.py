@@ -0,0 +1,392 @@
+"""LLM provider layer: Gemini or a local fake, behind retries, hedging and a circuit breaker."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator
+
+from backend import metrics
+from backend.llm_gateway import LLM_MAX_CONCURRENCY
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")  # gemini | fake
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+# Send a second, identical request when the first one is slower than the
+# observed p95 latency; whichever answers first wins.
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_MIN_SAMPLES = 20
+# Consecutive failures that open the breaker, and how long it stays open.
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "50"))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "0"))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+
+# HTTP statuses / gRPC errors worth another attempt.
+_RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = {
+    "DeadlineExceeded", "InternalServerError", "ResourceExhausted", "ServiceUnavailable", "TooManyRequests",
+}
+
+
+class ProviderError(RuntimeError):
+    """Raised when the provider cannot produce a reply."""
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class TransientProviderError(ProviderError):
+    """A failure that is expected to go away on retry (used by the fake provider)."""
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (TransientProviderError, ConnectionError, TimeoutError)):
+        return True
+    if type(exc).__name__ in _RETRYABLE_NAMES:
+        return True
+    code = getattr(exc, "code", None)
+    return isinstance(code, int) and code in _RETRYABLE_CODES
+
+
+# -- providers ---------------------------------------------------------------
+
+
+class GeminiProvider:
+    """Google Gemini through ``google.generativeai``; one configured model object is reused."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str | None = None, model: str = MODEL_NAME):
+        self.api_key = api_key if api_key is not None else os.getenv("GEMINI_API_KEY")
+        self.model_name = model
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def _client(self):
+        # The SDK is slow to import and keeps its HTTP channel on the model
+        # object, so both are created once, on first use.
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    if not self.api_key:
+                        raise EnvironmentError("GEMINI_API_KEY not found in environment variables.")
+                    import google.generativeai as genai  # type: ignore
+
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def warm_up(self) -> None:
+        if self.available:
+            self._client()
+
+    def generate(self, prompt: str, config: dict) -> str:
+        response = self._client().generate_content(prompt, generation_config=config)
+        return response.text.strip()
+
+    def stream(self, prompt: str, config: dict) -> Iterator[str]:
+        response = self._client().generate_content(prompt, generation_config=config, stream=True)
+        for chunk in response:
+            try:
+                piece = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata) carry nothing to show
+                continue
+            if piece:
+                yield piece
+
+
+class FakeProvider:
+    """Deterministic in-process stand-in for load tests and offline development.
+
+    The reply depends only on the prompt: five bullet lines built from the
+    prompt's own words, so callers that parse lines keep working; in JSON
+    mode (``response_mime_type``) they come back as a digest object.
+    Latency is ``latency_ms`` plus up to ``jitter_ms``, and a
+    ``failure_rate`` fraction of calls raise a retryable error.
+    """
+
+    name = "fake"
+    available = True
+
+    def __init__(
+        self,
+        latency_ms: float = FAKE_LLM_LATENCY_MS,
+        jitter_ms: float = FAKE_LLM_JITTER_MS,
+        failure_rate: float = FAKE_LLM_FAILURE_RATE,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+
+    def warm_up(self) -> None:
+        pass
+
+    def _reply(self, prompt: str, config: dict | None = None) -> tuple[str, float]:
+        digest = hashlib.sha256(prompt.encode("utf-8", "surrogatepass")).digest()
+        rng = random.Random(digest)
+        words = re.findall(r"[A-Za-z][A-Za-z'-]{3,}", prompt[-4000:]) or ["document"]
+        lines = [
+            "- " + " ".join(rng.choice(words) for _ in range(rng.randint(6, 12))).capitalize() + "."
+            for _ in range(5)
+        ]
+        delay = (self.latency_ms + rng.random() * self.jitter_ms) / 1000
+        if (config or {}).get("response_mime_type") == "application/json":
+            return json.dumps({
+                "summary": [line[2:] for line in lines],
+                "questions": [f"What does the document say about {rng.choice(words).lower()}?" for _ in range(3)],
+                "key_terms": sorted({word.lower() for word in rng.sample(words, min(len(words), 8))}),
+                "deadlines": [],
+            }), delay
+        return "\n".join(lines), delay
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise TransientProviderError("Simulated upstream failure")
+
+    def generate(self, prompt: str, config: dict) -> str:
+        text, delay = self._reply(prompt, config)
+        time.sleep(delay)
+        self._maybe_fail()
+        return text
+
+    def stream(self, prompt: str, config: dict) -> Iterator[str]:
+        text, delay = self._reply(prompt, config)
+        self._maybe_fail()
+        pieces = re.findall(r"\S+\s*", text)
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            yield piece
+
+
+# -- resilience ----------------------------------------------------------------
+
+
+class CircuitBreaker:
+    """Opens after *failures* consecutive failures; after *reset_seconds* one trial call is let through."""
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.threshold = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class ResilientProvider:
+    """Wrap a provider with jittered-backoff retries, optional hedging and a circuit breaker."""
+
+    def __init__(
+        self,
+        provider,
+        retries: int = LLM_MAX_RETRIES,
+        retry_base_seconds: float = LLM_RETRY_BASE_SECONDS,
+        hedge: bool = LLM_HEDGE,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.provider = provider
+        self.retries = retries
+        self.retry_base_seconds = retry_base_seconds
+        self.hedge = hedge
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies: deque[float] = deque(maxlen=500)
+        # Every gateway thread may have a primary and a hedged request in flight
+        self._hedge_executor = (
+            ThreadPoolExecutor(max_workers=2 * LLM_MAX_CONCURRENCY, thread_name_prefix="llm-hedge") if hedge else None
+        )
+        self.calls = 0
+        self.retried = 0
+        self.hedged = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    @property
+    def available(self) -> bool:
+        return self.provider.available
+
+    def warm_up(self) -> None:
+        self.provider.warm_up()
+
+    def p95(self) -> float | None:
+        if len(self._latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _attempt(self, prompt: str, config: dict) -> str:
+        threshold = self.p95() if self._hedge_executor else None
+        if threshold is None:
+            return self.provider.generate(prompt, config)
+        first = self._hedge_executor.submit(self.provider.generate, prompt, config)
+        done, _ = wait([first], timeout=threshold)
+        if done:
+            return first.result()
+        self.hedged += 1
+        second = self._hedge_executor.submit(self.provider.generate, prompt, config)
+        pending = {first, second}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+            if not pending:
+                return next(iter(done)).result()
+
+    def _backoff(self, attempt: int) -> None:
+        self.retried += 1
+        time.sleep(self.retry_base_seconds * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def _record_error(self, retryable: bool) -> None:
+        self.failed += 1
+        # Only upstream trouble counts against the breaker; a rejected
+        # request (bad input, safety block) still proves upstream is healthy.
+        if retryable:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _check_breaker(self) -> None:
+        if not self.breaker.allow():
+            self.rejected += 1
+            metrics.llm_calls.inc(provider=self.name, outcome="rejected")
+            raise CircuitOpenError(f"{self.name} is unavailable after repeated failures; retrying later")
+
+    def _observe(self, prompt: str, reply_chars: int, outcome: str) -> None:
+        metrics.llm_calls.inc(provider=self.name, outcome=outcome)
+        metrics.llm_prompt_chars.observe(len(prompt), provider=self.name)
+        if outcome == "ok":
+            metrics.llm_response_chars.observe(reply_chars, provider=self.name)
+
+    def generate(self, prompt: str, config: dict) -> str:
+        self._check_breaker()
+        self.calls += 1
+        with metrics.timed("llm_call", detail=self.name, prompt_characters=len(prompt)) as log:
+            for attempt in range(self.retries + 1):
+                started = time.monotonic()
+                try:
+                    result = self._attempt(prompt, config)
+                except Exception as exc:
+                    retryable = _retryable(exc)
+                    if attempt < self.retries and retryable:
+                        self._backoff(attempt)
+                        continue
+                    self._record_error(retryable)
+                    self._observe(prompt, 0, "error")
+                    raise
+                self._latencies.append(time.monotonic() - started)
+                self.breaker.record_success()
+                log.update(attempts=attempt + 1, response_characters=len(result))
+                self._observe(prompt, len(result), "ok")
+                return result
+        raise AssertionError("unreachable")
+
+    def stream(self, prompt: str, config: dict) -> Iterator[str]:
+        """Stream a reply; only failures before the first piece are retried."""
+        self._check_breaker()
+        self.calls += 1
+        received = 0
+        with metrics.timed("llm_call", detail=f"{self.name}-stream", prompt_characters=len(prompt)) as log:
+            for attempt in range(self.retries + 1):
+                started = False
+                try:
+                    for piece in self.provider.stream(prompt, config):
+                        started = True
+                        received += len(piece)
+                        yield piece
+                except GeneratorExit:
+                    # Consumer went away mid-stream; upstream was answering fine
+                    self.breaker.record_success()
+                    log["response_characters"] = received
+                    self._observe(prompt, received, "closed")
+                    raise
+                except Exception as exc:
+                    retryable = _retryable(exc)
+                    if not started and attempt < self.retries and retryable:
+                        self._backoff(attempt)
+                        continue
+                    self._record_error(retryable)
+                    self._observe(prompt, 0, "error")
+                    raise
+                self.breaker.record_success()
+                log.update(attempts=attempt + 1, response_characters=received)
+                self._observe(prompt, received, "ok")
+                return
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        return {
+            "provider": self.name,
+            "breaker": self.breaker.state,
+            "calls": self.calls,
+            "retried": self.retried,
+            "hedged": self.hedged,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "p95_seconds": round(p95, 4) if p95 is not None else None,
+        }
+
+
+_PROVIDERS = {"gemini": GeminiProvider, "fake": FakeProvider}
+_provider: ResilientProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> ResilientProvider:
+    """The process-wide provider selected by ``LLM_PROVIDER``."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if LLM_PROVIDER not in _PROVIDERS:
+                    raise ValueError(f"Unknown LLM_PROVIDER: {LLM_PROVIDER} (expected one of {sorted(_PROVIDERS)})")
+                _provider = ResilientProvider(_PROVIDERS[LLM_PROVIDER]())
+    return _provider
@@ -4,23 +4,65 @@ from __future__ import annotations
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import Depends, FastAPI, Header, HTTPException, status, UploadFile, File
+from fastapi import Depends, FastAPI, Form, Header, HTTPException, status, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-import io
-import pdfplumber
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import AsyncIterator
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
 
+from backend import active_window
 from backend import auth as auth_utils
 from backend import chatbot
+from backend import doc_store
 from backend import document_reader
+from backend import extraction
+from backend import jobs
+from backend.extraction_cache import extraction_cache
+from backend import llm_cache
+from backend import llm_gateway
+from backend import llm_provider
+from backend import metrics
+from backend import near_duplicates
+from backend import notes_store
+from backend import precompute
+from backend import prompt_builder
+from backend import retrieval
+from backend import state_store
+from backend import summariser
+from backend import text_locator
+from backend import uploads
+from backend import workers
 from backend.schemas import (
     AskRequest, AskResponse, LoginRequest, LoginResponse, ReadDocResponse, 
     SummariseRequest, SummariseResponse, UploadResponse, AutoSuggestionsResponse,
     ExplainRequest, ExplainResponse, NoteRequest, NoteResponse, NotesListResponse,
-    CompareRequest, CompareResponse
+    NotesBulkRequest, NotesBulkDeleteRequest, NotesBulkDeleteResponse,
+    CompareRequest, CompareByIdRequest, CompareResponse, CompareChangesResponse, PassageSource,
+    JobSubmitRequest, JobStatusResponse, JobResultsResponse, DocumentInsightsResponse, NearDuplicateMatch
 )
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Secure Document Chatbot")
 
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+
+# Body limits of the upload routes: as many files as the route takes, plus multipart overhead.
+app.add_middleware(uploads.UploadSizeLimitMiddleware, limits={
+    path: files * uploads.UPLOAD_MAX_BYTES + uploads.MULTIPART_OVERHEAD_BYTES
+    for path, files in (("/upload", 1), ("/compare", 2), ("/jobs/upload", jobs.JOB_UPLOAD_MAX_FILES))
+})
+
 # Allow local frontend dev server; adjust in production.
 app.add_middleware(
     CORSMiddleware,
@@ -31,14 +73,459 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory mapping from JWT token -> last extracted document text.
-session_docs: dict[str, str] = {}
-doc_sessions: dict[str, list[dict]] = {}
+
+class EventStreamAwareGZipMiddleware:
+    """GZip responses except Server-Sent Event streams.
+
+    Starlette before 0.37 (pinned by fastapi 0.110) compresses and buffers
+    ``text/event-stream`` bodies, so tokens would arrive only when the stream
+    ends. The SSE endpoints are known by path, so those requests bypass
+    compression entirely.
+    """
+
+    def __init__(self, app, **options):
+        self.app = app
+        self.gzip = GZipMiddleware(app, **options)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith(("/stream", "/events")):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+# Compare results and long summaries are mostly text; event streams are left alone.
+app.add_middleware(EventStreamAwareGZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
+# Added last so it is outermost: rejected uploads and CORS preflights are timed too.
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+MAX_CACHED_INDEXES = int(os.getenv("MAX_CACHED_INDEXES", "32"))
+COMPARE_PAGE_SIZE = int(os.getenv("COMPARE_PAGE_SIZE", "50"))
+MAX_STORED_COMPARISONS = int(os.getenv("MAX_STORED_COMPARISONS", "64"))
+COMPARE_CACHE_ENTRIES = int(os.getenv("COMPARE_CACHE_ENTRIES", "128"))
+# Load the Gemini SDK and parsers and hash the default credentials in the
+# background right after startup instead of on the first request.
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "1") == "1"
+# Build the retrieval index, key terms, outline and suggested questions in the
+# background as soon as a document is ingested, so follow-up calls find them ready.
+PRECOMPUTE_ON_INGEST = os.getenv("PRECOMPUTE_ON_INGEST", "1") == "1"
+
+
+def _forget_document(doc_id: str) -> None:
+    """Drop per-document state once the store has discarded the text."""
+    doc_sessions.pop(doc_id, None)
+    document_metadata.pop(doc_id, None)
+    near_duplicates.index.discard(doc_id)
+
+
+# Session state lives in the STATE_BACKEND store: per process (memory) or
+# shared by every worker (sqlite), so any worker can serve any document id.
+# Bounded mapping from document id (or JWT token for /read-doc) -> extracted text.
+session_docs = state_store.documents(on_discard=_forget_document)
+# Chat history per document id (see prompt_builder.compact_history).
+doc_sessions = state_store.mapping("history")
+document_metadata = state_store.mapping("metadata")
 import uuid
 
-# In-memory storage for notes (in production, use a database)
-notes_storage: dict[str, list[dict]] = {}
-document_metadata: dict[str, dict] = {}
+# Persistent, indexed notes (SQLite at NOTES_DB_PATH).
+notes_db = notes_store.NotesStore()
+# Retrieval indexes keyed by content hash so /ask only sends the relevant
+# passages; least recently used indexes are dropped and rebuilt on demand.
+document_indexes: OrderedDict[str, retrieval.DocumentIndex] = OrderedDict()
+# Selection locators for /explain, keyed and bounded like the retrieval indexes.
+document_locators: OrderedDict[str, text_locator.TextLocator] = OrderedDict()
+# Full change lists of recent comparisons, paged out via /compare/{id}/changes.
+comparison_results = state_store.mapping("comparisons", max_entries=MAX_STORED_COMPARISONS)
+# (summary, changes) per pair of document contents, so re-comparing skips the diff and the LLM call.
+comparison_cache = llm_cache.LLMCache(max_entries=COMPARE_CACHE_ENTRIES)
+
+
+# document_indexes and document_locators are used from run_blocking threads.
+_lru_lock = threading.Lock()
+
+
+def _lru_get(cache: OrderedDict, key: str | None):
+    with _lru_lock:
+        value = cache.get(key) if key else None
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _lru_put(cache: OrderedDict, key: str, value) -> None:
+    with _lru_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > MAX_CACHED_INDEXES:
+            cache.popitem(last=False)
+
+
+def _cached_index(doc_id: str) -> retrieval.DocumentIndex | None:
+    return _lru_get(document_indexes, session_docs.digest_of(doc_id))
+
+
+def _index_document(doc_id: str, text: str) -> retrieval.DocumentIndex:
+    index = _cached_index(doc_id)
+    if index is None:
+        blocks = document_metadata.get(doc_id, {})
+        index = retrieval.DocumentIndex(
+            text, block_offsets=blocks.get("block_offsets"), block_locations=blocks.get("block_locations")
+        )
+        _lru_put(document_indexes, session_docs.digest_of(doc_id) or doc_store.content_hash(text), index)
+    return index
+
+
+# Ingest work still running in this process, keyed by (document id, "index" | "digest").
+# Callers await these rather than starting the same work a second time.
+_precompute_tasks: dict[tuple[str, str], asyncio.Task] = {}
+
+
+def _update_metadata(doc_id: str, values: dict, replace: bool = True) -> None:
+    def merge(metadata: dict) -> dict:
+        for key, value in values.items():
+            if replace or key not in metadata:
+                metadata[key] = value
+        return metadata
+
+    if doc_id in session_docs:
+        document_metadata.update_value(doc_id, merge, {})
+
+
+async def _precompute_index(doc_id: str, text: str) -> retrieval.DocumentIndex:
+    index = await llm_gateway.run_blocking(_index_document, doc_id, text)
+    with metrics.timed("precompute", detail="insights"):
+        insights = await llm_gateway.run_blocking(
+            precompute.analyse, text, index, document_metadata.get(doc_id)
+        )
+    # Key terms the digest already named take precedence over the index's own, so don't replace them
+    _update_metadata(doc_id, insights, replace=False)
+    await llm_gateway.run_blocking(_document_locator, doc_id, text)
+    return index
+
+
+async def _precompute_digest(doc_id: str, text: str) -> dict:
+    digest = await summariser.digest(text)
+    if not digest["partial"]:
+        values = {"summary": digest["summary"], "suggestions": digest["questions"], "deadlines": digest["deadlines"]}
+        if digest["key_terms"]:
+            values["key_terms"] = digest["key_terms"]
+        _update_metadata(doc_id, values)
+    return digest
+
+
+def _start_precompute(doc_id: str, kind: str, coro) -> asyncio.Task:
+    key = (doc_id, kind)
+    task = asyncio.create_task(coro)
+    _precompute_tasks[key] = task
+
+    def finished(done: asyncio.Task) -> None:
+        _precompute_tasks.pop(key, None)
+        if not done.cancelled() and done.exception() is not None:
+            logger.warning("Precomputing %s for %s failed: %s", kind, doc_id, done.exception())
+
+    task.add_done_callback(finished)
+    return task
+
+
+async def _pending(doc_id: str, kind: str):
+    """Result of the ingest task for *doc_id*, or None when none is running here."""
+    task = _precompute_tasks.get((doc_id, kind))
+    if task is None:
+        return None
+    try:
+        # Shielded: a client disconnecting must not cancel work other callers wait for
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return None
+
+
+def _document_locator(doc_id: str, text: str) -> text_locator.TextLocator:
+    digest = session_docs.digest_of(doc_id) or doc_store.content_hash(text)
+    locator = _lru_get(document_locators, digest)
+    if locator is None:
+        locator = text_locator.TextLocator(text)
+        _lru_put(document_locators, digest, locator)
+    return locator
+
+
+def _explain_context(doc_id: str, selection: str, text: str) -> str:
+    """About ``EXPLAIN_CONTEXT_CHARS`` of *text* around where *selection* occurs.
+
+    Falls back to the best retrieval passage for the selection, then to the
+    start of the document, when the selection cannot be located.
+    """
+    with metrics.timed("locate") as log:
+        locator = _document_locator(doc_id, text)
+        span = locator.locate(selection)
+        log["found"] = span is not None
+        if span is None:
+            index = _cached_index(doc_id)
+            hits = index.search(selection, 1) if index is not None else []
+            span = (hits[0][0].start, hits[0][0].end) if hits else (0, 0)
+        return locator.window(*span)
+
+
+async def _store_document(
+    text: str, result: extraction.ExtractionResult | None = None, signature=None, doc_id: str | None = None,
+    digest: bool = True,
+) -> str:
+    """Register a newly ingested document and start precomputing its insights.
+
+    *result* is the extraction *text* came from; its block locations let
+    retrieved passages cite pages, rows or paragraphs. The retrieval index,
+    outline and digest (summary, suggestions, key terms, deadlines) are
+    built in the background (see ``PRECOMPUTE_ON_INGEST``); otherwise they
+    are built on first use. *signature* is the text's MinHash signature
+    when the caller already computed it; *doc_id* the id to store it under
+    when not a new one. With *digest* false the digest is not precomputed
+    (the caller produces the summary itself).
+    """
+    doc_id = doc_id or str(uuid.uuid4())
+    session_docs[doc_id] = text
+    doc_sessions[doc_id] = []  # empty chat history
+    if result is not None and result.block_offsets:
+        document_metadata[doc_id] = {
+            "block_offsets": result.block_offsets, "block_locations": result.block_locations,
+        }
+    if PRECOMPUTE_ON_INGEST:
+        _start_precompute(doc_id, "index", _precompute_index(doc_id, text))
+        if digest:
+            _start_precompute(doc_id, "digest", _precompute_digest(doc_id, text))
+    if near_duplicates.NEAR_DUPLICATE_THRESHOLD > 0:
+        if signature is None:
+            signature = await llm_gateway.run_blocking(near_duplicates.signature, text)
+        near_duplicates.index.add(doc_id, signature)
+    return doc_id
+
+
+async def _ingest(
+    text: str, result: extraction.ExtractionResult | None = None, digest: bool = True
+) -> tuple[str, NearDuplicateMatch | None]:
+    """Store *text* as a new document, unless it nearly duplicates one stored earlier.
+
+    On a match (see ``NEAR_DUPLICATE_THRESHOLD``) the earlier document's id
+    is returned, so its summary, suggestions and index are reused.
+    """
+    signature = None
+    if near_duplicates.NEAR_DUPLICATE_THRESHOLD > 0:
+        signature = await llm_gateway.run_blocking(near_duplicates.signature, text)
+        match = near_duplicates.index.find(signature)
+        if match is not None and match[0] in session_docs:
+            logger.info("Document matches %s (similarity %.2f); reusing it", match[0], match[1])
+            return match[0], NearDuplicateMatch(document_id=match[0], similarity=round(match[1], 3))
+    return await _store_document(text, result, signature, digest=digest), None
+
+
+async def _document_digest(doc_id: str, text: str) -> dict:
+    """Digest of a stored document: stored, from its running ingest task, or computed now."""
+    metadata = document_metadata.get(doc_id) or {}
+    # A summary without suggestions was streamed by /summarise/stream, not digested
+    if "summary" in metadata and "suggestions" in metadata:
+        return {
+            "summary": metadata["summary"], "questions": metadata["suggestions"],
+            "key_terms": metadata.get("key_terms", []), "deadlines": metadata.get("deadlines", []),
+            "partial": False,
+        }
+    task = _precompute_tasks.get((doc_id, "digest"))
+    with _upstream_errors():
+        if task is not None:
+            return await asyncio.shield(task)
+        return await _precompute_digest(doc_id, text)
+
+
+def _digest_fields(digest: dict) -> dict:
+    """Response fields of /upload and /summarise taken from a document digest."""
+    fields = {"summary": digest["summary"]}
+    if not digest["partial"]:
+        fields.update(suggestions=digest["questions"], key_terms=digest["key_terms"], deadlines=digest["deadlines"])
+    return fields
+
+
+def _store_comparison(changes: list[dict]) -> str:
+    comparison_id = str(uuid.uuid4())
+    comparison_results[comparison_id] = changes
+    return comparison_id
+
+
+def _compare_cached(text1: str, text2: str, filename1: str, filename2: str) -> tuple[str, list[dict]]:
+    key = llm_cache.make_key(
+        "compare", chatbot.MODEL_NAME,
+        [doc_store.content_hash(text1), doc_store.content_hash(text2), filename1, filename2], {},
+    )
+    return comparison_cache.get_or_compute(
+        key, lambda: chatbot.compare_documents(text1, text2, filename1, filename2), chatbot.is_comparison
+    )
+
+
+async def _compare(text1: str, text2: str, filename1: str, filename2: str) -> tuple[str, list[dict]]:
+    """Diff and summarise two texts, reusing the result for a pair compared before."""
+    return await _llm(_compare_cached, text1, text2, filename1, filename2)
+
+
+def _change_ranges(changes: list[dict]) -> list[dict]:
+    """*changes* reduced to their type and offsets in both documents."""
+    return [
+        {key: change[key] for key in ("type", "start1", "end1", "start2", "end2")}
+        for change in changes
+    ]
+
+
+def _record_turn(doc_id: str, question: str, answer: str) -> None:
+    def append(history: list[dict]) -> list[dict]:
+        history.append({"user": question, "bot": answer})
+        prompt_builder.compact_history(history)
+        return history
+
+    # Atomic, so concurrent answers on different workers do not lose turns
+    doc_sessions.update_value(doc_id, append, [])
+
+
+async def _ask_inputs(doc_id: str, question: str, text: str) -> tuple[list, str, str]:
+    """Retrieved passages, their prompt context and the compacted history for an /ask call."""
+    index = _cached_index(doc_id) or await _pending(doc_id, "index")
+    if index is None:
+        index = await llm_gateway.run_blocking(_index_document, doc_id, text)
+    history = prompt_builder.render_history(doc_sessions.get(doc_id, []))
+    hits = index.search(question, retrieval.TOP_K)
+    hits = prompt_builder.fit_passages(hits, prompt_builder.remaining("ask", chatbot.SYSTEM_PROMPT, question, history))
+    return hits, retrieval.build_context(hits), history
+
+
+@contextmanager
+def _upstream_errors():
+    """Map LLM gateway timeouts to 504 responses."""
+    try:
+        yield
+    except llm_gateway.LLMTimeoutError as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc))
+
+
+async def _llm(fn, *args, **kwargs):
+    """Run a chatbot call through the async gateway."""
+    with _upstream_errors():
+        return await llm_gateway.call(fn, *args, **kwargs)
+
+
+def _sse(data: dict, event: str | None = None) -> str:
+    """Format one Server-Sent Events message carrying a JSON payload."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def _replay(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+def _stream_response(first: dict, pieces: AsyncIterator[str], on_complete=None) -> StreamingResponse:
+    """Stream generated text *pieces* to the client as SSE.
+
+    Sends a ``meta`` event with *first*, one ``token`` event per generated
+    piece and a final ``done`` event with the full text. *on_complete* is
+    called with the full text once the stream has finished.
+    """
+    async def events():
+        yield _sse(first, "meta")
+        received: list[str] = []
+        try:
+            async for piece in pieces:
+                received.append(piece)
+                yield _sse({"token": piece}, "token")
+        except llm_gateway.LLMTimeoutError as exc:
+            yield _sse({"detail": str(exc)}, "error")
+            return
+        full = "".join(received).strip()
+        if on_complete:
+            on_complete(full)
+        yield _sse({"text": full}, "done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _receive_and_extract(file: UploadFile, label: str) -> extraction.ExtractionResult:
+    """Size-check and hash *file*, then extract its text straight from the request's spool file."""
+    if not extraction.is_supported(file.filename or ""):
+        raise HTTPException(status_code=400, detail=f"Unsupported file type for {label}: {file.filename}")
+    try:
+        upload = await uploads.receive(file)
+    except uploads.UploadTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    try:
+        return await llm_gateway.run_blocking(
+            extraction.extract_upload, upload.source, upload.filename, upload.sha256
+        )
+    finally:
+        upload.close()
+
+
+@app.get("/stats", tags=["stats"])
+def get_stats():
+    """Operational counters for the caches and the LLM gateway."""
+    return {
+        "llm_cache": llm_cache.response_cache.stats(),
+        "comparison_cache": comparison_cache.stats(),
+        "document_store": session_docs.stats(),
+        "extraction_cache": extraction_cache.stats(),
+        "read_doc_cache": document_reader.reader.stats(),
+        "near_duplicates": near_duplicates.index.stats(),
+        "llm_in_flight": llm_gateway.in_flight(),
+        "llm_provider": llm_provider.get_provider().stats(),
+    }
+
+
+# Counters kept by the components themselves; everything else is a gauge.
+_COUNTER_STATS = (
+    "hits", "misses", "coalesced", "evictions", "discarded", "dedup_hits",
+    "calls", "retried", "hedged", "failed", "rejected",
+)
+
+
+@app.get("/metrics", tags=["stats"])
+def get_metrics():
+    """Prometheus exposition of the stage/request histograms and component counters."""
+    metrics.registry.export_stats("llm_cache", llm_cache.response_cache.stats(), _COUNTER_STATS)
+    metrics.registry.export_stats("comparison_cache", comparison_cache.stats(), _COUNTER_STATS)
+    metrics.registry.export_stats("document_store", session_docs.stats(), _COUNTER_STATS)
+    metrics.registry.export_stats("extraction_cache", extraction_cache.stats(), _COUNTER_STATS)
+    metrics.registry.export_stats("read_doc_cache", document_reader.reader.stats(), _COUNTER_STATS + ("refreshes",))
+    metrics.registry.export_stats("near_duplicates", near_duplicates.index.stats(), ("queries", "matches"))
+    metrics.registry.export_stats("llm_provider", llm_provider.get_provider().stats(), _COUNTER_STATS)
+    metrics.registry.export_stats("llm", {"in_flight": llm_gateway.in_flight()})
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _warm_up() -> None:
+    chatbot.warm_up()
+    extraction.warm_up()
+    auth_utils.get_users()
+
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+@app.on_event("startup")
+async def _start_jobs() -> None:
+    await job_manager.start()
+    if WARM_UP_ON_STARTUP:
+        # Not awaited: the server accepts requests while this runs
+        task = asyncio.create_task(llm_gateway.run_blocking(_warm_up))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+@app.on_event("shutdown")
+async def _shutdown_workers() -> None:
+    await job_manager.stop()
+    document_reader.reader.close()
+    if isinstance(session_docs, doc_store.DocumentStore):
+        session_docs.close()
+    workers.shutdown()
 
 
 @app.post("/auth", response_model=LoginResponse, tags=["auth"])
@@ -63,35 +550,87 @@ def _validate_token(token: str) -> None:
 
 
 @app.post("/read-doc", response_model=ReadDocResponse, tags=["document"])
-def read_doc(token: str = Depends(_parse_bearer)):
+async def read_doc(token: str = Depends(_parse_bearer)):
     _validate_token(token)
-    filename, text = document_reader.get_active_document_text()
+    try:
+        filename, text = await llm_gateway.run_blocking(document_reader.get_active_document_text)
+    except active_window.WindowDetectionUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc))
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
     session_docs[token] = text
     return ReadDocResponse(filename=filename, characters=len(text))
 
 
 @app.post("/summarise", response_model=SummariseResponse, tags=["document"])
-def summarise_page(req: SummariseRequest):
+async def summarise_page(req: SummariseRequest):
     text = req.text.strip()
     if not text:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No text provided")
-    summary = chatbot.summarise(text)
-    doc_id = str(uuid.uuid4())
-    session_docs[doc_id] = text
-    doc_sessions[doc_id] = []  # empty chat history
-    return SummariseResponse(summary=summary, characters=len(text), document_id=doc_id)
+    doc_id, duplicate = await _ingest(text)
+    # On a near-duplicate the id and summary are the earlier document's, so is its length
+    stored = session_docs.get(doc_id, text)
+    digest = await _document_digest(doc_id, stored)
+    return SummariseResponse(
+        document_id=doc_id, characters=len(stored), near_duplicate=duplicate, **_digest_fields(digest)
+    )
+
+
+@app.post("/summarise/stream", tags=["document"])
+async def summarise_page_stream(req: SummariseRequest):
+    text = req.text.strip()
+    if not text:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No text provided")
+    # Only the streamed summary calls the model: the digest is not precomputed,
+    # and a summary already stored for this (or a nearly identical) text is replayed.
+    doc_id, duplicate = await _ingest(text, digest=False)
+    first = {"characters": len(session_docs.get(doc_id, text)), "document_id": doc_id}
+    if duplicate is not None:
+        first["near_duplicate"] = {"document_id": duplicate.document_id, "similarity": duplicate.similarity}
+    stored = (document_metadata.get(doc_id) or {}).get("summary")
+    if stored:
+        return _stream_response(first, _replay(stored))
+
+    def remember(summary: str) -> None:
+        if summary and not summary.startswith("[Gemini error]"):
+            _update_metadata(doc_id, {"summary": summary}, replace=False)
+
+    return _stream_response(first, summariser.summarise_stream(text), on_complete=remember)
 
 
 @app.post("/ask", response_model=AskResponse, tags=["chat"])
-def ask_question(req: AskRequest):
+async def ask_question(req: AskRequest):
     context = session_docs.get(req.document_id)
     if not context:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No document has been analyzed for this session. Click 'Summarise Page' first.")
 
-    answer = chatbot.ask(req.question, context)
+    hits, passages, history = await _ask_inputs(req.document_id, req.question, context)
+    answer = await _llm(chatbot.ask, req.question, passages, history)
     # append to chat log
-    doc_sessions.setdefault(req.document_id, []).append({"user": req.question, "bot": answer})
-    return AskResponse(answer=answer)
+    _record_turn(req.document_id, req.question, answer)
+    sources = [
+        PassageSource(chunk=c.index, start=c.start, end=c.end, score=score, location=c.location or None)
+        for c, score in hits
+    ]
+    return AskResponse(answer=answer, sources=sources)
+
+
+@app.post("/ask/stream", tags=["chat"])
+async def ask_question_stream(req: AskRequest):
+    context = session_docs.get(req.document_id)
+    if not context:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No document has been analyzed for this session. Click 'Summarise Page' first.")
+
+    hits, passages, history = await _ask_inputs(req.document_id, req.question, context)
+    sources = [
+        {"chunk": c.index, "start": c.start, "end": c.end, "score": score, "location": c.location or None}
+        for c, score in hits
+    ]
+
+    return _stream_response(
+        {"sources": sources}, llm_gateway.stream(chatbot.ask_stream, req.question, passages, history),
+        on_complete=lambda answer: _record_turn(req.document_id, req.question, answer),
+    )
 
 
 @app.post("/upload", response_model=UploadResponse, tags=["document"])
@@ -100,100 +639,121 @@ async def upload_document(file: UploadFile = File(...)):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only PDF files are supported")
 
     try:
-        # Read the uploaded file content
-        content = await file.read()
-
-        # Extract text from PDF
-        import pdfplumber
-        import io
-
-        text = ""
-        with pdfplumber.open(io.BytesIO(content)) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text() or ""
-                text += extracted + "\n"
+        # Check and hash the upload, then extract text off the event loop
+        result = await _receive_and_extract(file, "document")
+        text = result.text
 
         if not text.strip():
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No text found in PDF")
 
-        # Generate summary
-        summary = chatbot.summarise(text)
-
-        doc_id = str(uuid.uuid4())
-        session_docs[doc_id] = text
-        doc_sessions[doc_id] = []
-        return UploadResponse(summary=summary, characters=len(text), document_id=doc_id)
+        # Summary, suggestions, key terms and deadlines come from one digest call
+        doc_id, duplicate = await _ingest(text, result)
+        stored = session_docs.get(doc_id, text)
+        digest = await _document_digest(doc_id, stored)
+        return UploadResponse(
+            document_id=doc_id, characters=len(stored), near_duplicate=duplicate, **_digest_fields(digest)
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to process PDF: {str(e)}") 
 
 
 @app.post("/auto-suggestions", response_model=AutoSuggestionsResponse, tags=["chat"])
-def get_auto_suggestions(document_id: str = "default"):
+async def get_auto_suggestions(document_id: str = "default"):
     context = session_docs.get(document_id)
     if not context:
         return AutoSuggestionsResponse(suggestions=["Upload a document first to get suggestions"])
-    
-    suggestions = chatbot.generate_auto_suggestions(context)
+
+    suggestions = (document_metadata.get(document_id) or {}).get("suggestions")
+    if suggestions is None:
+        suggestions = (await _document_digest(document_id, context))["questions"]
     return AutoSuggestionsResponse(suggestions=suggestions)
 
 
+@app.get("/documents/{document_id}/insights", response_model=DocumentInsightsResponse, tags=["document"])
+async def get_document_insights(document_id: str, wait: bool = False):
+    """Key terms, section outline and suggested questions precomputed at ingest.
+
+    With ``wait=true`` the call waits for precomputation still running in
+    this worker; otherwise ``pending`` tells whether more is on its way.
+    """
+    if document_id not in session_docs:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown document")
+    if wait:
+        for kind in ("index", "digest"):
+            await _pending(document_id, kind)
+    metadata = document_metadata.get(document_id) or {}
+    return DocumentInsightsResponse(
+        document_id=document_id,
+        suggestions=metadata.get("suggestions"),
+        key_terms=metadata.get("key_terms"),
+        outline=metadata.get("outline"),
+        deadlines=metadata.get("deadlines"),
+        pending=any(key[0] == document_id for key in _precompute_tasks),
+    )
+
+
+async def _explain_inputs(req: ExplainRequest) -> str:
+    doc_id = req.document_id or "last"
+    text = session_docs.get(doc_id, "")
+    if not text:
+        return ""
+    return await llm_gateway.run_blocking(_explain_context, doc_id, req.text, text)
+
+
 @app.post("/explain", response_model=ExplainResponse, tags=["chat"])
-def explain_selection(req: ExplainRequest):
-    context = session_docs.get(req.document_id or "last", "")
-    explanation = chatbot.explain_text(req.text, context)
+async def explain_selection(req: ExplainRequest):
+    context = await _explain_inputs(req)
+    explanation = await _llm(chatbot.explain_text, req.text, context)
     return ExplainResponse(explanation=explanation)
 
 
+@app.post("/explain/stream", tags=["chat"])
+async def explain_selection_stream(req: ExplainRequest):
+    context = await _explain_inputs(req)
+    return _stream_response({}, llm_gateway.stream(chatbot.explain_text_stream, req.text, context))
+
+
 @app.post("/notes", response_model=NoteResponse, tags=["notes"])
 def save_note(req: NoteRequest):
-    import uuid
-    from datetime import datetime
-    
-    note_id = str(uuid.uuid4())
-    timestamp = datetime.now().isoformat()
-    
-    note = {
-        "note_id": note_id,
-        "content": req.content,
-        "document_id": req.document_id,
-        "topic": req.topic or "General",
-        "timestamp": timestamp
-    }
-    
-    if req.document_id not in notes_storage:
-        notes_storage[req.document_id] = []
-    
-    notes_storage[req.document_id].append(note)
-    
-    return NoteResponse(**note)
+    return NoteResponse(**notes_db.add(req.content, req.document_id, req.topic))
+
+
+@app.post("/notes/bulk", response_model=NotesListResponse, tags=["notes"])
+def save_notes(req: NotesBulkRequest):
+    saved = notes_db.add_many({"content": n.content, "document_id": n.document_id, "topic": n.topic} for n in req.notes)
+    return NotesListResponse(notes=[NoteResponse(**note) for note in saved])
 
 
 @app.get("/notes", response_model=NotesListResponse, tags=["notes"])
-def get_notes(document_id: str = None):
-    if document_id:
-        notes = notes_storage.get(document_id, [])
-    else:
-        # Return all notes (fallback when no metadata order)
-        notes = []
-        if document_metadata:
-            for doc_id in sorted(document_metadata.keys()):
-                notes.extend(notes_storage.get(doc_id, []))
-        else:
-            for lst in notes_storage.values():
-                notes.extend(lst)
-    
-    return NotesListResponse(notes=[NoteResponse(**note) for note in notes])
+def get_notes(document_id: str = None, limit: int = None, cursor: str = None):
+    try:
+        page, next_cursor = notes_db.page(document_id, limit, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return NotesListResponse(notes=[NoteResponse(**note) for note in page], next_cursor=next_cursor)
+
+
+@app.get("/notes/search", response_model=NotesListResponse, tags=["notes"])
+def search_notes(q: str, document_id: str = None, limit: int = None, cursor: str = None):
+    try:
+        page, next_cursor = notes_db.search(q, document_id, limit, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return NotesListResponse(notes=[NoteResponse(**note) for note in page], next_cursor=next_cursor)
+
+
+@app.post("/notes/bulk-delete", response_model=NotesBulkDeleteResponse, tags=["notes"])
+def delete_notes(req: NotesBulkDeleteRequest):
+    return NotesBulkDeleteResponse(deleted=notes_db.delete_many(req.note_ids))
 
 
 @app.delete("/notes/{note_id}", status_code=204, tags=["notes"])
 def delete_note(note_id: str):
-    for doc_id, lst in notes_storage.items():
-        before = len(lst)
-        notes_storage[doc_id] = [n for n in lst if n['note_id'] != note_id]
-        if len(notes_storage[doc_id]) < before:
-            return
-    raise HTTPException(status_code=404, detail="Note not found")
+    if not notes_db.delete(note_id):
+        raise HTTPException(status_code=404, detail="Note not found")
 
 
 @app.post("/compare", response_model=CompareResponse, tags=["document"])
@@ -202,39 +762,9 @@ async def compare_documents_endpoint(
     document2: UploadFile = File(...)
 ):
     try:
-        # Read and extract text from both documents
-        content1 = await document1.read()
-        content2 = await document2.read()
-        
-        # Extract text from document 1
-        if document1.filename.endswith('.pdf'):
-            with io.BytesIO(content1) as pdf_buffer:
-                with pdfplumber.open(pdf_buffer) as pdf:
-                    text1 = "\n".join([page.extract_text() or "" for page in pdf.pages])
-        elif document1.filename.endswith(('.docx', '.doc')):
-            from docx import Document
-            with io.BytesIO(content1) as docx_buffer:
-                doc = Document(docx_buffer)
-                text1 = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        elif document1.filename.endswith('.txt'):
-            text1 = content1.decode('utf-8')
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type for document 1: {document1.filename}")
-            
-        # Extract text from document 2
-        if document2.filename.endswith('.pdf'):
-            with io.BytesIO(content2) as pdf_buffer:
-                with pdfplumber.open(pdf_buffer) as pdf:
-                    text2 = "\n".join([page.extract_text() or "" for page in pdf.pages])
-        elif document2.filename.endswith(('.docx', '.doc')):
-            from docx import Document
-            with io.BytesIO(content2) as docx_buffer:
-                doc = Document(docx_buffer)
-                text2 = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        elif document2.filename.endswith('.txt'):
-            text2 = content2.decode('utf-8')
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type for document 2: {document2.filename}")
+        # Check both uploads and extract them off the event loop
+        text1 = (await _receive_and_extract(document1, "document 1")).text
+        text2 = (await _receive_and_extract(document2, "document 2")).text
             
         if not text1.strip():
             raise HTTPException(status_code=400, detail="Document 1 appears to be empty or unreadable")
@@ -242,26 +772,263 @@ async def compare_documents_endpoint(
             raise HTTPException(status_code=400, detail="Document 2 appears to be empty or unreadable")
         
         # Compare documents
-        summary, changes = chatbot.compare_documents(
-            text1, text2, document1.filename, document2.filename
-        )
+        summary, changes = await _compare(text1, text2, document1.filename, document2.filename)
         
-        import uuid
         doc1_id = str(uuid.uuid4())
         doc2_id = str(uuid.uuid4())
         
         # Store comparison for later reference
         session_docs[f"compare_{doc1_id}"] = text1
         session_docs[f"compare_{doc2_id}"] = text2
+        comparison_id = _store_comparison(changes)
         
         return CompareResponse(
             comparison_summary=summary,
-            changes=changes,
+            changes=changes[:COMPARE_PAGE_SIZE],
             document1_content=text1,
             document2_content=text2,
             document1_id=doc1_id,
-            document2_id=doc2_id
+            document2_id=doc2_id,
+            comparison_id=comparison_id,
+            total_changes=len(changes),
         )
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Compare error: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to compare documents: {str(e)}") 
\ No newline at end of file
+        logger.exception("Compare failed")
+        raise HTTPException(status_code=500, detail=f"Failed to compare documents: {str(e)}") 
+
+
+def _stored_text(doc_id: str, label: str) -> str:
+    # Documents of an upload comparison are stored under "compare_<id>"
+    for key in (doc_id, f"compare_{doc_id}"):
+        if key in session_docs:
+            try:
+                return session_docs[key]
+            except KeyError:
+                break  # discarded meanwhile
+    raise HTTPException(status_code=404, detail=f"{label} not found")
+
+
+@app.post("/compare/by-id", response_model=CompareResponse, response_model_exclude_none=True, tags=["document"])
+async def compare_stored_documents(req: CompareByIdRequest):
+    """Compare two documents already in the session store (uploads, summaries or earlier comparisons)."""
+    text1 = _stored_text(req.document1_id, "Document 1")
+    text2 = _stored_text(req.document2_id, "Document 2")
+    summary, changes = await _compare(text1, text2, req.filename1, req.filename2)
+    comparison_id = _store_comparison(changes)
+    page = changes[:COMPARE_PAGE_SIZE]
+    return CompareResponse(
+        comparison_summary=summary,
+        changes=_change_ranges(page) if req.ranges_only else page,
+        document1_content=text1 if req.include_contents else None,
+        document2_content=text2 if req.include_contents else None,
+        document1_id=req.document1_id,
+        document2_id=req.document2_id,
+        comparison_id=comparison_id,
+        total_changes=len(changes),
+    )
+
+
+@app.get("/compare/{comparison_id}/changes", response_model=CompareChangesResponse, tags=["document"])
+def get_comparison_changes(
+    comparison_id: str, offset: int = 0, limit: int = COMPARE_PAGE_SIZE, ranges_only: bool = False
+):
+    changes = comparison_results.get(comparison_id)
+    if changes is None:
+        raise HTTPException(status_code=404, detail="Comparison not found or expired")
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), 1000)
+    page = changes[offset:offset + limit]
+    return CompareChangesResponse(
+        comparison_id=comparison_id,
+        total_changes=len(changes),
+        offset=offset,
+        changes=_change_ranges(page) if ranges_only else page,
+    )
+
+
+
+# ---------------------------------------------------------------------------
+# Batch jobs
+# ---------------------------------------------------------------------------
+
+
+def _check_summary(summary: str) -> str:
+    if summary.startswith("[Gemini error]"):
+        raise RuntimeError(summary)
+    return summary
+
+
+async def _job_summarise(item: dict) -> dict:
+    # The id is assigned at submission, so a retried item reuses the document
+    # its earlier attempt stored instead of ingesting it again.
+    doc_id = item.get("document_id")
+    text = session_docs.get(doc_id) if doc_id else None
+    if text is None:
+        result = await llm_gateway.run_blocking(extraction.extract_upload, item["path"], item["filename"])
+        text = result.text
+        if not text.strip():
+            raise ValueError("No text found in document")
+        doc_id = await _store_document(text, result, doc_id=doc_id)
+    summary = _check_summary((await _document_digest(doc_id, text))["summary"])
+    return {"filename": item["filename"], "document_id": doc_id, "summary": summary, "characters": len(text)}
+
+
+async def _job_compare(item: dict) -> dict:
+    text1 = (await llm_gateway.run_blocking(extraction.extract_upload, item["path1"], item["filename1"])).text
+    text2 = (await llm_gateway.run_blocking(extraction.extract_upload, item["path2"], item["filename2"])).text
+    if not text1.strip() or not text2.strip():
+        raise ValueError("One of the documents is empty or unreadable")
+    summary, changes = await llm_gateway.call(_compare_cached, text1, text2, item["filename1"], item["filename2"])
+    return {
+        "filename1": item["filename1"],
+        "filename2": item["filename2"],
+        "summary": _check_summary(summary),
+        "comparison_id": _store_comparison(changes),
+        "total_changes": len(changes),
+        "changes": changes[:COMPARE_PAGE_SIZE],
+    }
+
+
+job_manager = jobs.create_manager({"summarise": _job_summarise, "compare": _job_compare})
+
+
+def _write_job_text(job_id: str, name: str, text: str) -> str:
+    path = job_manager.input_path(job_id, name)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    return path
+
+
+def _write_job_upload(job_id: str, name: str, source) -> str:
+    path = job_manager.input_path(job_id, name)
+    with open(path, "wb") as fh:
+        if isinstance(source, bytes):
+            fh.write(source)
+        else:
+            shutil.copyfileobj(source, fh)
+    return path
+
+
+def _job_inputs(req: JobSubmitRequest, job_id: str) -> list[dict]:
+    inputs: list[dict] = []
+    if req.kind == "summarise":
+        for i, doc in enumerate(req.documents):
+            inputs.append({
+                "path": _write_job_text(job_id, f"{i}.txt", doc.text),
+                "filename": f"document-{i + 1}.txt",
+                "document_id": str(uuid.uuid4()),
+            })
+    elif req.kind == "compare":
+        for i, pair in enumerate(req.comparisons):
+            inputs.append({
+                "path1": _write_job_text(job_id, f"{i}-1.txt", pair.text1),
+                "path2": _write_job_text(job_id, f"{i}-2.txt", pair.text2),
+                "filename1": pair.filename1,
+                "filename2": pair.filename2,
+            })
+    return inputs
+
+
+async def _submit(kind: str, inputs: list[dict], job_id: str) -> jobs.Job:
+    try:
+        return await job_manager.submit(kind, inputs, job_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def _check_job_kind(kind: str) -> None:
+    if kind not in job_manager.handlers:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown job kind: {kind}")
+    try:
+        job_manager.check_available()
+    except jobs.JobsUnavailableError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
+
+
+def _get_job(job_id: str) -> jobs.Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs", response_model=JobStatusResponse, status_code=202, tags=["jobs"])
+async def submit_job(req: JobSubmitRequest):
+    _check_job_kind(req.kind)
+    job_id = str(uuid.uuid4())
+    inputs = await llm_gateway.run_blocking(_job_inputs, req, job_id)
+    job = await _submit(req.kind, inputs, job_id)
+    return JobStatusResponse(**job.summary())
+
+
+@app.post("/jobs/upload", response_model=JobStatusResponse, status_code=202, tags=["jobs"])
+async def submit_job_files(kind: str = Form(...), files: list[UploadFile] = File(...)):
+    """Submit uploaded files as a job; for ``compare`` consecutive files form the pairs."""
+    _check_job_kind(kind)
+    if kind == "compare" and len(files) % 2:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Compare jobs need an even number of files")
+    if len(files) > jobs.JOB_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {jobs.JOB_UPLOAD_MAX_FILES} files can be uploaded in one job",
+        )
+    job_id = str(uuid.uuid4())
+    stored: list[dict] = []
+    for i, file in enumerate(files):
+        if not extraction.is_supported(file.filename or ""):
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.filename}")
+        try:
+            upload = await uploads.receive(file)
+        except uploads.UploadTooLargeError as exc:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+        try:
+            path = await llm_gateway.run_blocking(
+                _write_job_upload, job_id, f"{i}{os.path.splitext(file.filename)[1].lower()}", upload.source
+            )
+        finally:
+            upload.close()
+        stored.append({"path": path, "filename": file.filename})
+    if kind == "compare":
+        inputs = [
+            {"path1": a["path"], "filename1": a["filename"], "path2": b["path"], "filename2": b["filename"]}
+            for a, b in zip(stored[::2], stored[1::2])
+        ]
+    else:
+        inputs = [{**entry, "document_id": str(uuid.uuid4())} for entry in stored]
+    job = await _submit(kind, inputs, job_id)
+    return JobStatusResponse(**job.summary())
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse, tags=["jobs"])
+def get_job(job_id: str):
+    return JobStatusResponse(**_get_job(job_id).summary())
+
+
+@app.get("/jobs/{job_id}/results", response_model=JobResultsResponse, tags=["jobs"])
+def get_job_results(job_id: str, offset: int = 0, limit: int = 100):
+    job = _get_job(job_id)
+    offset = max(offset, 0)
+    items = [
+        {"index": i, "status": item.status, "attempts": item.attempts, "result": item.result, "error": item.error}
+        for i, item in enumerate(job.items[offset:offset + min(max(limit, 1), 1000)], start=offset)
+    ]
+    return JobResultsResponse(job_id=job_id, offset=offset, items=items)
+
+
+@app.get("/jobs/{job_id}/events", tags=["jobs"])
+async def stream_job_progress(job_id: str):
+    """Stream job progress as SSE ``progress`` events until the job finishes."""
+    _get_job(job_id)
+
+    async def events():
+        while True:
+            summary = _get_job(job_id).summary()
+            yield _sse(summary, "progress")
+            if summary["status"] in ("completed", "failed"):
+                yield _sse(summary, "done")
+                return
+            await job_manager.wait_for_change(job_id, timeout=15)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,238 @@
+"""In-process metrics with Prometheus text exposition and structured timing logs."""
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Stage timings are also logged as one JSON object per line at this level.
+METRICS_LOG_LEVEL = os.getenv("METRICS_LOG_LEVEL", "INFO")
+
+logger = logging.getLogger("backend.timing")
+_LOG_LEVEL = logging.getLevelName(METRICS_LOG_LEVEL.upper())
+if not isinstance(_LOG_LEVEL, int):
+    _LOG_LEVEL = logging.INFO
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = tuple(float(4 ** i) for i in range(2, 14))  # 16 .. 67M
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """Point-in-time value; also used to mirror counters kept by other components (``kind="counter"``)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), kind: str = "gauge"):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = SECONDS_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def _samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total[0])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def export_stats(self, component: str, stats: dict, counters: tuple[str, ...] = ()) -> None:
+        """Mirror the numeric entries of a component's ``stats()`` dict as ``docbot_<component>_<key>``.
+
+        Keys listed in *counters* are exposed with the counter type.
+        """
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            kind = "counter" if key in counters else "gauge"
+            name = f"docbot_{component}_{key}" + ("_total" if kind == "counter" else "")
+            gauge = self.register(Gauge(name, f"{component} {key.replace('_', ' ')}.", kind=kind))
+            gauge.set(value)
+
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+stage_seconds = registry.register(Histogram(
+    "docbot_stage_seconds", "Time spent in each processing stage.", ("stage", "detail")
+))
+request_seconds = registry.register(Histogram(
+    "docbot_request_seconds", "HTTP request latency by route.", ("method", "route", "status")
+))
+upload_bytes = registry.register(Histogram(
+    "docbot_upload_bytes", "Size of uploaded files.", ("format",), SIZE_BUCKETS
+))
+prompt_tokens = registry.register(Histogram(
+    "docbot_prompt_tokens", "Estimated tokens of built prompts.", ("endpoint",), SIZE_BUCKETS
+))
+llm_prompt_chars = registry.register(Histogram(
+    "docbot_llm_prompt_characters", "Characters sent per LLM call.", ("provider",), SIZE_BUCKETS
+))
+llm_response_chars = registry.register(Histogram(
+    "docbot_llm_response_characters", "Characters received per LLM call.", ("provider",), SIZE_BUCKETS
+))
+llm_calls = registry.register(Counter(
+    "docbot_llm_calls_total", "LLM calls by outcome.", ("provider", "outcome")
+))
+
+
+@contextmanager
+def timed(stage: str, detail: str = "", **fields) -> Iterator[dict]:
+    """Time a block as *stage* (histogram + one JSON log line).
+
+    The yielded dict can be filled with extra fields for the log line, e.g.
+    sizes only known once the block has run.
+    """
+    extra = dict(fields)
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield extra
+    except GeneratorExit:
+        # A streaming consumer stopped early; not a failure of the stage
+        outcome = "closed"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        stage_seconds.observe(seconds, stage=stage, detail=detail)
+        if logger.isEnabledFor(_LOG_LEVEL):
+            record = {"event": "timing", "stage": stage, "seconds": round(seconds, 6), "outcome": outcome}
+            if detail:
+                record["detail"] = detail
+            record.update(extra)
+            logger.log(_LOG_LEVEL, json.dumps(record, default=str))
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware recording the latency of every HTTP request by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Templates keep the label set small (no per-document ids)
+            path = getattr(route, "path", None) or "unmatched"
+            request_seconds.observe(
+                time.perf_counter() - started, method=scope["method"], route=path, status=str(status[0])
+            )
@@ -0,0 +1,146 @@
+"""Near-duplicate detection for ingested documents (MinHash over word shingles, LSH banding).
+
+Exact content hashes miss the same web page with different ads or a
+re-saved contract; MinHash estimates the Jaccard similarity of the two
+texts' word shingles, and LSH banding finds candidate matches without
+comparing against every stored document.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Estimated Jaccard similarity at or above which an incoming document reuses
+# an earlier one; 0 disables detection.
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+NEAR_DUPLICATE_SHINGLE_WORDS = int(os.getenv("NEAR_DUPLICATE_SHINGLE_WORDS", "5"))
+NEAR_DUPLICATE_PERMUTATIONS = int(os.getenv("NEAR_DUPLICATE_PERMUTATIONS", "128"))
+# Bands x rows = permutations; 16 bands of 8 rows make pairs above ~0.7
+# similarity candidates while keeping unrelated documents apart.
+NEAR_DUPLICATE_BANDS = int(os.getenv("NEAR_DUPLICATE_BANDS", "16"))
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "2048"))
+
+# Texts with fewer shingles than this are too short for a meaningful estimate.
+_MIN_SHINGLES = 16
+_BATCH = 4096
+_WORD = re.compile(r"\w+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+_PRIME = np.uint64(1_000_003)
+
+# Fixed seed: signatures must stay comparable across workers and restarts.
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(0, 2**64 - 1, size=NEAR_DUPLICATE_PERMUTATIONS, dtype=np.uint64, endpoint=True) | np.uint64(1)
+_B = _rng.integers(0, 2**64 - 1, size=NEAR_DUPLICATE_PERMUTATIONS, dtype=np.uint64, endpoint=True)
+
+
+def _shingles(text: str, size: int = NEAR_DUPLICATE_SHINGLE_WORDS) -> np.ndarray:
+    """Distinct 32-bit hashes of the *size*-word shingles of *text* (case and punctuation ignored)."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return np.empty(0, dtype=np.uint64)
+    ids: dict[str, int] = {}
+    word_hashes = np.fromiter(
+        (ids.setdefault(w, zlib.crc32(w.encode("utf-8", "surrogatepass"))) for w in words),
+        dtype=np.uint64, count=len(words),
+    )
+    count = len(words) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        # Polynomial hash of the shingle's words; uint64 arithmetic wraps
+        hashes = hashes * _PRIME + word_hashes[offset:offset + count]
+    return np.unique((hashes ^ (hashes >> np.uint64(32))) & _MASK32)
+
+
+def signature(text: str) -> np.ndarray | None:
+    """MinHash signature of *text* (uint32 per permutation), or None when it is too short."""
+    shingles = _shingles(text)
+    if len(shingles) < _MIN_SHINGLES:
+        return None
+    result = np.full(NEAR_DUPLICATE_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(shingles), _BATCH):
+        batch = shingles[start:start + _BATCH, None]
+        # Multiply-shift hashing: the top 32 bits of a*x + b (mod 2**64)
+        np.minimum(result, ((batch * _A + _B) >> np.uint64(32)).min(axis=0), out=result)
+    return result.astype(np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class NearDuplicateIndex:
+    """LSH index of document signatures with least-recently-added eviction.
+
+    Per process, like the retrieval indexes: with several workers a match is
+    only found in the worker that ingested the earlier document.
+    """
+
+    def __init__(self, bands: int = NEAR_DUPLICATE_BANDS, max_entries: int = NEAR_DUPLICATE_MAX_ENTRIES):
+        self.bands = bands
+        self.rows = NEAR_DUPLICATE_PERMUTATIONS // bands
+        self.max_entries = max_entries
+        self._signatures: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._buckets: list[dict[bytes, set[str]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.matches = 0
+
+    def _band_keys(self, sig: np.ndarray) -> list[bytes]:
+        return [sig[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _remove(self, key: str) -> None:
+        sig = self._signatures.pop(key, None)
+        if sig is None:
+            return
+        for buckets, band_key in zip(self._buckets, self._band_keys(sig)):
+            members = buckets.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del buckets[band_key]
+
+    def add(self, key: str, sig: np.ndarray | None) -> None:
+        if sig is None:
+            return
+        with self._lock:
+            self._remove(key)
+            self._signatures[key] = sig
+            for buckets, band_key in zip(self._buckets, self._band_keys(sig)):
+                buckets.setdefault(band_key, set()).add(key)
+            while len(self._signatures) > self.max_entries:
+                self._remove(next(iter(self._signatures)))
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def find(self, sig: np.ndarray | None, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> tuple[str, float] | None:
+        """(key, similarity) of the most similar stored document at or above *threshold*."""
+        if sig is None or threshold <= 0:
+            return None
+        with self._lock:
+            self.queries += 1
+            candidates = set()
+            for buckets, band_key in zip(self._buckets, self._band_keys(sig)):
+                candidates |= buckets.get(band_key, set())
+            best = None
+            for key in candidates:
+                score = similarity(sig, self._signatures[key])
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (key, score)
+            if best is not None:
+                self.matches += 1
+            return best
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._signatures), "queries": self.queries, "matches": self.matches}
+
+
+index = NearDuplicateIndex()
@@ -0,0 +1,188 @@
+"""SQLite-backed notes store with keyset pagination and full-text search."""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Iterable
+
+# Notes are user data: keep them next to the project, not in a temp dir that may be cleaned
+NOTES_DB_PATH = os.getenv(
+    "NOTES_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "notes.sqlite3"),
+)
+NOTES_PAGE_SIZE = int(os.getenv("NOTES_PAGE_SIZE", "100"))
+NOTES_MAX_PAGE_SIZE = int(os.getenv("NOTES_MAX_PAGE_SIZE", "1000"))
+
+_COLUMNS = "note_id, content, document_id, topic, timestamp"
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    note_id TEXT NOT NULL UNIQUE,
+    content TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_document ON notes (document_id, id);
+CREATE INDEX IF NOT EXISTS idx_notes_timestamp ON notes (timestamp);
+"""
+
+# External-content FTS table kept in sync by triggers, so note text is stored once.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    content, topic, content='notes', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, content, topic) VALUES (new.id, new.content, new.topic);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, content, topic) VALUES ('delete', old.id, old.content, old.topic);
+END;
+"""
+
+
+def _row(row: sqlite3.Row) -> dict:
+    return {key: row[key] for key in ("note_id", "content", "document_id", "topic", "timestamp")}
+
+
+def _limit(limit: int | None) -> int:
+    return max(1, min(limit or NOTES_PAGE_SIZE, NOTES_MAX_PAGE_SIZE))
+
+
+def _cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+
+
+class NotesStore:
+    """Notes persisted in SQLite, one connection per thread.
+
+    Listing uses keyset pagination on the insertion order (the cursor is the
+    last row id seen), so a page costs the same however deep it is. Search
+    goes through an FTS5 index over content and topic; on SQLite builds
+    without FTS5 it falls back to ``LIKE`` matching.
+    """
+
+    def __init__(self, path: str = NOTES_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.executescript(_SCHEMA)
+            try:
+                created = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'"
+                ).fetchone() is None
+                conn.executescript(_FTS_SCHEMA)
+                if created:
+                    # Index notes written before the FTS table existed
+                    conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_many(self, notes: Iterable[dict]) -> list[dict]:
+        """Insert notes (``content``, ``document_id``, optional ``topic``) in one transaction."""
+        timestamp = datetime.now().isoformat()
+        rows = [
+            {
+                "note_id": str(uuid.uuid4()),
+                "content": note["content"],
+                "document_id": note["document_id"],
+                "topic": note.get("topic") or "General",
+                "timestamp": timestamp,
+            }
+            for note in notes
+        ]
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO notes ({_COLUMNS}) VALUES (:note_id, :content, :document_id, :topic, :timestamp)",
+                rows,
+            )
+        return rows
+
+    def add(self, content: str, document_id: str, topic: str = "") -> dict:
+        return self.add_many([{"content": content, "document_id": document_id, "topic": topic}])[0]
+
+    def delete_many(self, note_ids: Iterable[str]) -> int:
+        """Delete notes by id and return how many existed."""
+        conn = self._conn()
+        with conn:
+            cursor = conn.executemany("DELETE FROM notes WHERE note_id = ?", [(i,) for i in note_ids])
+        return cursor.rowcount
+
+    def delete(self, note_id: str) -> bool:
+        return self.delete_many([note_id]) > 0
+
+    def page(self, document_id: str | None = None, limit: int | None = None, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        """One page of notes in insertion order and the cursor for the next page."""
+        limit = _limit(limit)
+        where, params = "id > ?", [_cursor(cursor)]
+        if document_id:
+            where += " AND document_id = ?"
+            params.append(document_id)
+        rows = self._conn().execute(
+            f"SELECT id, {_COLUMNS} FROM notes WHERE {where} ORDER BY id LIMIT ?", (*params, limit + 1)
+        ).fetchall()
+        next_cursor = str(rows[limit - 1]["id"]) if len(rows) > limit else None
+        return [_row(r) for r in rows[:limit]], next_cursor
+
+    def search(
+        self, query: str, document_id: str | None = None, limit: int | None = None, cursor: str | None = None
+    ) -> tuple[list[dict], str | None]:
+        """Notes whose content or topic contains every term of *query*, best matches first.
+
+        Results are ranked, so the cursor is an offset into the ranking
+        rather than a row id.
+        """
+        limit, offset = _limit(limit), _cursor(cursor)
+        terms = _TERM.findall(query)
+        if not terms:
+            return [], None
+        if self.fts:
+            # Quoted prefix terms: user input never reaches the FTS query syntax.
+            match = " ".join(f'"{term}"*' for term in terms)
+            sql = (
+                "SELECT n.note_id, n.content, n.document_id, n.topic, n.timestamp FROM notes_fts "
+                "JOIN notes n ON n.id = notes_fts.rowid WHERE notes_fts MATCH ?"
+            )
+            params: list = [match]
+            if document_id:
+                sql += " AND n.document_id = ?"
+                params.append(document_id)
+            sql += " ORDER BY bm25(notes_fts), n.id LIMIT ? OFFSET ?"
+        else:
+            clauses = ["(content LIKE ? ESCAPE '\\' OR topic LIKE ? ESCAPE '\\')"] * len(terms)
+            params = []
+            for term in terms:
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                params += [pattern, pattern]
+            if document_id:
+                clauses.append("document_id = ?")
+                params.append(document_id)
+            sql = f"SELECT {_COLUMNS} FROM notes WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ? OFFSET ?"
+        rows = self._conn().execute(sql, (*params, limit + 1, offset)).fetchall()
+        next_cursor = str(offset + limit) if len(rows) > limit else None
+        return [_row(r) for r in rows[:limit]], next_cursor
@@ -0,0 +1,102 @@
+"""Document insights computed once at ingest: key terms and a section outline."""
+from __future__ import annotations
+
+import bisect
+import os
+import re
+
+import numpy as np
+
+from backend import retrieval
+
+KEY_TERMS_COUNT = int(os.getenv("KEY_TERMS_COUNT", "12"))
+OUTLINE_MAX_ENTRIES = int(os.getenv("OUTLINE_MAX_ENTRIES", "50"))
+
+_STOPWORDS = frozenset(
+    """
+    a about above after again against all also an and any are as at be because been before being below
+    between both but by can could did do does doing down during each few for from further had has have
+    having he her here hers him his how i if in into is it its itself just may me might more most must my
+    no nor not now of off on once only or other our ours out over own same shall she should so some such
+    than that the their theirs them then there these they this those through to too under until up upon
+    very was we were what when where which while who whom why will with within without would you your
+    """.split()
+)
+
+# "1.", "2.3", "IV.", "Section 4", "Article 2", "Chapter 1", "Schedule A", "Annex B"
+_NUMBERED = re.compile(
+    r"^(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.|(?:section|article|chapter|part|schedule|annex|appendix)\s+[\w.]+)\s+\S",
+    re.IGNORECASE,
+)
+_LINE = re.compile(r"[^\n]+")
+
+
+def key_terms(index: retrieval.DocumentIndex, count: int = KEY_TERMS_COUNT) -> list[str]:
+    """Most characteristic words of an indexed document.
+
+    Terms are ranked by total frequency weighted by how concentrated they are
+    in few chunks (the index's IDF), so boilerplate spread evenly over the
+    whole document ranks below the subject matter.
+    """
+    if not index.vocabulary:
+        return []
+    df = np.diff(index._indptr)
+    totals = np.add.reduceat(index._postings_tf, index._indptr[:-1][df > 0])
+    term_ids = np.flatnonzero(df > 0)
+    scores = np.log1p(totals) * (1.0 + index._idf[term_ids])
+    terms = list(index.vocabulary)
+    picked = []
+    for position in np.argsort(-scores, kind="stable"):
+        term = terms[term_ids[position]]
+        if len(term) < 3 or term in _STOPWORDS or term.isdigit():
+            continue
+        picked.append(term)
+        if len(picked) == count:
+            break
+    return picked
+
+
+def _is_heading(line: str) -> bool:
+    words = line.split()
+    if not words or len(words) > 12 or len(line) > 100:
+        return False
+    if _NUMBERED.match(line):
+        # A numbered sentence ("3. The supplier shall deliver ...") is body text
+        return len(words) <= 8 and not line.endswith((".", ",", ";"))
+    if line.endswith((".", ",", ";", ":")):
+        return False
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) < 3:
+        return False
+    if all(c.isupper() for c in letters):
+        return True
+    # Title Case: every longer word capitalised
+    return len(words) >= 2 and all(w[0].isupper() for w in words if len(w) > 3 and w[0].isalpha())
+
+
+def outline(text: str, block_offsets: list[int] | None = None, block_locations: list[str] | None = None,
+            limit: int = OUTLINE_MAX_ENTRIES) -> list[dict]:
+    """Heading-like lines of *text* with their offsets (and source locations when known)."""
+    entries = []
+    for match in _LINE.finditer(text):
+        line = match.group().strip()
+        if not _is_heading(line):
+            continue
+        entry = {"title": line, "offset": match.start()}
+        if block_offsets and block_locations:
+            block = bisect.bisect_right(block_offsets, match.start()) - 1
+            if block >= 0:
+                entry["location"] = block_locations[block]
+        entries.append(entry)
+        if len(entries) == limit:
+            break
+    return entries
+
+
+def analyse(text: str, index: retrieval.DocumentIndex, metadata: dict | None = None) -> dict:
+    """Key terms and outline of a document (CPU only, no LLM call)."""
+    metadata = metadata or {}
+    return {
+        "key_terms": key_terms(index),
+        "outline": outline(text, metadata.get("block_offsets"), metadata.get("block_locations")),
+    }
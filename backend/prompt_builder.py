@@ -0,0 +1,203 @@
+"""Token-budgeted prompt assembly and rolling chat-history compaction."""
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+
+from backend import metrics
+
+# Prompt budgets (estimated input tokens) per endpoint – override through the environment.
+TOKEN_BUDGETS = {
+    "ask": int(os.getenv("PROMPT_TOKENS_ASK", "3000")),
+    "summarise": int(os.getenv("PROMPT_TOKENS_SUMMARISE", "4000")),
+    "digest": int(os.getenv("PROMPT_TOKENS_DIGEST", "4000")),
+    "explain": int(os.getenv("PROMPT_TOKENS_EXPLAIN", "1000")),
+    "compare": int(os.getenv("PROMPT_TOKENS_COMPARE", "4500")),
+}
+# Part of the /ask budget that the conversation so far may use.
+HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "600"))
+# Chat turns kept verbatim; older ones are folded into the rolling summary
+# HISTORY_WINDOW_TURNS at a time.
+HISTORY_RECENT_TURNS = int(os.getenv("HISTORY_RECENT_TURNS", "4"))
+HISTORY_WINDOW_TURNS = int(os.getenv("HISTORY_WINDOW_TURNS", "4"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "300"))
+
+_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _cost(piece: str) -> int:
+    # Subword tokenizers keep short words whole and split long ones (and
+    # numbers) into pieces of roughly six characters; punctuation is one token.
+    return (len(piece) + 5) // 6
+
+
+def estimate_tokens(text: str, cap: int | None = None) -> int:
+    """Estimate the model tokens in *text*; counting stops once *cap* is passed."""
+    total = 0
+    for match in _TOKEN.finditer(text):
+        total += _cost(match.group())
+        if cap is not None and total > cap:
+            break
+    return total
+
+
+def truncate(text: str, tokens: int) -> str:
+    """Longest prefix of *text* that fits in *tokens*, cut between words."""
+    total = 0
+    for match in _TOKEN.finditer(text):
+        total += _cost(match.group())
+        if total > tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def remaining(endpoint: str, *fixed: str) -> int:
+    """Tokens left in *endpoint*'s budget once the *fixed* texts are in the prompt."""
+    return max(0, TOKEN_BUDGETS[endpoint] - sum(estimate_tokens(text) for text in fixed))
+
+
+@dataclass
+class _Part:
+    text: str
+    heading: str = ""
+    weight: float = 0.0  # 0 for fixed parts
+
+    @property
+    def fixed(self) -> bool:
+        return not self.weight
+
+
+class PromptBuilder:
+    """Assemble a prompt from fixed parts and elastic context within a token budget.
+
+    Fixed parts (instructions, the question) always go in whole. The budget
+    they leave is shared between context parts in proportion to their
+    weights, and a part that needs less than its share hands the rest to the
+    others. Parts keep the order they were added in.
+    """
+
+    def __init__(self, endpoint: str, budget: int | None = None):
+        self.endpoint = endpoint
+        self.budget = TOKEN_BUDGETS[endpoint] if budget is None else budget
+        self._parts: list[_Part] = []
+
+    def add(self, text: str) -> PromptBuilder:
+        self._parts.append(_Part(text))
+        return self
+
+    def add_context(self, text: str, heading: str = "", weight: float = 1.0) -> PromptBuilder:
+        self._parts.append(_Part(text, heading, weight))
+        return self
+
+    def _allot(self) -> dict[int, int]:
+        fixed = sum(estimate_tokens(p.text if p.fixed else p.heading) for p in self._parts)
+        available = max(0, self.budget - fixed)
+        pending = {i: p for i, p in enumerate(self._parts) if not p.fixed}
+        needs = {i: estimate_tokens(p.text, cap=available) for i, p in pending.items()}
+        allotted: dict[int, int] = {}
+        while pending:
+            total_weight = sum(p.weight for p in pending.values())
+            shares = {i: available * p.weight / total_weight for i, p in pending.items()}
+            satisfied = [i for i in pending if needs[i] <= shares[i]]
+            if not satisfied:
+                allotted.update((i, int(share)) for i, share in shares.items())
+                break
+            for i in satisfied:
+                allotted[i] = needs[i]
+                available -= needs[i]
+                del pending[i]
+        return allotted
+
+    def build(self) -> str:
+        with metrics.timed("prompt_build", detail=self.endpoint) as log:
+            allotted = self._allot()
+            pieces = []
+            for i, part in enumerate(self._parts):
+                if part.fixed:
+                    pieces.append(part.text)
+                    continue
+                text = truncate(part.text, allotted[i])
+                pieces.append(f"{part.heading}\n{text}" if part.heading else text)
+            prompt = "\n\n".join(piece for piece in pieces if piece)
+            tokens = estimate_tokens(prompt)
+            log.update(tokens=tokens, budget=self.budget)
+        metrics.prompt_tokens.observe(tokens, endpoint=self.endpoint)
+        return prompt
+
+
+def fit_passages(hits: list[tuple], tokens: int) -> list[tuple]:
+    """Keep the best-scoring ``(chunk, score)`` hits that fit in *tokens*, in document order."""
+    kept = set()
+    used = 0
+    for position in sorted(range(len(hits)), key=lambda i: -hits[i][1]):
+        cost = estimate_tokens(hits[position][0].text) + 12  # passage header
+        if used + cost <= tokens:
+            kept.add(position)
+            used += cost
+    return [hit for i, hit in enumerate(hits) if i in kept]
+
+
+# -- chat history ------------------------------------------------------------
+#
+# A history is the ``doc_sessions`` list of one document: an optional
+# ``{"summary": str}`` entry first, then ``{"user": str, "bot": str}`` turns.
+
+
+def _first_sentence(text: str) -> str:
+    return _SENTENCE.split(text.strip(), maxsplit=1)[0]
+
+
+def _keep_tail(text: str, tokens: int) -> str:
+    """Drop whole lines from the start of *text* until it fits in *tokens*."""
+    lines = text.splitlines()
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > tokens:
+        lines.pop(0)
+    return truncate("\n".join(lines), tokens)
+
+
+def summarise_turns(turns: list[dict]) -> str:
+    """Extractive one-line-per-turn digest of *turns* (no LLM call)."""
+    return "\n".join(
+        f"- Asked: {truncate(turn['user'], 30)} | Answer: {truncate(_first_sentence(turn['bot']), 40)}"
+        for turn in turns
+    )
+
+
+def compact_history(history: list[dict]) -> None:
+    """Fold the oldest verbatim turns into the rolling summary, in place.
+
+    Once more than ``HISTORY_RECENT_TURNS + HISTORY_WINDOW_TURNS`` turns are
+    kept verbatim, the oldest window is summarised and appended to the
+    summary, whose oldest lines fall off beyond ``HISTORY_SUMMARY_TOKENS``.
+    """
+    summary = history.pop(0)["summary"] if history and "summary" in history[0] else ""
+    window = max(HISTORY_WINDOW_TURNS, 1)
+    while len(history) > HISTORY_RECENT_TURNS + window:
+        folded = summarise_turns(history[:window])
+        del history[:window]
+        summary = _keep_tail(f"{summary}\n{folded}" if summary else folded, HISTORY_SUMMARY_TOKENS)
+    if summary:
+        history.insert(0, {"summary": summary})
+
+
+def render_history(history: list[dict], tokens: int = HISTORY_TOKENS) -> str:
+    """Conversation so far as prompt text, within *tokens*.
+
+    The rolling summary may use up to a third of the budget; the rest is
+    split evenly between the verbatim turns, so one long answer cannot
+    crowd out the others.
+    """
+    sections = []
+    if history and "summary" in history[0]:
+        summary = _keep_tail(history[0]["summary"], tokens // 3)
+        if summary:
+            sections.append(f"Earlier in this conversation:\n{summary}")
+            tokens -= estimate_tokens(sections[0])
+    turns = [entry for entry in history if "summary" not in entry]
+    if turns and tokens > 0:
+        share = tokens // len(turns)
+        recent = [truncate(f"User: {turn['user']}\nAssistant: {turn['bot']}", share) for turn in turns]
+        sections.append("Recent conversation:\n" + "\n".join(text for text in recent if text))
+    return "\n\n".join(sections)
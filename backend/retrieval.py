@@ -0,0 +1,159 @@
+"""Chunked BM25 retrieval index used to pick the passages sent to Gemini."""
+from __future__ import annotations
+
+import bisect
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, replace
+import numpy as np
+
+# Tunables (characters, not tokens) – override through the environment.
+CHUNK_SIZE = int(os.getenv("RETRIEVAL_CHUNK_SIZE", "1500"))
+CHUNK_OVERLAP = int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", "200"))
+TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case word tokens used for both indexing and querying."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass(frozen=True)
+class Chunk:
+    index: int
+    start: int
+    end: int
+    text: str
+    # Source location (page, sheet row, paragraph) where the chunk starts, if known
+    location: str = ""
+
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[Chunk]:
+    """Split *text* into overlapping windows, snapping boundaries to whitespace."""
+    chunk_size = max(chunk_size, 1)
+    overlap = min(max(overlap, 0), chunk_size // 2)
+    chunks: list[Chunk] = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            # Prefer to cut on whitespace in the last fifth of the window
+            cut = text.rfind(" ", end - chunk_size // 5, end)
+            newline = text.rfind("\n", end - chunk_size // 5, end)
+            cut = max(cut, newline)
+            if cut > start:
+                end = cut
+        piece = text[start:end]
+        if piece.strip():
+            chunks.append(Chunk(index=len(chunks), start=start, end=end, text=piece))
+        if end >= length:
+            break
+        next_start = max(end - overlap, start + 1)
+        # Begin the next window on a word boundary inside the overlap
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return chunks
+
+
+class DocumentIndex:
+    """BM25 index over the overlapping chunks of a single document.
+
+    Postings are stored column-wise (one contiguous slice of chunk ids and
+    term frequencies per term) so each query term is scored with a single
+    vectorised NumPy expression.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        chunk_size: int = CHUNK_SIZE,
+        overlap: int = CHUNK_OVERLAP,
+        block_offsets: list[int] | None = None,
+        block_locations: list[str] | None = None,
+    ):
+        """Index *text*; ``block_offsets``/``block_locations`` from extraction label chunks with their source."""
+        block_offsets = block_offsets or []
+        self.chunks: list[Chunk] = []
+        self.vocabulary: dict[str, int] = {}
+
+        rows: list[int] = []
+        cols: list[int] = []
+        freqs: list[int] = []
+        for chunk in chunk_text(text, chunk_size, overlap):
+            block = bisect.bisect_right(block_offsets, chunk.start) - 1
+            if block >= 0:
+                chunk = replace(chunk, location=block_locations[block])
+            self.chunks.append(chunk)
+            for term, tf in Counter(tokenize(chunk.text)).items():
+                rows.append(chunk.index)
+                cols.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                freqs.append(tf)
+        lengths = np.bincount(np.asarray(rows, dtype=np.int64), weights=freqs, minlength=len(self.chunks)).astype(
+            np.float32
+        )
+
+        term_ids = np.asarray(cols, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        self._postings_chunk = np.asarray(rows, dtype=np.int32)[order]
+        self._postings_tf = np.asarray(freqs, dtype=np.float32)[order]
+        df = np.bincount(term_ids, minlength=len(self.vocabulary))
+        self._indptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+
+        n = max(len(self.chunks), 1)
+        self._idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(lengths.mean()) if len(lengths) else 0.0
+        self._norm = (BM25_K1 * (1 - BM25_B + BM25_B * lengths / avgdl)) if avgdl else np.full_like(lengths, BM25_K1)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every chunk for *query*."""
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            lo, hi = self._indptr[term_id], self._indptr[term_id + 1]
+            ids = self._postings_chunk[lo:hi]
+            tf = self._postings_tf[lo:hi]
+            scores[ids] += self._idf[term_id] * tf * (BM25_K1 + 1) / (tf + self._norm[ids])
+        return scores
+
+    def search(self, query: str, k: int = TOP_K) -> list[tuple[Chunk, float]]:
+        """Return the *k* best chunks for *query* in document order.
+
+        When nothing in the query matches, the opening chunks are returned so
+        the model still gets some context to work with.
+        """
+        if not self.chunks:
+            return []
+        k = max(1, min(k, len(self.chunks)))
+        scores = self.scores(query)
+        if not scores.any():
+            best = np.arange(k)
+        elif k < len(scores):
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(scores))
+        if scores.any():
+            best = best[scores[best] > 0]
+        best = np.sort(best)
+        return [(self.chunks[i], float(scores[i])) for i in best]
+
+
+def build_context(hits: list[tuple[Chunk, float]]) -> str:
+    """Join retrieved chunks into a prompt context with their character ranges."""
+    return "\n\n".join(
+        f"[Passage {chunk.index + 1}, {chunk.location + ', ' if chunk.location else ''}"
+        f"characters {chunk.start}-{chunk.end}]\n{chunk.text.strip()}"
+        for chunk, _ in hits
+    )
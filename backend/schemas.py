@@ -16,8 +16,17 @@ class AskRequest(BaseModel):
     document_id: str = "default"
 
 
+class PassageSource(BaseModel):
+    chunk: int
+    start: int
+    end: int
+    score: float
+    location: str | None = None  # e.g. "page 3", "Sheet1 row 12"
+
+
 class AskResponse(BaseModel):
     answer: str
+    sources: list[PassageSource] = []
 
 
 class ReadDocResponse(BaseModel):
@@ -29,22 +38,56 @@ class SummariseRequest(BaseModel):
     text: str
 
 
+class Deadline(BaseModel):
+    date: str
+    description: str
+
+
+class NearDuplicateMatch(BaseModel):
+    document_id: str
+    similarity: float
+
+
 class SummariseResponse(BaseModel):
     summary: str
     characters: int 
     document_id: str
+    # From the same digest call as the summary; absent when it could not be parsed
+    suggestions: list[str] | None = None
+    key_terms: list[str] | None = None
+    deadlines: list[Deadline] | None = None
+    near_duplicate: NearDuplicateMatch | None = None
 
 
 class UploadResponse(BaseModel):
     summary: str
     characters: int 
     document_id: str
+    suggestions: list[str] | None = None
+    key_terms: list[str] | None = None
+    deadlines: list[Deadline] | None = None
+    near_duplicate: NearDuplicateMatch | None = None
 
 
 class AutoSuggestionsResponse(BaseModel):
     suggestions: list[str]
 
 
+class OutlineEntry(BaseModel):
+    title: str
+    offset: int
+    location: str | None = None
+
+
+class DocumentInsightsResponse(BaseModel):
+    document_id: str
+    suggestions: list[str] | None = None
+    key_terms: list[str] | None = None
+    outline: list[OutlineEntry] | None = None
+    deadlines: list[Deadline] | None = None
+    pending: bool = False
+
+
 class ExplainRequest(BaseModel):
     text: str
     context: str = ""
@@ -71,6 +114,19 @@ class NoteResponse(BaseModel):
 
 class NotesListResponse(BaseModel):
     notes: list[NoteResponse]
+    next_cursor: str | None = None
+
+
+class NotesBulkRequest(BaseModel):
+    notes: list[NoteRequest]
+
+
+class NotesBulkDeleteRequest(BaseModel):
+    note_ids: list[str]
+
+
+class NotesBulkDeleteResponse(BaseModel):
+    deleted: int
 
 
 class CompareRequest(BaseModel):
@@ -80,10 +136,59 @@ class CompareRequest(BaseModel):
     filename2: str = "Document 2"
 
 
+class CompareByIdRequest(BaseModel):
+    document1_id: str
+    document2_id: str
+    filename1: str = "Document 1"
+    filename2: str = "Document 2"
+    # The client usually has the texts already; skip echoing them back
+    include_contents: bool = False
+    # Changes as type + offsets only, without the changed text and description
+    ranges_only: bool = False
+
+
 class CompareResponse(BaseModel):
     comparison_summary: str
     changes: list[dict]
-    document1_content: str
-    document2_content: str
+    document1_content: str | None = None
+    document2_content: str | None = None
     document1_id: str
-    document2_id: str 
\ No newline at end of file
+    document2_id: str
+    # ``changes`` holds the first page; fetch the rest via /compare/{comparison_id}/changes
+    comparison_id: str = ""
+    total_changes: int = 0
+
+
+class CompareChangesResponse(BaseModel):
+    comparison_id: str
+    total_changes: int
+    offset: int
+    changes: list[dict]
+
+
+class JobSubmitRequest(BaseModel):
+    kind: str = Field(..., example="summarise")  # "summarise" or "compare"
+    documents: list[SummariseRequest] = []  # items of a "summarise" job
+    comparisons: list[CompareRequest] = []  # items of a "compare" job
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    total: int
+    pending: int
+    running: int
+    done: int
+    failed: int
+    created: float
+    started: float | None = None
+    finished: float | None = None
+    elapsed_seconds: float
+    items_per_minute: float
+
+
+class JobResultsResponse(BaseModel):
+    job_id: str
+    offset: int
+    items: list[dict]
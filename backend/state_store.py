@@ -0,0 +1,354 @@
+"""Pluggable session state: per-process memory or SQLite shared by every server process."""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from backend import doc_store
+
+# memory: state lives in this process (single worker). sqlite: documents,
+# chat histories, comparisons and batch jobs live in STATE_DB_PATH, so any
+# worker or replica on the same host can serve any document id.
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", os.path.join(tempfile.gettempdir(), "docbot-state.sqlite3"))
+# Per-process read-through cache of document texts (texts never change for a given hash).
+STATE_CACHE_BYTES = int(os.getenv("STATE_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS texts (
+    digest TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_digest ON documents (digest);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    UNIQUE (namespace, key)
+);
+"""
+
+
+class SqliteState:
+    """One SQLite database in WAL mode, one connection per thread."""
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        return self._conn().execute(sql, params)
+
+    def executescript(self, sql: str) -> None:
+        self._conn().executescript(sql)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; ``BEGIN IMMEDIATE`` serialises read-modify-write across processes."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class SharedDocumentStore(MutableMapping):
+    """``document_id -> text`` mapping stored in SQLite, with a local LRU of texts.
+
+    Texts are zlib-compressed and stored once per content hash. The id ->
+    hash lookup always goes to the database (a primary-key read), so a
+    document written by another process is visible at once; the text itself
+    is served from the local cache when this process has seen it before.
+    Beyond *max_bytes* of compressed text the oldest documents are dropped.
+    """
+
+    def __init__(
+        self,
+        state: SqliteState,
+        cache_bytes: int = STATE_CACHE_BYTES,
+        max_bytes: int = doc_store.DOC_STORE_DISK_MAX_BYTES,
+        on_discard: Callable[[str], None] | None = None,
+    ):
+        self.state = state
+        self.cache_bytes = cache_bytes
+        self.max_bytes = max_bytes
+        self.on_discard = on_discard
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._cache_size = 0
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.discarded = 0
+        self.dedup_hits = 0
+
+    def _remember(self, digest: str, text: str) -> None:
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return
+            self._cache[digest] = text
+            self._cache_size += sys.getsizeof(text)
+            while self._cache_size > self.cache_bytes and len(self._cache) > 1:
+                self._cache_size -= sys.getsizeof(self._cache.popitem(last=False)[1])
+
+    def digest_of(self, doc_id: str) -> str | None:
+        """Content hash of the text stored under *doc_id*, if any."""
+        row = self.state.execute("SELECT digest FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row[0] if row else None
+
+    def __getitem__(self, doc_id: str) -> str:
+        digest = self.digest_of(doc_id)
+        if digest is None:
+            raise KeyError(doc_id)
+        with self._lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                self.cache_hits += 1
+                return text
+            self.cache_misses += 1
+        row = self.state.execute("SELECT body FROM texts WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(doc_id)  # discarded by another process meanwhile
+        text = zlib.decompress(row[0]).decode("utf-8", "surrogatepass")
+        self._remember(digest, text)
+        return text
+
+    def __setitem__(self, doc_id: str, text: str) -> None:
+        digest = doc_store.content_hash(text)
+        known = self.state.execute("SELECT 1 FROM texts WHERE digest = ?", (digest,)).fetchone()
+        # Compress outside the write lock; other processes keep writing meanwhile
+        body = None if known else zlib.compress(text.encode("utf-8", "surrogatepass"), 6)
+        discarded: list[str] = []
+        with self.state.transaction() as conn:
+            previous = conn.execute("SELECT digest FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+            if previous and previous[0] == digest:
+                return
+            if body is None and conn.execute("SELECT 1 FROM texts WHERE digest = ?", (digest,)).fetchone():
+                self.dedup_hits += 1
+            else:
+                body = body or zlib.compress(text.encode("utf-8", "surrogatepass"), 6)
+                conn.execute("INSERT INTO texts (digest, body, size) VALUES (?, ?, ?)", (digest, body, len(body)))
+            conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            conn.execute("INSERT INTO documents (doc_id, digest) VALUES (?, ?)", (doc_id, digest))
+            if previous:
+                self._collect(conn, previous[0])
+            discarded = self._enforce_budget(conn)
+        self._remember(digest, text)
+        self._discarded(discarded)
+
+    def _collect(self, conn: sqlite3.Connection, digest: str) -> None:
+        if not conn.execute("SELECT 1 FROM documents WHERE digest = ?", (digest,)).fetchone():
+            conn.execute("DELETE FROM texts WHERE digest = ?", (digest,))
+
+    def _enforce_budget(self, conn: sqlite3.Connection) -> list[str]:
+        discarded = []
+        while conn.execute("SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()[0] > self.max_bytes:
+            oldest = conn.execute("SELECT doc_id, digest FROM documents ORDER BY id LIMIT 1").fetchone()
+            if oldest is None:
+                break
+            conn.execute("DELETE FROM documents WHERE doc_id = ?", (oldest[0],))
+            self._collect(conn, oldest[1])
+            discarded.append(oldest[0])
+        return discarded
+
+    def _discarded(self, doc_ids: list[str]) -> None:
+        self.discarded += len(doc_ids)
+        if self.on_discard:
+            for doc_id in doc_ids:
+                self.on_discard(doc_id)
+
+    def __delitem__(self, doc_id: str) -> None:
+        with self.state.transaction() as conn:
+            row = conn.execute("SELECT digest FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row is None:
+                raise KeyError(doc_id)
+            conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            self._collect(conn, row[0])
+
+    def __contains__(self, doc_id: object) -> bool:
+        return isinstance(doc_id, str) and self.digest_of(doc_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([row[0] for row in self.state.execute("SELECT doc_id FROM documents ORDER BY id")])
+
+    def __len__(self) -> int:
+        return self.state.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def stats(self) -> dict:
+        documents, = self.state.execute("SELECT COUNT(*) FROM documents").fetchone()
+        texts, stored = self.state.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM texts").fetchone()
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "documents": documents,
+                "unique_texts": texts,
+                "stored_bytes": stored,
+                "cached_texts": len(self._cache),
+                "cached_bytes": self._cache_size,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "discarded": self.discarded,
+                "dedup_hits": self.dedup_hits,
+            }
+
+
+class MemoryMapping(MutableMapping):
+    """Thread-safe insertion-ordered dict, optionally bounded to the newest *max_entries*."""
+
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while self.max_entries is not None and len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            del self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def update_value(self, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        """Atomically replace the value under *key* with ``fn(value)`` (``fn(default)`` when missing)."""
+        with self._lock:
+            value = fn(self._data.get(key, default))
+            self._data[key] = value
+            return value
+
+
+class SharedMapping(MutableMapping):
+    """JSON values under one namespace of the shared SQLite ``entries`` table.
+
+    Values are read from the database every time (no local copy), so all
+    processes see each other's writes; ``update_value`` is atomic across
+    processes.
+    """
+
+    def __init__(self, state: SqliteState, namespace: str, max_entries: int | None = None):
+        self.state = state
+        self.namespace = namespace
+        self.max_entries = max_entries
+
+    def __getitem__(self, key: str) -> Any:
+        row = self.state.execute(
+            "SELECT value FROM entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def _put(self, conn: sqlite3.Connection, key: str, value: Any) -> None:
+        conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+        conn.execute(
+            "INSERT INTO entries (namespace, key, value) VALUES (?, ?, ?)", (self.namespace, key, json.dumps(value))
+        )
+        if self.max_entries is not None:
+            conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND id NOT IN "
+                "(SELECT id FROM entries WHERE namespace = ? ORDER BY id DESC LIMIT ?)",
+                (self.namespace, self.namespace, self.max_entries),
+            )
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self.state.transaction() as conn:
+            self._put(conn, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        with self.state.transaction() as conn:
+            cursor = conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self.state.execute("SELECT key FROM entries WHERE namespace = ? ORDER BY id", (self.namespace,))
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self.state.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+
+    def update_value(self, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        """Atomically replace the value under *key* with ``fn(value)`` (``fn(default)`` when missing)."""
+        with self.state.transaction() as conn:
+            row = conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            value = fn(json.loads(row[0]) if row else default)
+            self._put(conn, key, value)
+        return value
+
+
+_state: SqliteState | None = None
+_state_lock = threading.Lock()
+
+
+def shared_state() -> SqliteState:
+    """The process-wide connection to ``STATE_DB_PATH``."""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = SqliteState()
+        return _state
+
+
+def _check_backend() -> None:
+    if STATE_BACKEND not in ("memory", "sqlite"):
+        raise ValueError(f"Unknown STATE_BACKEND: {STATE_BACKEND} (expected memory or sqlite)")
+
+
+def documents(on_discard: Callable[[str], None] | None = None) -> MutableMapping:
+    """The document text store selected by ``STATE_BACKEND``."""
+    _check_backend()
+    if STATE_BACKEND == "sqlite":
+        return SharedDocumentStore(shared_state(), on_discard=on_discard)
+    return doc_store.DocumentStore(on_discard=on_discard)
+
+
+def mapping(namespace: str, max_entries: int | None = None) -> MutableMapping:
+    """A JSON-valued mapping selected by ``STATE_BACKEND`` (values must be JSON-serialisable)."""
+    _check_backend()
+    if STATE_BACKEND == "sqlite":
+        return SharedMapping(shared_state(), namespace, max_entries)
+    return MemoryMapping(max_entries)
@@ -0,0 +1,100 @@
+"""Map-reduce summarisation so long documents are summarised in full, not truncated."""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import AsyncIterator
+
+from backend import chatbot
+from backend import llm_gateway
+from backend import retrieval
+
+# Documents longer than this (characters) are summarised section by section.
+SUMMARY_MAP_REDUCE_THRESHOLD = int(os.getenv("SUMMARY_MAP_REDUCE_THRESHOLD", "15000"))
+SUMMARY_SECTION_SIZE = int(os.getenv("SUMMARY_SECTION_SIZE", "12000"))
+# Upper bound on parallel LLM calls made by a single summarisation.
+SUMMARY_MAX_PARALLEL = int(os.getenv("SUMMARY_MAX_PARALLEL", "4"))
+# Partial summaries merged per reduce call.
+SUMMARY_REDUCE_FANIN = int(os.getenv("SUMMARY_REDUCE_FANIN", "8"))
+
+
+def _is_error(summary: str) -> bool:
+    return summary.startswith("[Gemini error]")
+
+
+async def _partial_summaries(text: str) -> list[str]:
+    """Map the sections concurrently, then reduce in rounds until one call can finish the job.
+
+    Each round runs its calls in parallel, so wall-clock time grows with the
+    number of rounds (logarithmic in document length), not with the number
+    of sections.
+    """
+    limit = asyncio.Semaphore(SUMMARY_MAX_PARALLEL)
+
+    async def run(fn, *args):
+        async with limit:
+            return await llm_gateway.call(fn, *args)
+
+    sections = retrieval.chunk_text(text, SUMMARY_SECTION_SIZE, overlap=0)
+    partials = await asyncio.gather(*(run(chatbot.summarise_section, s.text) for s in sections))
+    partials = [p for p in partials if not _is_error(p)]
+    if not partials:
+        raise RuntimeError("every section summary failed")
+
+    fanin = max(SUMMARY_REDUCE_FANIN, 2)
+    while len(partials) > fanin:
+        groups = [partials[i:i + fanin] for i in range(0, len(partials), fanin)]
+        merged = await asyncio.gather(*(run(chatbot.combine_summaries, group, False) for group in groups))
+        partials = [p for p in merged if not _is_error(p)] or partials[:fanin]
+    return partials
+
+
+async def summarise(text: str) -> str:
+    """Five-bullet summary of *text*, using map-reduce above the size threshold."""
+    if len(text) <= SUMMARY_MAP_REDUCE_THRESHOLD:
+        return await llm_gateway.call(chatbot.summarise, text)
+    try:
+        partials = await _partial_summaries(text)
+    except RuntimeError:
+        # Fall back to the single-call (truncated) summary rather than failing
+        return await llm_gateway.call(chatbot.summarise, text)
+    return await llm_gateway.call(chatbot.combine_summaries, partials, True)
+
+
+async def digest(text: str) -> dict:
+    """Summary, suggested questions, key terms and deadlines of *text* (see :func:`chatbot.digest`).
+
+    Short documents take a single LLM call; long ones are mapped section by
+    section and the digest is the reduce step. When the digest has no
+    summary, or failed with an error, the plain summary path is used instead.
+    """
+    if len(text) <= SUMMARY_MAP_REDUCE_THRESHOLD:
+        result = await llm_gateway.call(chatbot.digest, text)
+    else:
+        try:
+            partials = await _partial_summaries(text)
+        except RuntimeError:
+            partials = None
+        if partials is None:
+            result = await llm_gateway.call(chatbot.digest, text)
+        else:
+            result = await llm_gateway.call(chatbot.digest_sections, partials)
+    if not result["summary"] or (result["partial"] and _is_error(result["summary"])):
+        result = {**result, "summary": await summarise(text)}
+    return result
+
+
+async def summarise_stream(text: str) -> AsyncIterator[str]:
+    """Streaming variant of :func:`summarise`; only the final step is streamed."""
+    if len(text) <= SUMMARY_MAP_REDUCE_THRESHOLD:
+        async for piece in llm_gateway.stream(chatbot.summarise_stream, text):
+            yield piece
+        return
+    try:
+        partials = await _partial_summaries(text)
+    except RuntimeError:
+        async for piece in llm_gateway.stream(chatbot.summarise_stream, text):
+            yield piece
+        return
+    async for piece in llm_gateway.stream(chatbot.combine_summaries_stream, partials):
+        yield piece
@@ -0,0 +1,126 @@
+"""Find where a selected passage occurs in a stored document.
+
+Browser and PDF selections rarely match the extracted text byte for byte:
+line breaks become spaces, quotes are curly, a word is hyphenated. The
+locator searches a whitespace-collapsed, case- and punctuation-folded copy
+of the document (exact ``str.find`` first, then anchor voting for fuzzy
+matches) and maps the hit back to offsets in the original text.
+"""
+from __future__ import annotations
+
+import bisect
+import difflib
+import os
+import re
+
+# Characters of document context /explain sends around the selection.
+EXPLAIN_CONTEXT_CHARS = int(os.getenv("EXPLAIN_CONTEXT_CHARS", "2000"))
+# Minimum similarity (0-1) for a fuzzy match to count.
+LOCATOR_MIN_RATIO = float(os.getenv("LOCATOR_MIN_RATIO", "0.75"))
+
+_WHITESPACE = re.compile(r"\s+")
+# Same-length substitutions only, so offsets survive the folding.
+_FOLD = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "‛": "'",
+    "“": '"', "”": '"', "„": '"', "‟": '"',
+    "‐": "-", "‑": "-", "‒": "-", "–": "-", "—": "-", "­": "-",
+    " ": " ",
+})
+_ANCHOR_CHARS = 24
+_MAX_ANCHORS = 8
+_MAX_OCCURRENCES = 64
+
+
+def _fold(text: str) -> str:
+    lowered = text.lower()
+    # A few characters change length when lowercased; keep the case then
+    return (lowered if len(lowered) == len(text) else text).translate(_FOLD)
+
+
+class TextLocator:
+    """Whitespace-normalized view of a document with a map back to original offsets."""
+
+    def __init__(self, text: str):
+        self.text = text
+        folded = _fold(text)
+        pieces: list[str] = []
+        # (normalized offset, original - normalized) from that offset onwards,
+        # recorded only where a collapsed whitespace run shifts the two apart
+        self._starts: list[int] = [0]
+        self._shifts: list[int] = [0]
+        position = 0
+        shift = 0
+        for match in _WHITESPACE.finditer(folded):
+            start, end = match.span()
+            pieces.append(folded[position:start])
+            pieces.append(" ")
+            position = end
+            if end - start > 1:
+                shift += end - start - 1
+                self._starts.append(start - shift + (end - start))
+                self._shifts.append(shift)
+        pieces.append(folded[position:])
+        self.normalized = "".join(pieces)
+
+    def _original(self, offset: int) -> int:
+        return offset + self._shifts[bisect.bisect_right(self._starts, offset) - 1]
+
+    def _span(self, start: int, end: int) -> tuple[int, int]:
+        return self._original(start), self._original(max(start, end - 1)) + 1
+
+    def _exact(self, needle: str) -> int:
+        return self.normalized.find(needle)
+
+    def _fuzzy(self, needle: str, min_ratio: float) -> tuple[int, int] | None:
+        # Vote for a start position from several short anchors of the selection
+        step = max(1, (len(needle) - _ANCHOR_CHARS) // max(1, _MAX_ANCHORS - 1))
+        votes: dict[int, int] = {}
+        for offset in range(0, max(1, len(needle) - _ANCHOR_CHARS + 1), step):
+            anchor = needle[offset:offset + _ANCHOR_CHARS]
+            found = self.normalized.find(anchor)
+            seen = 0
+            while found != -1 and seen < _MAX_OCCURRENCES:
+                start = max(0, found - offset)
+                votes[start // 16] = votes.get(start // 16, 0) + 1
+                found = self.normalized.find(anchor, found + 1)
+                seen += 1
+        best = None
+        for bucket, _ in sorted(votes.items(), key=lambda item: -item[1])[:4]:
+            # Align around the voted bucket and keep the closest window
+            lo = max(0, bucket * 16 - 32)
+            window = self.normalized[lo:lo + len(needle) + 64]
+            matcher = difflib.SequenceMatcher(None, needle, window, autojunk=False)
+            blocks = [b for b in matcher.get_matching_blocks() if b.size]
+            if not blocks:
+                continue
+            start, end = lo + blocks[0].b, lo + blocks[-1].b + blocks[-1].size
+            ratio = difflib.SequenceMatcher(None, needle, self.normalized[start:end], autojunk=False).ratio()
+            if ratio >= min_ratio and (best is None or ratio > best[0]):
+                best = (ratio, start, end)
+        return (best[1], best[2]) if best else None
+
+    def locate(self, selection: str, min_ratio: float = LOCATOR_MIN_RATIO) -> tuple[int, int] | None:
+        """(start, end) of *selection* in the original text, or None when it is not found."""
+        needle = _WHITESPACE.sub(" ", _fold(selection)).strip()
+        if not needle:
+            return None
+        start = self._exact(needle)
+        if start != -1:
+            return self._span(start, start + len(needle))
+        if len(needle) < _ANCHOR_CHARS:
+            return None  # too short to match fuzzily without false hits
+        found = self._fuzzy(needle, min_ratio)
+        return self._span(*found) if found else None
+
+    def window(self, start: int, end: int, size: int = EXPLAIN_CONTEXT_CHARS) -> str:
+        """About *size* characters of the original text centred on [start, end), cut at whitespace."""
+        middle = (start + end) // 2
+        lo = max(0, min(middle - size // 2, len(self.text) - size))
+        hi = min(len(self.text), lo + size)
+        if lo > 0:
+            space = self.text.find(" ", lo, lo + 40)
+            lo = space + 1 if space != -1 else lo
+        if hi < len(self.text):
+            space = self.text.rfind(" ", hi - 40, hi)
+            hi = space if space > lo else hi
+        return self.text[lo:hi].strip()
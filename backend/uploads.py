@@ -0,0 +1,137 @@
+"""Streaming, size-bounded reception of multipart uploads."""
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import BinaryIO
+
+from fastapi import UploadFile
+
+from backend import metrics
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+# Uploads up to this size are handed to the extractors as bytes; larger ones
+# are read straight from the file Starlette already spooled them to.
+UPLOAD_SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Allowance for multipart boundaries, part headers and form fields.
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds ``UPLOAD_MAX_BYTES``."""
+
+
+class ReceivedUpload:
+    """An upload checked for size and hashed in one pass over Starlette's spool file.
+
+    The content is not copied again: small files are kept as bytes, larger
+    ones are read from ``UploadFile.file`` itself (rewound before use).
+    """
+
+    def __init__(self, file: UploadFile, size: int, sha256: str, data: bytes | None):
+        self.filename = file.filename or ""
+        self.file = file.file
+        self.size = size
+        self.sha256 = sha256
+        self._data = data
+
+    @property
+    def source(self) -> bytes | BinaryIO:
+        """What the extractors should read: the bytes of a small file, or the spooled file object."""
+        if self._data is not None:
+            return self._data
+        self.file.seek(0)
+        return self.file
+
+    def close(self) -> None:
+        self._data = None  # the spool file itself is closed by Starlette with the request
+
+
+async def receive(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> ReceivedUpload:
+    """Hash and measure *file*, rejecting it as soon as it is too big."""
+    declared = getattr(file, "size", None)
+    if declared is not None and declared > max_bytes:
+        raise UploadTooLargeError(f"{file.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+    ext = os.path.splitext(file.filename or "")[1].lower().lstrip(".")
+    hasher = hashlib.sha256()
+    size = 0
+    small: list[bytes] | None = []
+    with metrics.timed("upload_read", detail=ext) as log:
+        await file.seek(0)
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"{file.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+            hasher.update(chunk)
+            if small is not None:
+                small.append(chunk)
+                if size > UPLOAD_SPOOL_MEMORY_BYTES:
+                    small = None
+        log.update(bytes=size, spooled=small is None)
+    metrics.upload_bytes.observe(size, format=ext)
+    return ReceivedUpload(file, size, hasher.hexdigest(), b"".join(small) if small is not None else None)
+
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies over their route's limit with 413 before they are fully read.
+
+    *limits* maps a request path to its maximum body size; other paths are
+    not limited here. A declared Content-Length is checked up front; chunked
+    bodies (no Content-Length) are counted as they arrive and cut off once
+    they pass the limit.
+    """
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def _reject(self, send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": b'{"detail":"Request body too large"}'})
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
+                if value.isdigit() and int(value) > max_bytes:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+        started = rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes and not started:
+                    # Answer now and make the app see a disconnected client
+                    rejected = True
+                    await self._reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if rejected:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
@@ -0,0 +1,37 @@
+"""Shared process pool for CPU-bound work such as PDF parsing."""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+
+_pool: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the lazily created process pool shared by all CPU-bound stages.
+
+    Workers are spawned rather than forked: the server process runs threads
+    (event loop, gateway pool) and forking those is unsafe; spawn is also
+    the only start method available on Windows.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(CPU_WORKERS, 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,256 @@
+"""End-to-end benchmark suite: extraction, diffing and API latency under load.
+
+Generates PDF, DOCX, XLSX and TXT fixtures of increasing size and measures
+
+* extraction throughput per format (cache bypassed),
+* ``diff_engine.diff_texts`` time on edited copies of growing documents,
+* p50/p99 latency and throughput of ``/upload``, ``/ask``, ``/compare`` and
+  ``/notes`` under concurrent load, served in-process with the fake LLM
+  provider (``LLM_PROVIDER=fake``) so no API key or network is involved.
+
+    python benchmarks/bench_suite.py [--sizes 5 20 80] [--requests 50]
+        [--concurrency 16] [--llm-latency-ms 50] [--only extraction diff api]
+        [--output results.json]
+
+The report is JSON; keep one per commit and diff them to spot regressions.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fixtures  # noqa: E402
+
+
+def _configure_environment(args: argparse.Namespace, workdir: str) -> None:
+    """Point every on-disk store at *workdir* and select the fake LLM (before importing backend)."""
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_LLM_JITTER_MS"] = str(args.llm_jitter_ms)
+    os.environ["WARM_UP_ON_STARTUP"] = "0"
+    # The upload fixtures share most of their text; measure ingest, not near-duplicate reuse
+    os.environ["NEAR_DUPLICATE_THRESHOLD"] = "0"
+    for name, sub in (
+        ("EXTRACTION_CACHE_DIR", "extraction-cache"),
+        ("DOC_STORE_SPILL_DIR", "docs"),
+        ("JOBS_DIR", "jobs"),
+    ):
+        os.environ[name] = os.path.join(workdir, sub)
+    os.environ["NOTES_DB_PATH"] = os.path.join(workdir, "notes.sqlite3")
+
+
+def _percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def _best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+# -- extraction ---------------------------------------------------------------
+
+
+def bench_extraction(sizes: list[int], repeat: int) -> list[dict]:
+    from backend import extraction
+
+    results = []
+    for size in sizes:
+        texts = fixtures.paragraphs(size * 8, seed=size)
+        for ext, build in fixtures.BUILDERS.items():
+            data = build(texts)
+            chars = len(extraction.extract_file(data, f"fixture{ext}").text)
+            seconds = _best_of(lambda: extraction.extract_file(data, f"fixture{ext}"), repeat)
+            results.append({
+                "format": ext[1:],
+                "paragraphs": len(texts),
+                "input_bytes": len(data),
+                "characters": chars,
+                "seconds": round(seconds, 4),
+                "mb_per_second": round(len(data) / seconds / 1e6, 3),
+                "characters_per_second": round(chars / seconds),
+            })
+            print(f"extraction {ext[1:]:>4} {len(texts):>6} paragraphs: {seconds:.3f}s", file=sys.stderr)
+    return results
+
+
+# -- diff ---------------------------------------------------------------------
+
+
+def bench_diff(sizes: list[int], repeat: int) -> list[dict]:
+    from backend import diff_engine
+
+    results = []
+    for size in sizes:
+        original = fixtures.paragraphs(size * 8, seed=size)
+        text1 = "\n\n".join(original)
+        text2 = "\n\n".join(fixtures.edited(original, seed=size + 1))
+        changes = len(diff_engine.diff_texts(text1, text2))
+        seconds = _best_of(lambda: diff_engine.diff_texts(text1, text2), repeat)
+        results.append({
+            "words": len(text1.split()) + len(text2.split()),
+            "characters": len(text1) + len(text2),
+            "changes": changes,
+            "seconds": round(seconds, 4),
+        })
+        print(f"diff {len(text1.split()):>8} words: {seconds:.3f}s ({changes} changes)", file=sys.stderr)
+    return results
+
+
+# -- API under load -----------------------------------------------------------
+
+
+async def _load(name: str, make_request, requests: int, concurrency: int) -> dict:
+    """Issue *requests* calls of ``make_request(i)`` with at most *concurrency* in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    print(f"api {name:>8}: {requests} requests in {elapsed:.2f}s", file=sys.stderr)
+    return {
+        **_percentiles(latencies),
+        "errors": errors,
+        "requests_per_second": round(requests / elapsed, 2),
+    }
+
+
+async def bench_api(requests: int, concurrency: int, pages: int) -> dict:
+    import httpx
+
+    from backend.main import app
+
+    base = fixtures.paragraphs(pages * 8, seed=7)
+    # Distinct documents per request so the extraction and LLM caches do not
+    # turn the measurement into a cache benchmark.
+    uploads = [fixtures.make_pdf([f"Revision {i}."] + base) for i in range(requests)]
+    originals = [fixtures.make_pdf([f"Contract {i}."] + base) for i in range(requests)]
+    revisions = [fixtures.make_pdf([f"Contract {i}."] + fixtures.edited(base, seed=i)) for i in range(requests)]
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            results["upload"] = await _load(
+                "upload",
+                lambda i: client.post("/upload", files={"file": (f"doc{i}.pdf", uploads[i], "application/pdf")}),
+                requests, concurrency,
+            )
+
+            response = await client.post("/upload", files={"file": ("ask.pdf", originals[0], "application/pdf")})
+            document_id = response.json()["document_id"]
+            results["ask"] = await _load(
+                "ask",
+                lambda i: client.post("/ask", json={"question": f"What is due in clause {i}?", "document_id": document_id}),
+                requests, concurrency,
+            )
+
+            results["compare"] = await _load(
+                "compare",
+                lambda i: client.post("/compare", files={
+                    "document1": (f"a{i}.pdf", originals[i], "application/pdf"),
+                    "document2": (f"b{i}.pdf", revisions[i], "application/pdf"),
+                }),
+                requests, concurrency,
+            )
+
+            def note_request(i: int):
+                if i % 2:
+                    return client.get("/notes", params={"document_id": document_id, "limit": 50})
+                return client.post("/notes", json={"content": f"Note {i} on delivery", "document_id": document_id})
+
+            results["notes"] = await _load("notes", note_request, requests, concurrency)
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 80], help="fixture sizes in pages")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per extraction/diff measurement (best is kept)")
+    parser.add_argument("--requests", type=int, default=50, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--api-pages", type=int, default=5, help="size of the documents sent to the API")
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0)
+    parser.add_argument("--only", nargs="+", choices=["extraction", "diff", "api"], default=["extraction", "diff", "api"])
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="docbot-bench-") as workdir:
+        _configure_environment(args, workdir)
+        report: dict = {
+            "meta": {
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "args": vars(args),
+            }
+        }
+        if "extraction" in args.only:
+            report["extraction"] = bench_extraction(args.sizes, args.repeat)
+        if "diff" in args.only:
+            report["diff"] = bench_diff(args.sizes, args.repeat)
+        if "api" in args.only:
+            report["api"] = asyncio.run(bench_api(args.requests, args.concurrency, args.api_pages))
+
+        from backend import workers
+
+        workers.shutdown()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
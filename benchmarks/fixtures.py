@@ -0,0 +1,132 @@
+"""Deterministic fixture documents (PDF, DOCX, XLSX, TXT) for the benchmarks."""
+from __future__ import annotations
+
+import io
+import random
+
+_WORDS = (
+    "the supplier shall deliver all equipment within thirty days of the purchase order and provide "
+    "written notice of any delay requirements include installation testing training documentation "
+    "warranty support maintenance payment invoice acceptance criteria penalty termination liability "
+    "insurance confidentiality data protection security audit report schedule milestone budget risk "
+    "contract clause agreement party customer vendor service level availability response resolution"
+).split()
+
+
+def paragraphs(count: int, seed: int = 0, words: int = 60) -> list[str]:
+    """*count* pseudo-random paragraphs of about *words* words each."""
+    rng = random.Random(seed)
+    result = []
+    for i in range(count):
+        sentences = []
+        remaining = words
+        while remaining > 0:
+            length = min(remaining, rng.randint(8, 18))
+            sentence = " ".join(rng.choice(_WORDS) for _ in range(length))
+            sentences.append(sentence.capitalize() + ".")
+            remaining -= length
+        result.append(f"{i + 1}. " + " ".join(sentences))
+    return result
+
+
+def edited(texts: list[str], fraction: float = 0.05, seed: int = 1) -> list[str]:
+    """Copy of *texts* with about *fraction* of the paragraphs changed, dropped or added."""
+    rng = random.Random(seed)
+    result = []
+    for paragraph in texts:
+        roll = rng.random()
+        if roll < fraction / 3:
+            continue  # removed
+        if roll < 2 * fraction / 3:
+            words = paragraph.split()
+            words[rng.randrange(len(words))] = rng.choice(_WORDS).upper()
+            paragraph = " ".join(words)
+        result.append(paragraph)
+        if rng.random() < fraction / 3:
+            result.append(paragraphs(1, seed=rng.randrange(1 << 30))[0])
+    return result
+
+
+def _wrap(paragraph: str, width: int = 90) -> list[str]:
+    lines, line = [], ""
+    for word in paragraph.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def make_pdf(texts: list[str], lines_per_page: int = 60) -> bytes:
+    """Minimal uncompressed PDF (Helvetica text only) laid out from *texts*."""
+    lines: list[str] = []
+    for paragraph in texts:
+        lines.extend(_wrap(paragraph))
+        lines.append("")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects: list[bytes] = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pages_id = 2 + 2 * len(pages)
+    page_ids = []
+    for page in pages:
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page)
+        content = b"BT /F1 10 Tf 12 TL 40 800 Td " + b" ".join(
+            b"(" + line.encode("latin-1", "replace") + b") '" for line in escaped
+        ) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 1 0 R >> >> /Contents %d 0 R >>" % (pages_id, len(objects))
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+    return bytes(out)
+
+
+def make_docx(texts: list[str]) -> bytes:
+    from docx import Document  # type: ignore
+
+    document = Document()
+    for i, paragraph in enumerate(texts):
+        if i % 20 == 0:
+            document.add_heading(f"Section {i // 20 + 1}", level=1)
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_xlsx(texts: list[str]) -> bytes:
+    import openpyxl  # type: ignore
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["id", "item", "quantity", "price", "notes"])
+    for i, paragraph in enumerate(texts):
+        words = paragraph.split()
+        sheet.append([i + 1, " ".join(words[1:4]), len(words), round(len(paragraph) * 1.5, 2), " ".join(words[4:20])])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def make_txt(texts: list[str]) -> bytes:
+    return "\n\n".join(texts).encode("utf-8")
+
+
+BUILDERS = {".pdf": make_pdf, ".docx": make_docx, ".xlsx": make_xlsx, ".txt": make_txt}
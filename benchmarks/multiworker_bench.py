@@ -0,0 +1,161 @@
+"""Multi-process throughput benchmark with shared session state.
+
+Starts ``uvicorn backend.main:app --workers N`` for each worker count with
+``STATE_BACKEND=sqlite`` and the fake LLM provider, uploads a few documents
+through one worker and then drives ``/ask`` (and ``/notes``) from many
+connections, so requests land on workers that never saw the upload. /ask
+answers 400 for a document the worker does not know, so any such answer
+(reported as ``unshared``) means state was not shared.
+
+    python benchmarks/multiworker_bench.py [--workers 1 2 4] [--requests 400]
+        [--concurrency 32] [--llm-latency-ms 50] [--output results.json]
+
+Requires uvicorn (in requirements.txt).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fixtures  # noqa: E402
+from bench_suite import _git_commit, _percentiles  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _environment(args: argparse.Namespace, workdir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "STATE_BACKEND": "sqlite",
+        "STATE_DB_PATH": os.path.join(workdir, "state.sqlite3"),
+        "NOTES_DB_PATH": os.path.join(workdir, "notes.sqlite3"),
+        "EXTRACTION_CACHE_DIR": os.path.join(workdir, "extraction-cache"),
+        "JOBS_DIR": os.path.join(workdir, "jobs"),
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "LOG_LEVEL": "WARNING",
+        "PYTHONPATH": str(ROOT),
+    })
+    return env
+
+
+async def _wait_ready(client, deadline: float) -> None:
+    while True:
+        try:
+            if (await client.get("/stats")).status_code == 200:
+                return
+        except Exception:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not start")
+        await asyncio.sleep(0.2)
+
+
+async def _drive(base_url: str, args: argparse.Namespace) -> dict:
+    import httpx
+
+    # A fresh connection per request lets the kernel spread requests over the workers
+    limits = httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await _wait_ready(client, time.monotonic() + 60)
+        documents = []
+        for i in range(args.documents):
+            pdf = fixtures.make_pdf([f"Contract {i}."] + fixtures.paragraphs(args.pages * 8, seed=i))
+            response = await client.post("/upload", files={"file": (f"doc{i}.pdf", pdf, "application/pdf")})
+            response.raise_for_status()
+            documents.append(response.json()["document_id"])
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies: list[float] = []
+        statuses: dict[int, int] = {}
+        unshared = 0
+
+        async def one(i: int) -> None:
+            nonlocal unshared
+            document_id = documents[i % len(documents)]
+            async with semaphore:
+                started = time.perf_counter()
+                if i % 5 == 4:
+                    response = await client.get("/notes", params={"document_id": document_id, "limit": 20})
+                else:
+                    response = await client.post(
+                        "/ask", json={"question": f"What is due under clause {i}?", "document_id": document_id}
+                    )
+                    if response.status_code == 400:
+                        unshared += 1
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    return {
+        **_percentiles(latencies),
+        "statuses": statuses,
+        "unshared": unshared,
+        "requests_per_second": round(args.requests / elapsed, 2),
+    }
+
+
+def run(workers: int, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory(prefix="docbot-multi-") as workdir:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+            cwd=workdir, env=_environment(args, workdir),
+        )
+        try:
+            result = asyncio.run(_drive(f"http://127.0.0.1:{port}", args))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    print(f"workers={workers}: {result['requests_per_second']} req/s, statuses {result['statuses']}, unshared {result['unshared']}", file=sys.stderr)
+    return {"workers": workers, **result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=5, help="size of each uploaded document")
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "runs": [run(workers, args) for workers in args.workers],
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
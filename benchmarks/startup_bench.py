@@ -0,0 +1,113 @@
+"""Startup benchmark: backend import time and time to first request.
+
+Every run starts a fresh interpreter so nothing is already imported, then
+measures importing ``backend.main``, running the app's startup hooks,
+serving a first request (``GET /stats``) and a first login (``POST /auth``,
+which pays for bcrypt unless the warm-up got there first). A second
+measurement imports only ``backend.extraction``, which is what a process
+pool worker pays.
+
+    python benchmarks/startup_bench.py --runs 5 [--warm-up] [--output startup.json]
+
+Results are printed as JSON (medians, minimum and maximum in seconds).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_APP_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+from backend.main import app
+t1 = time.perf_counter()
+import httpx
+
+async def main():
+    async with app.router.lifespan_context(app):
+        t2 = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/stats")
+            assert response.status_code == 200, response.text
+            t3 = time.perf_counter()
+            response = await client.post("/auth", json={"username": "admin", "password": "password"})
+            assert response.status_code == 200, response.text
+            t4 = time.perf_counter()
+    print(json.dumps({
+        "import_seconds": t1 - t0,
+        "startup_seconds": t2 - t1,
+        "first_request_seconds": t3 - t2,
+        "time_to_first_request_seconds": t3 - t0,
+        "first_login_seconds": t4 - t3,
+    }))
+
+asyncio.run(main())
+"""
+
+_WORKER_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import backend.extraction
+print(json.dumps({"worker_import_seconds": time.perf_counter() - t0}))
+"""
+
+
+def _probe(code: str, env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _summarise(samples: list[dict]) -> dict:
+    summary = {}
+    for key in samples[0]:
+        values = [s[key] for s in samples]
+        summary[key] = {
+            "median": round(statistics.median(values), 4),
+            "min": round(min(values), 4),
+            "max": round(max(values), 4),
+        }
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm-up", action="store_true", help="keep the background warm-up enabled")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["WARM_UP_ON_STARTUP"] = "1" if args.warm_up else "0"
+    env.setdefault("NOTES_DB_PATH", os.path.join(tempfile.gettempdir(), "docbot-bench-notes.sqlite3"))
+
+    # One discarded run so every measured run sees compiled bytecode
+    _probe(_APP_PROBE, env)
+    app_samples = [_probe(_APP_PROBE, env) for _ in range(args.runs)]
+    worker_samples = [_probe(_WORKER_PROBE, env) for _ in range(args.runs)]
+
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "warm_up_on_startup": args.warm_up,
+        **_summarise(app_samples),
+        **_summarise(worker_samples),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
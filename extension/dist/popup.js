@@ -231,7 +231,7 @@ endbfchar
 CMapName currentdict /CMap defineresource pop
 end
 end`};t.events.push(["putFont",function(o){(function(s){var u=s.font,c=s.out,d=s.newObject,v=s.putStream;if(u.metadata instanceof e.API.TTFFont&&u.encoding==="Identity-H"){for(var g=u.metadata.Unicode.widths,w=u.metadata.subset.encode(u.metadata.glyIdsUsed,1),p="",j=0;j<w.length;j++)p+=String.fromCharCode(w[j]);var A=d();v({data:p,addLength1:!0,objectId:A}),c("endobj");var D=d();v({data:r(u.metadata.toUnicode),addLength1:!0,objectId:D}),c("endobj");var y=d();c("<<"),c("/Type /FontDescriptor"),c("/FontName /"+ka(u.fontName)),c("/FontFile2 "+A+" 0 R"),c("/FontBBox "+e.API.PDFObject.convert(u.metadata.bbox)),c("/Flags "+u.metadata.flags),c("/StemV "+u.metadata.stemV),c("/ItalicAngle "+u.metadata.italicAngle),c("/Ascent "+u.metadata.ascender),c("/Descent "+u.metadata.decender),c("/CapHeight "+u.metadata.capHeight),c(">>"),c("endobj");var x=d();c("<<"),c("/Type /Font"),c("/BaseFont /"+ka(u.fontName)),c("/FontDescriptor "+y+" 0 R"),c("/W "+e.API.PDFObject.convert(g)),c("/CIDToGIDMap /Identity"),c("/DW 1000"),c("/Subtype /CIDFontType2"),c("/CIDSystemInfo"),c("<<"),c("/Supplement 0"),c("/Registry (Adobe)"),c("/Ordering ("+u.encoding+")"),c(">>"),c(">>"),c("endobj"),u.objectNumber=d(),c("<<"),c("/Type /Font"),c("/Subtype /Type0"),c("/ToUnicode "+D+" 0 R"),c("/BaseFont /"+ka(u.fontName)),c("/Encoding /"+u.encoding),c("/DescendantFonts ["+x+" 0 R]"),c(">>"),c("endobj"),u.isAlreadyPutted=!0}})(o)}]),t.events.push(["putFont",function(o){(function(s){var u=s.font,c=s.out,d=s.newObject,v=s.putStream;if(u.metadata instanceof e.API.TTFFont&&u.encoding==="WinAnsiEncoding"){for(var g=u.metadata.rawData,w="",p=0;p<g.length;p++)w+=String.fromCharCode(g[p]);var j=d();v({data:w,addLength1:!0,objectId:j}),c("endobj");var A=d();v({data:r(u.metadata.toUnicode),addLength1:!0,objectId:A}),c("endobj");var D=d();c("<<"),c("/Descent "+u.metadata.decender),c("/CapHeight "+u.metadata.capHeight),c("/StemV "+u.metadata.stemV),c("/Type /FontDescriptor"),c("/FontFile2 "+j+" 0 R"),c("/Flags 96"),c("/FontBBox "+e.API.PDFObject.convert(u.metadata.bbox)),c("/FontName /"+ka(u.fontName)),c("/ItalicAngle "+u.metadata.italicAngle),c("/Ascent "+u.metadata.ascender),c(">>"),c("endobj"),u.objectNumber=d();for(var y=0;y<u.metadata.hmtx.widths.length;y++)u.metadata.hmtx.widths[y]=parseInt(u.metadata.hmtx.widths[y]*(1e3/u.metadata.head.unitsPerEm));c("<</Subtype/TrueType/Type/Font/ToUnicode "+A+" 0 R/BaseFont/"+ka(u.fontName)+"/FontDescriptor "+D+" 0 R/Encoding/"+u.encoding+" /FirstChar 29 /LastChar 255 /Widths "+e.API.PDFObject.convert(u.metadata.hmtx.widths)+">>"),c("endobj"),u.isAlreadyPutted=!0}})(o)}]);var i=function(o){var s,u=o.text||"",c=o.x,d=o.y,v=o.options||{},g=o.mutex||{},w=g.pdfEscape,p=g.activeFontKey,j=g.fonts,A=p,D="",y=0,x="",P=j[A].encoding;if(j[A].encoding!=="Identity-H")return{text:u,x:c,y:d,options:v,mutex:g};for(x=u,A=p,Array.isArray(u)&&(x=u[0]),y=0;y<x.length;y+=1)j[A].metadata.hasOwnProperty("cmap")&&(s=j[A].metadata.cmap.unicode.codeMap[x[y].charCodeAt(0)]),s||x[y].charCodeAt(0)<256&&j[A].metadata.hasOwnProperty("Unicode")?D+=x[y]:D+="";var z="";return parseInt(A.slice(1))<14||P==="WinAnsiEncoding"?z=w(D,A).split("").map(function(J){return J.charCodeAt(0).toString(16)}).join(""):P==="Identity-H"&&(z=n(D,j[A])),g.isHex=!0,{text:z,x:c,y:d,options:v,mutex:g}};t.events.push(["postProcessText",function(o){var s=o.text||"",u=[],c={text:s,x:o.x,y:o.y,options:o.options,mutex:o.mutex};if(Array.isArray(s)){var d=0;for(d=0;d<s.length;d+=1)Array.isArray(s[d])&&s[d].length===3?u.push([i(Object.assign({},c,{text:s[d][0]})).text,s[d][1],s[d][2]]):u.push(i(Object.assign({},c,{text:s[d]})).text);o.text=u}else o.text=i(Object.assign({},c,{text:s})).text}])}(Ye),function(e){var t=function(){return this.internal.vFS===void 0&&(this.internal.vFS={}),!0};e.existsFileInVFS=function(n){return t.call(this),this.internal.vFS[n]!==void 0},e.addFileToVFS=function(n,r){return t.call(this),this.internal.vFS[n]=r,this},e.getFileFromVFS=function(n){return t.call(this),this.internal.vFS[n]!==void 0?this.internal.vFS[n]:null}}(Ye.API),function(e){e.__bidiEngine__=e.prototype.__bidiEngine__=function(r){var i,o,s,u,c,d,v,g=t,w=[[0,3,0,1,0,0,0],[0,3,0,1,2,2,0],[0,3,0,17,2,0,1],[0,3,5,5,4,1,0],[0,3,21,21,4,0,1],[0,3,5,5,4,2,0]],p=[[2,0,1,1,0,1,0],[2,0,1,1,0,2,0],[2,0,2,1,3,2,0],[2,0,2,33,3,1,1]],j={L:0,R:1,EN:2,AN:3,N:4,B:5,S:6},A={0:0,5:1,6:2,7:3,32:4,251:5,254:6,255:7},D=["(",")","(","<",">","<","[","]","[","{","}","{","«","»","«","‹","›","‹","⁅","⁆","⁅","⁽","⁾","⁽","₍","₎","₍","≤","≥","≤","〈","〉","〈","﹙","﹚","﹙","﹛","﹜","﹛","﹝","﹞","﹝","﹤","﹥","﹤"],y=new RegExp(/^([1-4|9]|1[0-9]|2[0-9]|3[0168]|4[04589]|5[012]|7[78]|159|16[0-9]|17[0-2]|21[569]|22[03489]|250)$/),x=!1,P=0;this.__bidiEngine__={};var z=function(E){var I=E.charCodeAt(),$=I>>8,U=A[$];return U!==void 0?g[256*U+(255&I)]:$===252||$===253?"AL":y.test($)?"L":$===8?"R":"N"},J=function(E){for(var I,$=0;$<E.length;$++){if((I=z(E.charAt($)))==="L")return!1;if(I==="R")return!0}return!1},Z=function(E,I,$,U){var pe,fe,me,q,te=I[U];switch(te){case"L":case"R":x=!1;break;case"N":case"AN":break;case"EN":x&&(te="AN");break;case"AL":x=!0,te="R";break;case"WS":te="N";break;case"CS":U<1||U+1>=I.length||(pe=$[U-1])!=="EN"&&pe!=="AN"||(fe=I[U+1])!=="EN"&&fe!=="AN"?te="N":x&&(fe="AN"),te=fe===pe?fe:"N";break;case"ES":te=(pe=U>0?$[U-1]:"B")==="EN"&&U+1<I.length&&I[U+1]==="EN"?"EN":"N";break;case"ET":if(U>0&&$[U-1]==="EN"){te="EN";break}if(x){te="N";break}for(me=U+1,q=I.length;me<q&&I[me]==="ET";)me++;te=me<q&&I[me]==="EN"?"EN":"N";break;case"NSM":if(s&&!u){for(q=I.length,me=U+1;me<q&&I[me]==="NSM";)me++;if(me<q){var ee=E[U],Le=ee>=1425&&ee<=2303||ee===64286;if(pe=I[me],Le&&(pe==="R"||pe==="AL")){te="R";break}}}te=U<1||(pe=I[U-1])==="B"?"N":$[U-1];break;case"B":x=!1,i=!0,te=P;break;case"S":o=!0,te="N";break;case"LRE":case"RLE":case"LRO":case"RLO":case"PDF":x=!1;break;case"BN":te="N"}return te},W=function(E,I,$){var U=E.split("");return $&&T(U,$,{hiLevel:P}),U.reverse(),I&&I.reverse(),U.join("")},T=function(E,I,$){var U,pe,fe,me,q,te=-1,ee=E.length,Le=0,L=[],O=P?p:w,R=[];for(x=!1,i=!1,o=!1,pe=0;pe<ee;pe++)R[pe]=z(E[pe]);for(fe=0;fe<ee;fe++){if(q=Le,L[fe]=Z(E,R,L,fe),U=240&(Le=O[q][j[L[fe]]]),Le&=15,I[fe]=me=O[Le][5],U>0)if(U===16){for(pe=te;pe<fe;pe++)I[pe]=1;te=-1}else te=-1;if(O[Le][6])te===-1&&(te=fe);else if(te>-1){for(pe=te;pe<fe;pe++)I[pe]=me;te=-1}R[fe]==="B"&&(I[fe]=0),$.hiLevel|=me}o&&function(H,X,ae){for(var he=0;he<ae;he++)if(H[he]==="S"){X[he]=P;for(var ce=he-1;ce>=0&&H[ce]==="WS";ce--)X[ce]=P}}(R,I,ee)},re=function(E,I,$,U,pe){if(!(pe.hiLevel<E)){if(E===1&&P===1&&!i)return I.reverse(),void($&&$.reverse());for(var fe,me,q,te,ee=I.length,Le=0;Le<ee;){if(U[Le]>=E){for(q=Le+1;q<ee&&U[q]>=E;)q++;for(te=Le,me=q-1;te<me;te++,me--)fe=I[te],I[te]=I[me],I[me]=fe,$&&(fe=$[te],$[te]=$[me],$[me]=fe);Le=q}Le++}}},se=function(E,I,$){var U=E.split(""),pe={hiLevel:P};return $||($=[]),T(U,$,pe),function(fe,me,q){if(q.hiLevel!==0&&v)for(var te,ee=0;ee<fe.length;ee++)me[ee]===1&&(te=D.indexOf(fe[ee]))>=0&&(fe[ee]=D[te+1])}(U,$,pe),re(2,U,I,$,pe),re(1,U,I,$,pe),U.join("")};return this.__bidiEngine__.doBidiReorder=function(E,I,$){if(function(pe,fe){if(fe)for(var me=0;me<pe.length;me++)fe[me]=me;u===void 0&&(u=J(pe)),d===void 0&&(d=J(pe))}(E,I),s||!c||d)if(s&&c&&u^d)P=u?1:0,E=W(E,I,$);else if(!s&&c&&d)P=u?1:0,E=se(E,I,$),E=W(E,I);else if(!s||u||c||d){if(s&&!c&&u^d)E=W(E,I),u?(P=0,E=se(E,I,$)):(P=1,E=se(E,I,$),E=W(E,I));else if(s&&u&&!c&&d)P=1,E=se(E,I,$),E=W(E,I);else if(!s&&!c&&u^d){var U=v;u?(P=1,E=se(E,I,$),P=0,v=!1,E=se(E,I,$),v=U):(P=0,E=se(E,I,$),E=W(E,I),P=1,v=!1,E=se(E,I,$),v=U,E=W(E,I))}}else P=0,E=se(E,I,$);else P=u?1:0,E=se(E,I,$);return E},this.__bidiEngine__.setOptions=function(E){E&&(s=E.isInputVisual,c=E.isOutputVisual,u=E.isInputRtl,d=E.isOutputRtl,v=E.isSymmetricSwapping)},this.__bidiEngine__.setOptions(r),this.__bidiEngine__};var t=["BN","BN","BN","BN","BN","BN","BN","BN","BN","S","B","S","WS","B","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","B","B","B","S","WS","N","N","ET","ET","ET","N","N","N","N","N","ES","CS","ES","CS","CS","EN","EN","EN","EN","EN","EN","EN","EN","EN","EN","CS","N","N","N","N","N","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","N","N","N","N","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","N","N","N","BN","BN","BN","BN","BN","BN","B","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","BN","CS","N","ET","ET","ET","ET","N","N","N","N","L","N","N","BN","N","N","ET","ET","EN","EN","N","L","N","N","N","EN","L","N","N","N","N","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","N","L","L","L","L","L","L","L","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","L","N","N","N","N","N","ET","N","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","R","NSM","R","NSM","NSM","R","NSM","NSM","R","NSM","N","N","N","N","N","N","N","N","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","N","N","N","N","N","R","R","R","R","R","N","N","N","N","N","N","N","N","N","N","N","AN","AN","AN","AN","AN","AN","N","N","AL","ET","ET","AL","CS","AL","N","N","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","AL","AL","N","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","AN","AN","AN","AN","AN","AN","AN","AN","AN","AN","ET","AN","AN","AL","AL","AL","NSM","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","NSM","NSM","NSM","NSM","NSM","NSM","NSM","AN","N","NSM","NSM","NSM","NSM","NSM","NSM","AL","AL","NSM","NSM","N","NSM","NSM","NSM","NSM","AL","AL","EN","EN","EN","EN","EN","EN","EN","EN","EN","EN","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","N","AL","AL","NSM","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","N","N","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","AL","N","N","N","N","N","N","N","N","N","N","N","N","N","N","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","R","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","R","R","N","N","N","N","R","N","N","N","N","N","WS","WS","WS","WS","WS","WS","WS","WS","WS","WS","WS","BN","BN","BN","L","R","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","WS","B","LRE","RLE","PDF","LRO","RLO","CS","ET","ET","ET","ET","ET","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","CS","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","WS","BN","BN","BN","BN","BN","N","LRI","RLI","FSI","PDI","BN","BN","BN","BN","BN","BN","EN","L","N","N","EN","EN","EN","EN","EN","EN","ES","ES","N","N","N","L","EN","EN","EN","EN","EN","EN","EN","EN","EN","EN","ES","ES","N","N","N","N","L","L","L","L","L","L","L","L","L","L","L","L","L","N","N","N","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","ET","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","L","L","L","L","L","L","L","N","N","N","N","N","N","N","N","N","N","N","N","L","L","L","L","L","N","N","N","N","N","R","NSM","R","R","R","R","R","R","R","R","R","R","ES","R","R","R","R","R","R","R","R","R","R","R","R","R","N","R","R","R","R","R","N","R","N","R","R","N","R","R","N","R","R","R","R","R","R","R","R","R","R","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","NSM","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","CS","N","CS","N","N","CS","N","N","N","N","N","N","N","N","N","ET","N","N","ES","ES","N","N","N","N","N","ET","ET","N","N","N","N","N","AL","AL","AL","AL","AL","N","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","AL","N","N","BN","N","N","N","ET","ET","ET","N","N","N","N","N","ES","CS","ES","CS","CS","EN","EN","EN","EN","EN","EN","EN","EN","EN","EN","CS","N","N","N","N","N","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","N","N","N","N","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","N","N","N","N","N","N","N","N","N","N","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","L","N","N","N","L","L","L","L","L","L","N","N","L","L","L","L","L","L","N","N","L","L","L","L","L","L","N","N","L","L","L","N","N","N","ET","ET","N","N","N","ET","ET","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N","N"],n=new e.__bidiEngine__({isInputVisual:!0});e.API.events.push(["postProcessText",function(r){var i=r.text;r.x,r.y;var o=r.options||{};r.mutex,o.lang;var s=[];if(o.isInputVisual=typeof o.isInputVisual!="boolean"||o.isInputVisual,n.setOptions(o),Object.prototype.toString.call(i)==="[object Array]"){var u=0;for(s=[],u=0;u<i.length;u+=1)Object.prototype.toString.call(i[u])==="[object Array]"?s.push([n.doBidiReorder(i[u][0]),i[u][1],i[u][2]]):s.push([n.doBidiReorder(i[u])]);r.text=s}else r.text=n.doBidiReorder(i);n.setOptions({isInputVisual:!0})}])}(Ye),Ye.API.TTFFont=function(){function e(t){var n;if(this.rawData=t,n=this.contents=new po(t),this.contents.pos=4,n.readString(4)==="ttcf")throw new Error("TTCF not supported.");n.pos=0,this.parse(),this.subset=new m3(this),this.registerTTF()}return e.open=function(t){return new e(t)},e.prototype.parse=function(){return this.directory=new t3(this.contents),this.head=new r3(this),this.name=new l3(this),this.cmap=new rm(this),this.toUnicode={},this.hhea=new i3(this),this.maxp=new u3(this),this.hmtx=new c3(this),this.post=new a3(this),this.os2=new o3(this),this.loca=new p3(this),this.glyf=new f3(this),this.ascender=this.os2.exists&&this.os2.ascender||this.hhea.ascender,this.decender=this.os2.exists&&this.os2.decender||this.hhea.decender,this.lineGap=this.os2.exists&&this.os2.lineGap||this.hhea.lineGap,this.bbox=[this.head.xMin,this.head.yMin,this.head.xMax,this.head.yMax]},e.prototype.registerTTF=function(){var t,n,r,i,o;if(this.scaleFactor=1e3/this.head.unitsPerEm,this.bbox=(function(){var s,u,c,d;for(d=[],s=0,u=(c=this.bbox).length;s<u;s++)t=c[s],d.push(Math.round(t*this.scaleFactor));return d}).call(this),this.stemV=0,this.post.exists?(r=255&(i=this.post.italic_angle),32768&(n=i>>16)&&(n=-(1+(65535^n))),this.italicAngle=+(n+"."+r)):this.italicAngle=0,this.ascender=Math.round(this.ascender*this.scaleFactor),this.decender=Math.round(this.decender*this.scaleFactor),this.lineGap=Math.round(this.lineGap*this.scaleFactor),this.capHeight=this.os2.exists&&this.os2.capHeight||this.ascender,this.xHeight=this.os2.exists&&this.os2.xHeight||0,this.familyClass=(this.os2.exists&&this.os2.familyClass||0)>>8,this.isSerif=(o=this.familyClass)===1||o===2||o===3||o===4||o===5||o===7,this.isScript=this.familyClass===10,this.flags=0,this.post.isFixedPitch&&(this.flags|=1),this.isSerif&&(this.flags|=2),this.isScript&&(this.flags|=8),this.italicAngle!==0&&(this.flags|=64),this.flags|=32,!this.cmap.unicode)throw new Error("No unicode cmap for font")},e.prototype.characterToGlyph=function(t){var n;return((n=this.cmap.unicode)!=null?n.codeMap[t]:void 0)||0},e.prototype.widthOfGlyph=function(t){var n;return n=1e3/this.head.unitsPerEm,this.hmtx.forGlyph(t).advance*n},e.prototype.widthOfString=function(t,n,r){var i,o,s,u;for(s=0,o=0,u=(t=""+t).length;0<=u?o<u:o>u;o=0<=u?++o:--o)i=t.charCodeAt(o),s+=this.widthOfGlyph(this.characterToGlyph(i))+r*(1e3/n)||0;return s*(n/1e3)},e.prototype.lineHeight=function(t,n){var r;return n==null&&(n=!1),r=n?this.lineGap:0,(this.ascender+r-this.decender)/1e3*t},e}();var Wr,po=function(){function e(t){this.data=t??[],this.pos=0,this.length=this.data.length}return e.prototype.readByte=function(){return this.data[this.pos++]},e.prototype.writeByte=function(t){return this.data[this.pos++]=t},e.prototype.readUInt32=function(){return 16777216*this.readByte()+(this.readByte()<<16)+(this.readByte()<<8)+this.readByte()},e.prototype.writeUInt32=function(t){return this.writeByte(t>>>24&255),this.writeByte(t>>16&255),this.writeByte(t>>8&255),this.writeByte(255&t)},e.prototype.readInt32=function(){var t;return(t=this.readUInt32())>=2147483648?t-4294967296:t},e.prototype.writeInt32=function(t){return t<0&&(t+=4294967296),this.writeUInt32(t)},e.prototype.readUInt16=function(){return this.readByte()<<8|this.readByte()},e.prototype.writeUInt16=function(t){return this.writeByte(t>>8&255),this.writeByte(255&t)},e.prototype.readInt16=function(){var t;return(t=this.readUInt16())>=32768?t-65536:t},e.prototype.writeInt16=function(t){return t<0&&(t+=65536),this.writeUInt16(t)},e.prototype.readString=function(t){var n,r;for(r=[],n=0;0<=t?n<t:n>t;n=0<=t?++n:--n)r[n]=String.fromCharCode(this.readByte());return r.join("")},e.prototype.writeString=function(t){var n,r,i;for(i=[],n=0,r=t.length;0<=r?n<r:n>r;n=0<=r?++n:--n)i.push(this.writeByte(t.charCodeAt(n)));return i},e.prototype.readShort=function(){return this.readInt16()},e.prototype.writeShort=function(t){return this.writeInt16(t)},e.prototype.readLongLong=function(){var t,n,r,i,o,s,u,c;return t=this.readByte(),n=this.readByte(),r=this.readByte(),i=this.readByte(),o=this.readByte(),s=this.readByte(),u=this.readByte(),c=this.readByte(),128&t?-1*(72057594037927940*(255^t)+281474976710656*(255^n)+1099511627776*(255^r)+4294967296*(255^i)+16777216*(255^o)+65536*(255^s)+256*(255^u)+(255^c)+1):72057594037927940*t+281474976710656*n+1099511627776*r+4294967296*i+16777216*o+65536*s+256*u+c},e.prototype.writeLongLong=function(t){var n,r;return n=Math.floor(t/4294967296),r=4294967295&t,this.writeByte(n>>24&255),this.writeByte(n>>16&255),this.writeByte(n>>8&255),this.writeByte(255&n),this.writeByte(r>>24&255),this.writeByte(r>>16&255),this.writeByte(r>>8&255),this.writeByte(255&r)},e.prototype.readInt=function(){return this.readInt32()},e.prototype.writeInt=function(t){return this.writeInt32(t)},e.prototype.read=function(t){var n,r;for(n=[],r=0;0<=t?r<t:r>t;r=0<=t?++r:--r)n.push(this.readByte());return n},e.prototype.write=function(t){var n,r,i,o;for(o=[],r=0,i=t.length;r<i;r++)n=t[r],o.push(this.writeByte(n));return o},e}(),t3=function(){var e;function t(n){var r,i,o;for(this.scalarType=n.readInt(),this.tableCount=n.readShort(),this.searchRange=n.readShort(),this.entrySelector=n.readShort(),this.rangeShift=n.readShort(),this.tables={},i=0,o=this.tableCount;0<=o?i<o:i>o;i=0<=o?++i:--i)r={tag:n.readString(4),checksum:n.readInt(),offset:n.readInt(),length:n.readInt()},this.tables[r.tag]=r}return t.prototype.encode=function(n){var r,i,o,s,u,c,d,v,g,w,p,j,A;for(A in p=Object.keys(n).length,c=Math.log(2),g=16*Math.floor(Math.log(p)/c),s=Math.floor(g/c),v=16*p-g,(i=new po).writeInt(this.scalarType),i.writeShort(p),i.writeShort(g),i.writeShort(s),i.writeShort(v),o=16*p,d=i.pos+o,u=null,j=[],n)for(w=n[A],i.writeString(A),i.writeInt(e(w)),i.writeInt(d),i.writeInt(w.length),j=j.concat(w),A==="head"&&(u=d),d+=w.length;d%4;)j.push(0),d++;return i.write(j),r=2981146554-e(i.data),i.pos=u+8,i.writeUInt32(r),i.data},e=function(n){var r,i,o,s;for(n=im.call(n);n.length%4;)n.push(0);for(o=new po(n),i=0,r=0,s=n.length;r<s;r=r+=4)i+=o.readUInt32();return 4294967295&i},t}(),n3={}.hasOwnProperty,li=function(e,t){for(var n in t)n3.call(t,n)&&(e[n]=t[n]);function r(){this.constructor=e}return r.prototype=t.prototype,e.prototype=new r,e.__super__=t.prototype,e};Wr=function(){function e(t){var n;this.file=t,n=this.file.directory.tables[this.tag],this.exists=!!n,n&&(this.offset=n.offset,this.length=n.length,this.parse(this.file.contents))}return e.prototype.parse=function(){},e.prototype.encode=function(){},e.prototype.raw=function(){return this.exists?(this.file.contents.pos=this.offset,this.file.contents.read(this.length)):null},e}();var r3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="head",t.prototype.parse=function(n){return n.pos=this.offset,this.version=n.readInt(),this.revision=n.readInt(),this.checkSumAdjustment=n.readInt(),this.magicNumber=n.readInt(),this.flags=n.readShort(),this.unitsPerEm=n.readShort(),this.created=n.readLongLong(),this.modified=n.readLongLong(),this.xMin=n.readShort(),this.yMin=n.readShort(),this.xMax=n.readShort(),this.yMax=n.readShort(),this.macStyle=n.readShort(),this.lowestRecPPEM=n.readShort(),this.fontDirectionHint=n.readShort(),this.indexToLocFormat=n.readShort(),this.glyphDataFormat=n.readShort()},t.prototype.encode=function(n){var r;return(r=new po).writeInt(this.version),r.writeInt(this.revision),r.writeInt(this.checkSumAdjustment),r.writeInt(this.magicNumber),r.writeShort(this.flags),r.writeShort(this.unitsPerEm),r.writeLongLong(this.created),r.writeLongLong(this.modified),r.writeShort(this.xMin),r.writeShort(this.yMin),r.writeShort(this.xMax),r.writeShort(this.yMax),r.writeShort(this.macStyle),r.writeShort(this.lowestRecPPEM),r.writeShort(this.fontDirectionHint),r.writeShort(n),r.writeShort(this.glyphDataFormat),r.data},t}(),Lp=function(){function e(t,n){var r,i,o,s,u,c,d,v,g,w,p,j,A,D,y,x,P;switch(this.platformID=t.readUInt16(),this.encodingID=t.readShort(),this.offset=n+t.readInt(),g=t.pos,t.pos=this.offset,this.format=t.readUInt16(),this.length=t.readUInt16(),this.language=t.readUInt16(),this.isUnicode=this.platformID===3&&this.encodingID===1&&this.format===4||this.platformID===0&&this.format===4,this.codeMap={},this.format){case 0:for(c=0;c<256;++c)this.codeMap[c]=t.readByte();break;case 4:for(p=t.readUInt16(),w=p/2,t.pos+=6,o=function(){var z,J;for(J=[],c=z=0;0<=w?z<w:z>w;c=0<=w?++z:--z)J.push(t.readUInt16());return J}(),t.pos+=2,A=function(){var z,J;for(J=[],c=z=0;0<=w?z<w:z>w;c=0<=w?++z:--z)J.push(t.readUInt16());return J}(),d=function(){var z,J;for(J=[],c=z=0;0<=w?z<w:z>w;c=0<=w?++z:--z)J.push(t.readUInt16());return J}(),v=function(){var z,J;for(J=[],c=z=0;0<=w?z<w:z>w;c=0<=w?++z:--z)J.push(t.readUInt16());return J}(),i=(this.length-t.pos+this.offset)/2,u=function(){var z,J;for(J=[],c=z=0;0<=i?z<i:z>i;c=0<=i?++z:--z)J.push(t.readUInt16());return J}(),c=y=0,P=o.length;y<P;c=++y)for(D=o[c],r=x=j=A[c];j<=D?x<=D:x>=D;r=j<=D?++x:--x)v[c]===0?s=r+d[c]:(s=u[v[c]/2+(r-j)-(w-c)]||0)!==0&&(s+=d[c]),this.codeMap[r]=65535&s}t.pos=g}return e.encode=function(t,n){var r,i,o,s,u,c,d,v,g,w,p,j,A,D,y,x,P,z,J,Z,W,T,re,se,E,I,$,U,pe,fe,me,q,te,ee,Le,L,O,R,H,X,ae,he,ce,Pe,_e,Oe;switch(U=new po,s=Object.keys(t).sort(function(Fe,Ve){return Fe-Ve}),n){case"macroman":for(A=0,D=function(){var Fe=[];for(j=0;j<256;++j)Fe.push(0);return Fe}(),x={0:0},o={},pe=0,te=s.length;pe<te;pe++)x[ce=t[i=s[pe]]]==null&&(x[ce]=++A),o[i]={old:t[i],new:x[t[i]]},D[i]=x[t[i]];return U.writeUInt16(1),U.writeUInt16(0),U.writeUInt32(12),U.writeUInt16(0),U.writeUInt16(262),U.writeUInt16(0),U.write(D),{charMap:o,subtable:U.data,maxGlyphID:A+1};case"unicode":for(I=[],g=[],P=0,x={},r={},y=d=null,fe=0,ee=s.length;fe<ee;fe++)x[J=t[i=s[fe]]]==null&&(x[J]=++P),r[i]={old:J,new:x[J]},u=x[J]-i,y!=null&&u===d||(y&&g.push(y),I.push(i),d=u),y=i;for(y&&g.push(y),g.push(65535),I.push(65535),se=2*(re=I.length),T=2*Math.pow(Math.log(re)/Math.LN2,2),w=Math.log(T/2)/Math.LN2,W=2*re-T,c=[],Z=[],p=[],j=me=0,Le=I.length;me<Le;j=++me){if(E=I[j],v=g[j],E===65535){c.push(0),Z.push(0);break}if(E-($=r[E].new)>=32768)for(c.push(0),Z.push(2*(p.length+re-j)),i=q=E;E<=v?q<=v:q>=v;i=E<=v?++q:--q)p.push(r[i].new);else c.push($-E),Z.push(0)}for(U.writeUInt16(3),U.writeUInt16(1),U.writeUInt32(12),U.writeUInt16(4),U.writeUInt16(16+8*re+2*p.length),U.writeUInt16(0),U.writeUInt16(se),U.writeUInt16(T),U.writeUInt16(w),U.writeUInt16(W),ae=0,L=g.length;ae<L;ae++)i=g[ae],U.writeUInt16(i);for(U.writeUInt16(0),he=0,O=I.length;he<O;he++)i=I[he],U.writeUInt16(i);for(Pe=0,R=c.length;Pe<R;Pe++)u=c[Pe],U.writeUInt16(u);for(_e=0,H=Z.length;_e<H;_e++)z=Z[_e],U.writeUInt16(z);for(Oe=0,X=p.length;Oe<X;Oe++)A=p[Oe],U.writeUInt16(A);return{charMap:r,subtable:U.data,maxGlyphID:P+1}}},e}(),rm=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="cmap",t.prototype.parse=function(n){var r,i,o;for(n.pos=this.offset,this.version=n.readUInt16(),o=n.readUInt16(),this.tables=[],this.unicode=null,i=0;0<=o?i<o:i>o;i=0<=o?++i:--i)r=new Lp(n,this.offset),this.tables.push(r),r.isUnicode&&this.unicode==null&&(this.unicode=r);return!0},t.encode=function(n,r){var i,o;return r==null&&(r="macroman"),i=Lp.encode(n,r),(o=new po).writeUInt16(0),o.writeUInt16(1),i.table=o.data.concat(i.subtable),i},t}(),i3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="hhea",t.prototype.parse=function(n){return n.pos=this.offset,this.version=n.readInt(),this.ascender=n.readShort(),this.decender=n.readShort(),this.lineGap=n.readShort(),this.advanceWidthMax=n.readShort(),this.minLeftSideBearing=n.readShort(),this.minRightSideBearing=n.readShort(),this.xMaxExtent=n.readShort(),this.caretSlopeRise=n.readShort(),this.caretSlopeRun=n.readShort(),this.caretOffset=n.readShort(),n.pos+=8,this.metricDataFormat=n.readShort(),this.numberOfMetrics=n.readUInt16()},t}(),o3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="OS/2",t.prototype.parse=function(n){if(n.pos=this.offset,this.version=n.readUInt16(),this.averageCharWidth=n.readShort(),this.weightClass=n.readUInt16(),this.widthClass=n.readUInt16(),this.type=n.readShort(),this.ySubscriptXSize=n.readShort(),this.ySubscriptYSize=n.readShort(),this.ySubscriptXOffset=n.readShort(),this.ySubscriptYOffset=n.readShort(),this.ySuperscriptXSize=n.readShort(),this.ySuperscriptYSize=n.readShort(),this.ySuperscriptXOffset=n.readShort(),this.ySuperscriptYOffset=n.readShort(),this.yStrikeoutSize=n.readShort(),this.yStrikeoutPosition=n.readShort(),this.familyClass=n.readShort(),this.panose=function(){var r,i;for(i=[],r=0;r<10;++r)i.push(n.readByte());return i}(),this.charRange=function(){var r,i;for(i=[],r=0;r<4;++r)i.push(n.readInt());return i}(),this.vendorID=n.readString(4),this.selection=n.readShort(),this.firstCharIndex=n.readShort(),this.lastCharIndex=n.readShort(),this.version>0&&(this.ascent=n.readShort(),this.descent=n.readShort(),this.lineGap=n.readShort(),this.winAscent=n.readShort(),this.winDescent=n.readShort(),this.codePageRange=function(){var r,i;for(i=[],r=0;r<2;r=++r)i.push(n.readInt());return i}(),this.version>1))return this.xHeight=n.readShort(),this.capHeight=n.readShort(),this.defaultChar=n.readShort(),this.breakChar=n.readShort(),this.maxContext=n.readShort()},t}(),a3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="post",t.prototype.parse=function(n){var r,i,o;switch(n.pos=this.offset,this.format=n.readInt(),this.italicAngle=n.readInt(),this.underlinePosition=n.readShort(),this.underlineThickness=n.readShort(),this.isFixedPitch=n.readInt(),this.minMemType42=n.readInt(),this.maxMemType42=n.readInt(),this.minMemType1=n.readInt(),this.maxMemType1=n.readInt(),this.format){case 65536:break;case 131072:var s;for(i=n.readUInt16(),this.glyphNameIndex=[],s=0;0<=i?s<i:s>i;s=0<=i?++s:--s)this.glyphNameIndex.push(n.readUInt16());for(this.names=[],o=[];n.pos<this.offset+this.length;)r=n.readByte(),o.push(this.names.push(n.readString(r)));return o;case 151552:return i=n.readUInt16(),this.offsets=n.read(i);case 196608:break;case 262144:return this.map=(function(){var u,c,d;for(d=[],s=u=0,c=this.file.maxp.numGlyphs;0<=c?u<c:u>c;s=0<=c?++u:--u)d.push(n.readUInt32());return d}).call(this)}},t}(),s3=function(e,t){this.raw=e,this.length=e.length,this.platformID=t.platformID,this.encodingID=t.encodingID,this.languageID=t.languageID},l3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="name",t.prototype.parse=function(n){var r,i,o,s,u,c,d,v,g,w,p;for(n.pos=this.offset,n.readShort(),r=n.readShort(),c=n.readShort(),i=[],s=0;0<=r?s<r:s>r;s=0<=r?++s:--s)i.push({platformID:n.readShort(),encodingID:n.readShort(),languageID:n.readShort(),nameID:n.readShort(),length:n.readShort(),offset:this.offset+c+n.readShort()});for(d={},s=g=0,w=i.length;g<w;s=++g)o=i[s],n.pos=o.offset,v=n.readString(o.length),u=new s3(v,o),d[p=o.nameID]==null&&(d[p]=[]),d[o.nameID].push(u);this.strings=d,this.copyright=d[0],this.fontFamily=d[1],this.fontSubfamily=d[2],this.uniqueSubfamily=d[3],this.fontName=d[4],this.version=d[5];try{this.postscriptName=d[6][0].raw.replace(/[\x00-\x19\x80-\xff]/g,"")}catch{this.postscriptName=d[4][0].raw.replace(/[\x00-\x19\x80-\xff]/g,"")}return this.trademark=d[7],this.manufacturer=d[8],this.designer=d[9],this.description=d[10],this.vendorUrl=d[11],this.designerUrl=d[12],this.license=d[13],this.licenseUrl=d[14],this.preferredFamily=d[15],this.preferredSubfamily=d[17],this.compatibleFull=d[18],this.sampleText=d[19]},t}(),u3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="maxp",t.prototype.parse=function(n){return n.pos=this.offset,this.version=n.readInt(),this.numGlyphs=n.readUInt16(),this.maxPoints=n.readUInt16(),this.maxContours=n.readUInt16(),this.maxCompositePoints=n.readUInt16(),this.maxComponentContours=n.readUInt16(),this.maxZones=n.readUInt16(),this.maxTwilightPoints=n.readUInt16(),this.maxStorage=n.readUInt16(),this.maxFunctionDefs=n.readUInt16(),this.maxInstructionDefs=n.readUInt16(),this.maxStackElements=n.readUInt16(),this.maxSizeOfInstructions=n.readUInt16(),this.maxComponentElements=n.readUInt16(),this.maxComponentDepth=n.readUInt16()},t}(),c3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="hmtx",t.prototype.parse=function(n){var r,i,o,s,u,c,d;for(n.pos=this.offset,this.metrics=[],r=0,c=this.file.hhea.numberOfMetrics;0<=c?r<c:r>c;r=0<=c?++r:--r)this.metrics.push({advance:n.readUInt16(),lsb:n.readInt16()});for(o=this.file.maxp.numGlyphs-this.file.hhea.numberOfMetrics,this.leftSideBearings=function(){var v,g;for(g=[],r=v=0;0<=o?v<o:v>o;r=0<=o?++v:--v)g.push(n.readInt16());return g}(),this.widths=(function(){var v,g,w,p;for(p=[],v=0,g=(w=this.metrics).length;v<g;v++)s=w[v],p.push(s.advance);return p}).call(this),i=this.widths[this.widths.length-1],d=[],r=u=0;0<=o?u<o:u>o;r=0<=o?++u:--u)d.push(this.widths.push(i));return d},t.prototype.forGlyph=function(n){return n in this.metrics?this.metrics[n]:{advance:this.metrics[this.metrics.length-1].advance,lsb:this.leftSideBearings[n-this.metrics.length]}},t}(),im=[].slice,f3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="glyf",t.prototype.parse=function(){return this.cache={}},t.prototype.glyphFor=function(n){var r,i,o,s,u,c,d,v,g,w;return n in this.cache?this.cache[n]:(s=this.file.loca,r=this.file.contents,i=s.indexOf(n),(o=s.lengthOf(n))===0?this.cache[n]=null:(r.pos=this.offset+i,u=(c=new po(r.read(o))).readShort(),v=c.readShort(),w=c.readShort(),d=c.readShort(),g=c.readShort(),this.cache[n]=u===-1?new d3(c,v,w,d,g):new h3(c,u,v,w,d,g),this.cache[n]))},t.prototype.encode=function(n,r,i){var o,s,u,c,d;for(u=[],s=[],c=0,d=r.length;c<d;c++)o=n[r[c]],s.push(u.length),o&&(u=u.concat(o.encode(i)));return s.push(u.length),{table:u,offsets:s}},t}(),h3=function(){function e(t,n,r,i,o,s){this.raw=t,this.numberOfContours=n,this.xMin=r,this.yMin=i,this.xMax=o,this.yMax=s,this.compound=!1}return e.prototype.encode=function(){return this.raw.data},e}(),d3=function(){function e(t,n,r,i,o){var s,u;for(this.raw=t,this.xMin=n,this.yMin=r,this.xMax=i,this.yMax=o,this.compound=!0,this.glyphIDs=[],this.glyphOffsets=[],s=this.raw;u=s.readShort(),this.glyphOffsets.push(s.pos),this.glyphIDs.push(s.readUInt16()),32&u;)s.pos+=1&u?4:2,128&u?s.pos+=8:64&u?s.pos+=4:8&u&&(s.pos+=2)}return e.prototype.encode=function(){var t,n,r;for(n=new po(im.call(this.raw.data)),t=0,r=this.glyphIDs.length;t<r;++t)n.pos=this.glyphOffsets[t];return n.data},e}(),p3=function(e){function t(){return t.__super__.constructor.apply(this,arguments)}return li(t,Wr),t.prototype.tag="loca",t.prototype.parse=function(n){var r,i;return n.pos=this.offset,r=this.file.head.indexToLocFormat,this.offsets=r===0?(function(){var o,s;for(s=[],i=0,o=this.length;i<o;i+=2)s.push(2*n.readUInt16());return s}).call(this):(function(){var o,s;for(s=[],i=0,o=this.length;i<o;i+=4)s.push(n.readUInt32());return s}).call(this)},t.prototype.indexOf=function(n){return this.offsets[n]},t.prototype.lengthOf=function(n){return this.offsets[n+1]-this.offsets[n]},t.prototype.encode=function(n,r){for(var i=new Uint32Array(this.offsets.length),o=0,s=0,u=0;u<i.length;++u)if(i[u]=o,s<r.length&&r[s]==u){++s,i[u]=o;var c=this.offsets[u],d=this.offsets[u+1]-c;d>0&&(o+=d)}for(var v=new Array(4*i.length),g=0;g<i.length;++g)v[4*g+3]=255&i[g],v[4*g+2]=(65280&i[g])>>8,v[4*g+1]=(16711680&i[g])>>16,v[4*g]=(4278190080&i[g])>>24;return v},t}(),m3=function(){function e(t){this.font=t,this.subset={},this.unicodes={},this.next=33}return e.prototype.generateCmap=function(){var t,n,r,i,o;for(n in i=this.font.cmap.tables[0].codeMap,t={},o=this.subset)r=o[n],t[n]=i[r];return t},e.prototype.glyphsFor=function(t){var n,r,i,o,s,u,c;for(i={},s=0,u=t.length;s<u;s++)i[o=t[s]]=this.font.glyf.glyphFor(o);for(o in n=[],i)(r=i[o])!=null&&r.compound&&n.push.apply(n,r.glyphIDs);if(n.length>0)for(o in c=this.glyphsFor(n))r=c[o],i[o]=r;return i},e.prototype.encode=function(t,n){var r,i,o,s,u,c,d,v,g,w,p,j,A,D,y;for(i in r=rm.encode(this.generateCmap(),"unicode"),s=this.glyphsFor(t),p={0:0},y=r.charMap)p[(c=y[i]).old]=c.new;for(j in w=r.maxGlyphID,s)j in p||(p[j]=w++);return v=function(x){var P,z;for(P in z={},x)z[x[P]]=P;return z}(p),g=Object.keys(v).sort(function(x,P){return x-P}),A=function(){var x,P,z;for(z=[],x=0,P=g.length;x<P;x++)u=g[x],z.push(v[u]);return z}(),o=this.font.glyf.encode(s,A,p),d=this.font.loca.encode(o.offsets,A),D={cmap:this.font.cmap.raw(),glyf:o.table,loca:d,hmtx:this.font.hmtx.raw(),hhea:this.font.hhea.raw(),maxp:this.font.maxp.raw(),post:this.font.post.raw(),name:this.font.name.raw(),head:this.font.head.encode(n)},this.font.os2.exists&&(D["OS/2"]=this.font.os2.raw()),this.font.directory.encode(D)},e}();Ye.API.PDFObject=function(){var e;function t(){}return e=function(n,r){return(Array(r+1).join("0")+n).slice(-r)},t.convert=function(n){var r,i,o,s;if(Array.isArray(n))return"["+function(){var u,c,d;for(d=[],u=0,c=n.length;u<c;u++)r=n[u],d.push(t.convert(r));return d}().join(" ")+"]";if(typeof n=="string")return"/"+n;if(n!=null&&n.isString)return"("+n+")";if(n instanceof Date)return"(D:"+e(n.getUTCFullYear(),4)+e(n.getUTCMonth(),2)+e(n.getUTCDate(),2)+e(n.getUTCHours(),2)+e(n.getUTCMinutes(),2)+e(n.getUTCSeconds(),2)+"Z)";if({}.toString.call(n)==="[object Object]"){for(i in o=["<<"],n)s=n[i],o.push("/"+i+" "+t.convert(s));return o.push(">>"),o.join(`
-`)}return""+n},t}();const g3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("rect",{x:"4",y:"7",width:"16",height:"11",rx:"2",ry:"2"}),de.jsx("circle",{cx:"9",cy:"12",r:"1.5"}),de.jsx("circle",{cx:"15",cy:"12",r:"1.5"}),de.jsx("path",{d:"M9 17h6M12 2v3"})]}),v3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("polyline",{points:"12 15 12 4"}),de.jsx("polyline",{points:"8 8 12 4 16 8"}),de.jsx("rect",{x:"3",y:"15",width:"18",height:"5",rx:"1",ry:"1"})]}),y3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("path",{d:"M9 2.25a.75.75 0 00-.75.75v.75h7.5V3a.75.75 0 00-.75-.75h-6z"}),de.jsx("path",{d:"M4.5 6h15a.75.75 0 01.75.75v12a2.25 2.25 0 01-2.25 2.25h-12A2.25 2.25 0 014.5 18.75v-12A.75.75 0 014.5 6z"}),de.jsx("path",{d:"M5.25 9h13.5M5.25 12.75h13.5M5.25 16.5h13.5"})]}),w3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("path",{d:"M4.5 4.5a7.5 7.5 0 0113.054-2.15M19.5 4.5v5h-5"}),de.jsx("path",{d:"M19.5 19.5a7.5 7.5 0 01-13.054 2.15M4.5 19.5v-5h5"})]}),x3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("polyline",{points:"12 9 12 20"}),de.jsx("polyline",{points:"16 16 12 20 8 16"}),de.jsx("rect",{x:"3",y:"4",width:"18",height:"5",rx:"1",ry:"1"})]}),b3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("path",{d:"M6 7h12"}),de.jsx("path",{d:"M6 7l1 12a2 2 0 002 2h6a2 2 0 002-2l1-12"}),de.jsx("path",{d:"M9 7V4h6v3"})]}),S3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("rect",{x:"2",y:"3",width:"8",height:"16",rx:"1",ry:"1"}),de.jsx("rect",{x:"14",y:"3",width:"8",height:"16",rx:"1",ry:"1"}),de.jsx("line",{x1:"6",y1:"8",x2:"6",y2:"12"}),de.jsx("line",{x1:"18",y1:"8",x2:"18",y2:"12"})]}),om=e=>(e||"").replace(/[#?].*$/,""),_p=e=>localStorage.getItem(`docbot_page_${om(e)}`)||"default",wh=(e,t)=>localStorage.setItem(`docbot_page_${om(e)}`,t),Gs=(e,t)=>{localStorage.setItem(`docbot_session_${e}`,JSON.stringify(t))},xh=e=>{try{return JSON.parse(localStorage.getItem(`docbot_session_${e}`)||"null")}catch{return null}};let bh;function N3({sender:e,text:t,onPin:n,pinned:r,anchorId:i,tabId:o}){let s="max-w-[90%] px-3 py-2 rounded shadow text-sm whitespace-pre-wrap relative group";e==="user"?s+=" bg-blue-600 text-white self-end":e==="bot"?s+=" bg-green-600 text-white":s+=" bg-gray-300 text-gray-800";const[u,c]=gt.useState(!1);return de.jsxs("div",{className:s,onMouseEnter:()=>{c(!0),e==="bot"&&i&&o&&chrome.runtime.sendMessage({type:"docbot:scroll_to",anchorId:i,tabId:o})},onMouseLeave:()=>c(!1),onClick:d=>{d.stopPropagation()},style:{opacity:u?.8:1},children:[t,e==="bot"&&n&&de.jsx("button",{onClick:d=>{d.stopPropagation(),n(t)},className:`absolute -top-2 -right-2 rounded-full w-6 h-6 text-xs transition-opacity ${r?"bg-yellow-400 text-yellow-900":"bg-gray-200 text-gray-600 opacity-0 group-hover:opacity-100"}`,title:r?"Pinned":"Pin to notes",children:"📌"})]})}function L3(){return de.jsx("div",{className:"max-w-[90%] px-3 py-2 rounded shadow text-sm bg-gray-200 text-gray-700",children:de.jsxs("div",{className:"flex items-center space-x-2",children:[de.jsx("span",{children:"DocBot is thinking"}),de.jsxs("div",{className:"flex space-x-1",children:[de.jsx("div",{className:"w-1 h-1 bg-gray-500 rounded-full animate-bounce",style:{animationDelay:"0ms"}}),de.jsx("div",{className:"w-1 h-1 bg-gray-500 rounded-full animate-bounce",style:{animationDelay:"150ms"}}),de.jsx("div",{className:"w-1 h-1 bg-gray-500 rounded-full animate-bounce",style:{animationDelay:"300ms"}})]})]})})}function _3(){const[e,t]=gt.useState([]),[n,r]=gt.useState(""),[i,o]=gt.useState(""),[s,u]=gt.useState(!1),[c,d]=gt.useState(!0),[v,g]=gt.useState({}),[w,p]=gt.useState(null),[j,A]=gt.useState(!1),[D,y]=gt.useState([]),[x,P]=gt.useState([]),[z,J]=gt.useState(""),[Z,W]=gt.useState("default"),T=gt.useRef(null),re=gt.useRef(null),[se,E]=gt.useState(!1),[I,$]=gt.useState(!1),[U,pe]=gt.useState(!1),[fe,me]=gt.useState(!1),[q,te]=gt.useState(null),[ee,Le]=gt.useState(null),[L,O]=gt.useState(!1),[R,H]=gt.useState([]),X=()=>{const le=xh(_p(z));$(!0),setTimeout(()=>{le?(t(le.messages||[]),o(le.summary||""),g(le.pinned||{})):alert("No stored history for this page"),$(!1)},200)},ae=()=>{if(!i)return null;const ue=i.split(/\n+/).map(Ce=>Ce.trim()).filter(Boolean).map(Ce=>Ce.replace(/^[*\-•\s]+/,""));if(ue.length>1){const[Ce,...Te]=ue;return de.jsxs("div",{className:`${s?"":"max-h-32 overflow-y-auto"} space-y-2`,children:[de.jsx("p",{className:"text-sm text-gray-700 leading-relaxed",dangerouslySetInnerHTML:{__html:Ce}}),de.jsx("ul",{className:"list-disc pl-4 text-sm text-gray-700 leading-relaxed space-y-1",children:Te.map((Lt,Qe)=>de.jsx("li",{dangerouslySetInnerHTML:{__html:Lt}},Qe))})]})}return de.jsx("p",{className:`text-sm text-gray-700 leading-relaxed whitespace-pre-wrap ${s?"":"max-h-32 overflow-y-auto"}`,children:i})},[he,ce]=gt.useState(!1),[Pe,_e]=gt.useState(!1),Oe=()=>de.jsx("div",{className:"absolute inset-0 bg-white/60 backdrop-blur-sm flex items-center justify-center z-50",children:de.jsx("div",{className:"animate-spin rounded-full h-10 w-10 border-4 border-purple-500 border-t-transparent"})});gt.useEffect(()=>{Z&&(bh&&clearTimeout(bh),bh=setTimeout(()=>{Gs(Z,{summary:i,messages:e,pinned:v})},400))},[i,e,v,Z]);const Fe=le=>{const ue=v[le],Ce={...v};if(ue){delete Ce[le];const Te=x.find(Lt=>Lt.content===le);Te&&fetch(`http://localhost:8000/notes/${Te.note_id}`,{method:"DELETE"}).then(()=>Je(Z)).catch(()=>{})}else Ce[le]=!0,He(le,"Pinned");g(Ce),Gs(Z,{summary:i,messages:e,pinned:Ce})};gt.useEffect(()=>{var le;(le=T.current)==null||le.scrollIntoView({behavior:"smooth"})},[e]),gt.useEffect(()=>{chrome.tabs.query({active:!0,currentWindow:!0},le=>{if(!(le!=null&&le.length))return;const ue=le[0];p(ue.id),J(ue.url);const Ce=_p(ue.url);W(Ce);const Te=xh(Ce);Te?(t(Te.messages||[]),o(Te.summary||""),g(Te.pinned||{})):(t([]),o(""),g({})),Je(Ce)})},[]),gt.useEffect(()=>{Je(Z);const le=xh(Z);le?(t(le.messages||[]),o(le.summary||""),g(le.pinned||{})):(t([]),o(""),g({}))},[Z]),gt.useEffect(()=>{chrome.storage.local.get(["docbot_comparison_history"],le=>{if(le.docbot_comparison_history&&le.docbot_comparison_history.length>0)H(le.docbot_comparison_history);else{const ue=localStorage.getItem("docbot_comparison_history");if(ue)try{const Ce=JSON.parse(ue);H(Ce),Ce.length>0&&chrome.storage.local.set({docbot_comparison_history:Ce})}catch(Ce){console.error("Failed to load comparison history:",Ce)}}})},[]);const Ve=()=>{if(!se){if(E(!0),!w){console.warn("DocBot: No tabId");return}console.log("DocBot: Sending message to content script"),chrome.tabs.sendMessage(w,{type:"docbot:request_text"},le=>{chrome.runtime.lastError?(console.warn("DocBot: content-script message failed",chrome.runtime.lastError.message),chrome.scripting.executeScript({target:{tabId:w},world:"MAIN",func:()=>{var Te;const Ce=((Te=document.body)==null?void 0:Te.innerText)||"";return Ce.length>1e5?Ce.slice(0,1e5):Ce}},ue=>{var Te,Lt;if(chrome.runtime.lastError||!(ue!=null&&ue.length)){console.error("DocBot: executeScript failed",chrome.runtime.lastError);try{const Qe=new URL(window.location.href).origin+"/*";chrome.permissions.request({origins:[Qe]},dt=>{dt?(console.log("DocBot: host permission granted, retrying"),Ve()):alert("Permission denied. Cannot read this page.")})}catch{alert("This page blocks access. Try another page.")}return}console.log("DocBot: executeScript returned text length",(Lt=(Te=ue[0])==null?void 0:Te.result)==null?void 0:Lt.length);const Ce=ue[0].result;chrome.runtime.sendMessage({type:"docbot:text_extracted",text:Ce,tabId:w}),fetch("http://localhost:8000/summarise",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({text:Ce})}).then(Qe=>Qe.json()).then(Qe=>{o(Qe.summary),Qe.document_id&&z&&(W(Qe.document_id),wh(z,Qe.document_id),Gs(Qe.document_id,{summary:Qe.summary,messages:e,pinned:v})),Ee(Qe.document_id||Z)}).catch(Qe=>alert("Summarise failed: "+Qe.message)).finally(()=>E(!1))})):(console.log("DocBot: content-script responded ok"),chrome.scripting.executeScript({target:{tabId:w},world:"MAIN",func:()=>{var Te;const Ce=((Te=document.body)==null?void 0:Te.innerText)||"";return Ce.length>1e5?Ce.slice(0,1e5):Ce}},ue=>{if(ue!=null&&ue.length){const Ce=ue[0].result;chrome.runtime.sendMessage({type:"docbot:text_extracted",text:Ce,tabId:w}),fetch("http://localhost:8000/summarise",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({text:Ce})}).then(Te=>Te.json()).then(Te=>{o(Te.summary),Te.document_id&&z&&(W(Te.document_id),wh(z,Te.document_id),Gs(Te.document_id,{summary:Te.summary,messages:e,pinned:v})),Ee(Te.document_id||Z)}).catch(Te=>alert("Summarise failed: "+Te.message)).finally(()=>E(!1))}}))})}},ve=le=>{if(le.preventDefault(),Pe||!n.trim())return;const ue=n.trim();r(""),t(Ce=>[...Ce,{sender:"user",text:ue}]),_e(!0),fetch("http://localhost:8000/ask",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({question:ue,document_id:Z})}).then(Ce=>Ce.json()).then(Ce=>{const Te=Ce.answer.split(/[.?!]/)[0].slice(0,120),Lt=`docbot-${Date.now()}`;t(Qe=>[...Qe,{sender:"bot",text:Ce.answer,anchorId:Lt,src:Te}]),Ee(Z),Te.length>10&&w&&chrome.runtime.sendMessage({type:"docbot:highlight_text",text:Te,color:"#fef3c7",anchorId:Lt,tabId:w})}).catch(Ce=>t(Te=>[...Te,{sender:"system",text:`Error: ${Ce.message}`}])).finally(()=>_e(!1))},B=le=>{if(!le.name.toLowerCase().endsWith(".pdf")){alert("Only PDF files are supported");return}W(le.name.replace(/[^a-zA-Z0-9]/g,"_"));const ue=new FormData;ue.append("file",le),fetch("http://localhost:8000/upload",{method:"POST",body:ue}).then(Ce=>Ce.json()).then(Ce=>{o(Ce.summary),Ce.document_id&&z&&(W(Ce.document_id),wh(z,Ce.document_id),Gs(Ce.document_id,{summary:Ce.summary,messages:e,pinned:v})),Ee(Ce.document_id||Z)}).catch(Ce=>alert("Upload failed: "+Ce.message))},Ze=le=>{const ue=le.target.files[0];ue&&B(ue)},Ue=le=>{le.preventDefault(),A(!0)},Ae=le=>{le.preventDefault(),A(!1)},je=le=>{le.preventDefault(),A(!1);const ue=le.dataTransfer.files[0];ue&&B(ue)},De=()=>{var le;(le=re.current)==null||le.click()},Ee=le=>{fetch(`http://localhost:8000/auto-suggestions?document_id=${le}`,{method:"POST",headers:{"Content-Type":"application/json"}}).then(ue=>ue.json()).then(ue=>y(ue.suggestions)).catch(()=>y([]))},He=(le,ue="")=>{fetch("http://localhost:8000/notes",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({content:le,document_id:Z,topic:ue})}).then(()=>Je(Z)).catch(Ce=>console.error("Note save failed:",Ce))},Je=(le=Z)=>{le&&fetch(`http://localhost:8000/notes?document_id=${le}`).then(ue=>ue.json()).then(ue=>P(ue.notes)).catch(()=>P([]))},it=le=>{r(le),ve({preventDefault:()=>{},target:{question:{value:le}}})},st=()=>{pe(!0),setTimeout(()=>{localStorage.removeItem(`docbot_session_${Z}`),t([]),o(""),g({}),ce(!1),pe(!1)},300)},ct=()=>{const le=new Ye({orientation:"p",unit:"pt",format:"a4"});let ue=40;if(le.setFontSize(12),le.text(`DocBot Session - ${new Date().toLocaleString()}`,40,ue),ue+=30,i){le.setFontSize(10),le.text("SUMMARY:",40,ue),ue+=15;const Ce=le.splitTextToSize(i,500);le.text(Ce,40,ue),ue+=Ce.length*12+20,le.text("CHAT HISTORY:",40,ue),ue+=20,le.setFontSize(12)}e.forEach(({sender:Ce,text:Te})=>{const Lt=le.splitTextToSize(`${Ce.toUpperCase()}: ${Te}`,500);le.text(Lt,40,ue),ue+=Lt.length*14+10,ue>780&&(le.addPage(),ue=40)}),le.save("docbot_chat.pdf")},yt=async()=>{if(!q||!ee){alert("Please select both documents to compare");return}O(!0);try{const le=await q.arrayBuffer(),ue=await ee.arrayBuffer(),Ce=new File([le],q.name,{type:q.type,lastModified:Date.now()}),Te=new File([ue],ee.name,{type:ee.type,lastModified:Date.now()}),Lt=new FormData;Lt.append("document1",Ce),Lt.append("document2",Te);const Qe=await fetch("http://localhost:8000/compare",{method:"POST",body:Lt});if(!Qe.ok)throw new Error("Failed to compare documents");const dt=await Qe.json(),ur={summary:dt.comparison_summary,document1:{name:q.name,content:dt.document1_content},document2:{name:ee.name,content:dt.document2_content},changes:dt.changes||[]},ft="comparison_"+Date.now(),ui={[ft]:ur,[`${ft}_metadata`]:{created:Date.now(),file1Name:q.name,file2Name:ee.name,summary:dt.comparison_summary.substring(0,100)+"..."}};chrome.storage.local.set(ui,()=>{const En=[{id:ft,timestamp:new Date().toLocaleString(),file1Name:q.name,file2Name:ee.name,summary:dt.comparison_summary.substring(0,100)+"..."},...R.slice(0,9)];H(En),localStorage.setItem("docbot_comparison_history",JSON.stringify(En)),chrome.storage.local.set({docbot_comparison_history:En}),chrome.tabs.create({url:`chrome-extension://${chrome.runtime.id}/comparison.html?id=${ft}`})}),me(!1),te(null),Le(null)}catch(le){console.error("Compare error:",le);let ue=`Failed to compare documents.
+`)}return""+n},t}();const g3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("rect",{x:"4",y:"7",width:"16",height:"11",rx:"2",ry:"2"}),de.jsx("circle",{cx:"9",cy:"12",r:"1.5"}),de.jsx("circle",{cx:"15",cy:"12",r:"1.5"}),de.jsx("path",{d:"M9 17h6M12 2v3"})]}),v3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("polyline",{points:"12 15 12 4"}),de.jsx("polyline",{points:"8 8 12 4 16 8"}),de.jsx("rect",{x:"3",y:"15",width:"18",height:"5",rx:"1",ry:"1"})]}),y3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("path",{d:"M9 2.25a.75.75 0 00-.75.75v.75h7.5V3a.75.75 0 00-.75-.75h-6z"}),de.jsx("path",{d:"M4.5 6h15a.75.75 0 01.75.75v12a2.25 2.25 0 01-2.25 2.25h-12A2.25 2.25 0 014.5 18.75v-12A.75.75 0 014.5 6z"}),de.jsx("path",{d:"M5.25 9h13.5M5.25 12.75h13.5M5.25 16.5h13.5"})]}),w3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("path",{d:"M4.5 4.5a7.5 7.5 0 0113.054-2.15M19.5 4.5v5h-5"}),de.jsx("path",{d:"M19.5 19.5a7.5 7.5 0 01-13.054 2.15M4.5 19.5v-5h5"})]}),x3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("polyline",{points:"12 9 12 20"}),de.jsx("polyline",{points:"16 16 12 20 8 16"}),de.jsx("rect",{x:"3",y:"4",width:"18",height:"5",rx:"1",ry:"1"})]}),b3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("path",{d:"M6 7h12"}),de.jsx("path",{d:"M6 7l1 12a2 2 0 002 2h6a2 2 0 002-2l1-12"}),de.jsx("path",{d:"M9 7V4h6v3"})]}),S3=({className:e=""})=>de.jsxs("svg",{className:e,viewBox:"0 0 24 24",fill:"none",stroke:"currentColor",strokeWidth:"2",strokeLinecap:"round",strokeLinejoin:"round",children:[de.jsx("rect",{x:"2",y:"3",width:"8",height:"16",rx:"1",ry:"1"}),de.jsx("rect",{x:"14",y:"3",width:"8",height:"16",rx:"1",ry:"1"}),de.jsx("line",{x1:"6",y1:"8",x2:"6",y2:"12"}),de.jsx("line",{x1:"18",y1:"8",x2:"18",y2:"12"})]}),om=e=>(e||"").replace(/[#?].*$/,""),_p=e=>localStorage.getItem(`docbot_page_${om(e)}`)||"default",wh=(e,t)=>localStorage.setItem(`docbot_page_${om(e)}`,t),Gs=(e,t)=>{localStorage.setItem(`docbot_session_${e}`,JSON.stringify(t))},xh=e=>{try{return JSON.parse(localStorage.getItem(`docbot_session_${e}`)||"null")}catch{return null}};let bh;function N3({sender:e,text:t,onPin:n,pinned:r,anchorId:i,tabId:o}){let s="max-w-[90%] px-3 py-2 rounded shadow text-sm whitespace-pre-wrap relative group";e==="user"?s+=" bg-blue-600 text-white self-end":e==="bot"?s+=" bg-green-600 text-white":s+=" bg-gray-300 text-gray-800";const[u,c]=gt.useState(!1);return de.jsxs("div",{className:s,onMouseEnter:()=>{c(!0),e==="bot"&&i&&o&&chrome.runtime.sendMessage({type:"docbot:scroll_to",anchorId:i,tabId:o})},onMouseLeave:()=>c(!1),onClick:d=>{d.stopPropagation()},style:{opacity:u?.8:1},children:[t,e==="bot"&&n&&de.jsx("button",{onClick:d=>{d.stopPropagation(),n(t)},className:`absolute -top-2 -right-2 rounded-full w-6 h-6 text-xs transition-opacity ${r?"bg-yellow-400 text-yellow-900":"bg-gray-200 text-gray-600 opacity-0 group-hover:opacity-100"}`,title:r?"Pinned":"Pin to notes",children:"📌"})]})}function L3(){return de.jsx("div",{className:"max-w-[90%] px-3 py-2 rounded shadow text-sm bg-gray-200 text-gray-700",children:de.jsxs("div",{className:"flex items-center space-x-2",children:[de.jsx("span",{children:"DocBot is thinking"}),de.jsxs("div",{className:"flex space-x-1",children:[de.jsx("div",{className:"w-1 h-1 bg-gray-500 rounded-full animate-bounce",style:{animationDelay:"0ms"}}),de.jsx("div",{className:"w-1 h-1 bg-gray-500 rounded-full animate-bounce",style:{animationDelay:"150ms"}}),de.jsx("div",{className:"w-1 h-1 bg-gray-500 rounded-full animate-bounce",style:{animationDelay:"300ms"}})]})]})})}function _3(){const[e,t]=gt.useState([]),[n,r]=gt.useState(""),[i,o]=gt.useState(""),[s,u]=gt.useState(!1),[c,d]=gt.useState(!0),[v,g]=gt.useState({}),[w,p]=gt.useState(null),[j,A]=gt.useState(!1),[D,y]=gt.useState([]),[x,P]=gt.useState([]),[z,J]=gt.useState(""),[Z,W]=gt.useState("default"),T=gt.useRef(null),re=gt.useRef(null),[se,E]=gt.useState(!1),[I,$]=gt.useState(!1),[U,pe]=gt.useState(!1),[fe,me]=gt.useState(!1),[q,te]=gt.useState(null),[ee,Le]=gt.useState(null),[L,O]=gt.useState(!1),[R,H]=gt.useState([]),X=()=>{const le=xh(_p(z));$(!0),setTimeout(()=>{le?(t(le.messages||[]),o(le.summary||""),g(le.pinned||{})):alert("No stored history for this page"),$(!1)},200)},ae=()=>{if(!i)return null;const ue=i.split(/\n+/).map(Ce=>Ce.trim()).filter(Boolean).map(Ce=>Ce.replace(/^[*\-•\s]+/,""));if(ue.length>1){const[Ce,...Te]=ue;return de.jsxs("div",{className:`${s?"":"max-h-32 overflow-y-auto"} space-y-2`,children:[de.jsx("p",{className:"text-sm text-gray-700 leading-relaxed",dangerouslySetInnerHTML:{__html:Ce}}),de.jsx("ul",{className:"list-disc pl-4 text-sm text-gray-700 leading-relaxed space-y-1",children:Te.map((Lt,Qe)=>de.jsx("li",{dangerouslySetInnerHTML:{__html:Lt}},Qe))})]})}return de.jsx("p",{className:`text-sm text-gray-700 leading-relaxed whitespace-pre-wrap ${s?"":"max-h-32 overflow-y-auto"}`,children:i})},[he,ce]=gt.useState(!1),[Pe,_e]=gt.useState(!1),Oe=()=>de.jsx("div",{className:"absolute inset-0 bg-white/60 backdrop-blur-sm flex items-center justify-center z-50",children:de.jsx("div",{className:"animate-spin rounded-full h-10 w-10 border-4 border-purple-500 border-t-transparent"})});gt.useEffect(()=>{Z&&(bh&&clearTimeout(bh),bh=setTimeout(()=>{Gs(Z,{summary:i,messages:e,pinned:v})},400))},[i,e,v,Z]);const Fe=le=>{const ue=v[le],Ce={...v};if(ue){delete Ce[le];const Te=x.find(Lt=>Lt.content===le);Te&&fetch(`http://localhost:8000/notes/${Te.note_id}`,{method:"DELETE"}).then(()=>Je(Z)).catch(()=>{})}else Ce[le]=!0,He(le,"Pinned");g(Ce),Gs(Z,{summary:i,messages:e,pinned:Ce})};gt.useEffect(()=>{var le;(le=T.current)==null||le.scrollIntoView({behavior:"smooth"})},[e]),gt.useEffect(()=>{chrome.tabs.query({active:!0,currentWindow:!0},le=>{if(!(le!=null&&le.length))return;const ue=le[0];p(ue.id),J(ue.url);const Ce=_p(ue.url);W(Ce);const Te=xh(Ce);Te?(t(Te.messages||[]),o(Te.summary||""),g(Te.pinned||{})):(t([]),o(""),g({})),Je(Ce)})},[]),gt.useEffect(()=>{Je(Z);const le=xh(Z);le?(t(le.messages||[]),o(le.summary||""),g(le.pinned||{})):(t([]),o(""),g({}))},[Z]),gt.useEffect(()=>{chrome.storage.local.get(["docbot_comparison_history"],le=>{if(le.docbot_comparison_history&&le.docbot_comparison_history.length>0)H(le.docbot_comparison_history);else{const ue=localStorage.getItem("docbot_comparison_history");if(ue)try{const Ce=JSON.parse(ue);H(Ce),Ce.length>0&&chrome.storage.local.set({docbot_comparison_history:Ce})}catch(Ce){console.error("Failed to load comparison history:",Ce)}}})},[]);const Ve=()=>{if(!se){if(E(!0),!w){console.warn("DocBot: No tabId");return}console.log("DocBot: Sending message to content script"),chrome.tabs.sendMessage(w,{type:"docbot:request_text"},le=>{chrome.runtime.lastError?(console.warn("DocBot: content-script message failed",chrome.runtime.lastError.message),chrome.scripting.executeScript({target:{tabId:w},world:"MAIN",func:()=>{var Te;const Ce=((Te=document.body)==null?void 0:Te.innerText)||"";return Ce.length>1e5?Ce.slice(0,1e5):Ce}},ue=>{var Te,Lt;if(chrome.runtime.lastError||!(ue!=null&&ue.length)){console.error("DocBot: executeScript failed",chrome.runtime.lastError);try{const Qe=new URL(window.location.href).origin+"/*";chrome.permissions.request({origins:[Qe]},dt=>{dt?(console.log("DocBot: host permission granted, retrying"),Ve()):alert("Permission denied. Cannot read this page.")})}catch{alert("This page blocks access. Try another page.")}return}console.log("DocBot: executeScript returned text length",(Lt=(Te=ue[0])==null?void 0:Te.result)==null?void 0:Lt.length);const Ce=ue[0].result;chrome.runtime.sendMessage({type:"docbot:text_extracted",text:Ce,tabId:w}),fetch("http://localhost:8000/summarise",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({text:Ce})}).then(Qe=>Qe.json()).then(Qe=>{o(Qe.summary),Qe.document_id&&z&&(W(Qe.document_id),wh(z,Qe.document_id),Gs(Qe.document_id,{summary:Qe.summary,messages:e,pinned:v})),Ee(Qe.document_id||Z)}).catch(Qe=>alert("Summarise failed: "+Qe.message)).finally(()=>E(!1))})):(console.log("DocBot: content-script responded ok"),chrome.scripting.executeScript({target:{tabId:w},world:"MAIN",func:()=>{var Te;const Ce=((Te=document.body)==null?void 0:Te.innerText)||"";return Ce.length>1e5?Ce.slice(0,1e5):Ce}},ue=>{if(ue!=null&&ue.length){const Ce=ue[0].result;chrome.runtime.sendMessage({type:"docbot:text_extracted",text:Ce,tabId:w}),fetch("http://localhost:8000/summarise",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({text:Ce})}).then(Te=>Te.json()).then(Te=>{o(Te.summary),Te.document_id&&z&&(W(Te.document_id),wh(z,Te.document_id),Gs(Te.document_id,{summary:Te.summary,messages:e,pinned:v})),Ee(Te.document_id||Z)}).catch(Te=>alert("Summarise failed: "+Te.message)).finally(()=>E(!1))}}))})}},ve=le=>{if(le.preventDefault(),Pe||!n.trim())return;const ue=n.trim();r(""),t(Ce=>[...Ce,{sender:"user",text:ue}]),_e(!0),fetch("http://localhost:8000/ask",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({question:ue,document_id:Z})}).then(Ce=>Ce.json()).then(Ce=>{const Te=Ce.answer.split(/[.?!]/)[0].slice(0,120),Lt=`docbot-${Date.now()}`;t(Qe=>[...Qe,{sender:"bot",text:Ce.answer,anchorId:Lt,src:Te}]),Ee(Z),Te.length>10&&w&&chrome.runtime.sendMessage({type:"docbot:highlight_text",text:Te,color:"#fef3c7",anchorId:Lt,tabId:w})}).catch(Ce=>t(Te=>[...Te,{sender:"system",text:`Error: ${Ce.message}`}])).finally(()=>_e(!1))},B=le=>{if(!le.name.toLowerCase().endsWith(".pdf")){alert("Only PDF files are supported");return}W(le.name.replace(/[^a-zA-Z0-9]/g,"_"));const ue=new FormData;ue.append("file",le),fetch("http://localhost:8000/upload",{method:"POST",body:ue}).then(Ce=>Ce.json()).then(Ce=>{o(Ce.summary),Ce.document_id&&z&&(W(Ce.document_id),wh(z,Ce.document_id),Gs(Ce.document_id,{summary:Ce.summary,messages:e,pinned:v})),Ee(Ce.document_id||Z)}).catch(Ce=>alert("Upload failed: "+Ce.message))},Ze=le=>{const ue=le.target.files[0];ue&&B(ue)},Ue=le=>{le.preventDefault(),A(!0)},Ae=le=>{le.preventDefault(),A(!1)},je=le=>{le.preventDefault(),A(!1);const ue=le.dataTransfer.files[0];ue&&B(ue)},De=()=>{var le;(le=re.current)==null||le.click()},Ee=le=>{fetch(`http://localhost:8000/auto-suggestions?document_id=${le}`,{method:"POST",headers:{"Content-Type":"application/json"}}).then(ue=>ue.json()).then(ue=>y(ue.suggestions)).catch(()=>y([]))},He=(le,ue="")=>{fetch("http://localhost:8000/notes",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({content:le,document_id:Z,topic:ue})}).then(()=>Je(Z)).catch(Ce=>console.error("Note save failed:",Ce))},Je=(le=Z)=>{le&&(async()=>{const ue=[];let ce=null;do{const de=await fetch(`http://localhost:8000/notes?document_id=${le}&limit=1000${ce?`&cursor=${ce}`:""}`).then(fe=>fe.json());ue.push(...de.notes||[]),ce=de.next_cursor}while(ce);return ue})().then(ue=>P(ue)).catch(()=>P([]))},it=le=>{r(le),ve({preventDefault:()=>{},target:{question:{value:le}}})},st=()=>{pe(!0),setTimeout(()=>{localStorage.removeItem(`docbot_session_${Z}`),t([]),o(""),g({}),ce(!1),pe(!1)},300)},ct=()=>{const le=new Ye({orientation:"p",unit:"pt",format:"a4"});let ue=40;if(le.setFontSize(12),le.text(`DocBot Session - ${new Date().toLocaleString()}`,40,ue),ue+=30,i){le.setFontSize(10),le.text("SUMMARY:",40,ue),ue+=15;const Ce=le.splitTextToSize(i,500);le.text(Ce,40,ue),ue+=Ce.length*12+20,le.text("CHAT HISTORY:",40,ue),ue+=20,le.setFontSize(12)}e.forEach(({sender:Ce,text:Te})=>{const Lt=le.splitTextToSize(`${Ce.toUpperCase()}: ${Te}`,500);le.text(Lt,40,ue),ue+=Lt.length*14+10,ue>780&&(le.addPage(),ue=40)}),le.save("docbot_chat.pdf")},yt=async()=>{if(!q||!ee){alert("Please select both documents to compare");return}O(!0);try{const le=await q.arrayBuffer(),ue=await ee.arrayBuffer(),Ce=new File([le],q.name,{type:q.type,lastModified:Date.now()}),Te=new File([ue],ee.name,{type:ee.type,lastModified:Date.now()}),Lt=new FormData;Lt.append("document1",Ce),Lt.append("document2",Te);const Qe=await fetch("http://localhost:8000/compare",{method:"POST",body:Lt});if(!Qe.ok)throw new Error("Failed to compare documents");const dt=await Qe.json(),ur={summary:dt.comparison_summary,document1:{name:q.name,content:dt.document1_content},document2:{name:ee.name,content:dt.document2_content},changes:dt.changes||[]},ft="comparison_"+Date.now(),ui={[ft]:ur,[`${ft}_metadata`]:{created:Date.now(),file1Name:q.name,file2Name:ee.name,summary:dt.comparison_summary.substring(0,100)+"..."}};chrome.storage.local.set(ui,()=>{const En=[{id:ft,timestamp:new Date().toLocaleString(),file1Name:q.name,file2Name:ee.name,summary:dt.comparison_summary.substring(0,100)+"..."},...R.slice(0,9)];H(En),localStorage.setItem("docbot_comparison_history",JSON.stringify(En)),chrome.storage.local.set({docbot_comparison_history:En}),chrome.tabs.create({url:`chrome-extension://${chrome.runtime.id}/comparison.html?id=${ft}`})}),me(!1),te(null),Le(null)}catch(le){console.error("Compare error:",le);let ue=`Failed to compare documents.
 
 `;le.message.includes("file is in use")||le.message.includes("file that's open")||le.name==="NotAllowedError"?(ue+=`📁 File Access Issue:
 `,ue+=`• Close the files in Word, Excel, or any other program
@@ -22,12 +22,24 @@
     if(e.target === modalOverlay){ modalOverlay.style.display = 'none'; }
   });
 
+  // GET /notes returns one page at a time; follow next_cursor to get every note
+  async function fetchAllNotes(){
+    const list = [];
+    let cursor = null;
+    do{
+      const r = await fetch(`http://localhost:8000/notes?document_id=${docId}&limit=1000${cursor ? `&cursor=${cursor}` : ''}`);
+      if(!r.ok){ throw new Error(`HTTP ${r.status}`); }
+      const json = await r.json();
+      list.push(...(json.notes||[]));
+      cursor = json.next_cursor;
+    }while(cursor);
+    return list;
+  }
+
   async function fetchNotes(){
     notesEl.innerHTML = '<p style="font-size:12px;color:#6b7280;">Loading…</p>';
     try{
-      const r = await fetch(`http://localhost:8000/notes?document_id=${docId}`);
-      const json = await r.json();
-      renderNotes(json.notes||[]);
+      renderNotes(await fetchAllNotes());
     }catch(err){
       notesEl.innerHTML = `<p style="font-size:12px;color:red;">Error: ${err.message}</p>`;
     }
@@ -50,9 +62,7 @@
   refreshBtn.addEventListener('click', fetchNotes);
 
   exportBtn.addEventListener('click', async () => {
-    const r = await fetch(`http://localhost:8000/notes?document_id=${docId}`);
-    const json = await r.json();
-    const list = json.notes||[];
+    const list = await fetchAllNotes().catch(()=>[]);
     if(list.length===0){ showModal('No notes'); return; }
     const { jsPDF } = await import(chrome.runtime.getURL('dist/vendor.js')).catch(()=>({}));
     if(!jsPDF){ showModal('Export Notes functionality will be implemented in the next phase.'); return; }
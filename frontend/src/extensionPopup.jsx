@@ -64,6 +64,20 @@ const makePageKey = (url) => (url || '').replace(/[#?].*$/, '');
 const getDocIdForPage = (url) => localStorage.getItem(`docbot_page_${makePageKey(url)}`) || "default";
 const setDocIdForPage = (url, id) => localStorage.setItem(`docbot_page_${makePageKey(url)}`, id);
 
+// GET /notes returns one page at a time; follow next_cursor to get every note of the document.
+const fetchAllNotes = async (docId) => {
+  const notes = [];
+  let cursor = null;
+  do {
+    const page = await fetch(
+      `http://localhost:8000/notes?document_id=${docId}&limit=1000${cursor ? `&cursor=${cursor}` : ''}`
+    ).then((r) => r.json());
+    notes.push(...(page.notes || []));
+    cursor = page.next_cursor;
+  } while (cursor);
+  return notes;
+};
+
 const saveSessionToStorage = (docId, data) => {
   localStorage.setItem(`docbot_session_${docId}`, JSON.stringify(data));
 };
@@ -524,9 +538,8 @@ function PopupApp() {
 
   const fetchNotes = (docId = currentDocId) => {
     if (!docId) return;
-    fetch(`http://localhost:8000/notes?document_id=${docId}`)
-      .then((r) => r.json())
-      .then((json) => setNotes(json.notes))
+    fetchAllNotes(docId)
+      .then(setNotes)
       .catch(() => setNotes([]));
   };
 
@@ -0,0 +1,151 @@
+"""DocumentReader caching by file identity, invalidation and background refresh."""
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import pytest
+
+from backend import document_reader, extraction
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Paths passed to ``extraction.extract_file``, which still does the real work."""
+    seen: list[str] = []
+    extract = extraction.extract_file
+
+    def counting(path, filename=None):
+        seen.append(path)
+        return extract(path, filename)
+
+    monkeypatch.setattr(extraction, "extract_file", counting)
+    return seen
+
+
+def _write(path, text: str) -> None:
+    path.write_text(text, encoding="utf-8")
+    # Coarse filesystem clocks could leave mtime unchanged between writes
+    stamp = time.time_ns() + len(text)
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_second_read_is_a_hit(tmp_path, calls):
+    path = tmp_path / "notes.txt"
+    _write(path, "First paragraph.\n\nSecond paragraph.\n")
+    reader = document_reader.DocumentReader()
+    first = reader.read(str(path))
+    assert reader.read(str(path)) is first
+    assert first.text.startswith("First paragraph.")
+    assert len(calls) == 1
+    assert reader.stats()["hits"] == 1
+    assert reader.stats()["misses"] == 1
+
+
+def test_rewritten_file_is_extracted_again(tmp_path, calls):
+    path = tmp_path / "notes.txt"
+    _write(path, "Old text.\n")
+    reader = document_reader.DocumentReader()
+    reader.read(str(path))
+    _write(path, "New text, a little longer.\n")
+    assert reader.read(str(path)).text.startswith("New text")
+    assert len(calls) == 2
+
+
+def test_file_changed_during_parse_is_not_cached(tmp_path, monkeypatch):
+    path = tmp_path / "notes.txt"
+    _write(path, "Being saved.\n")
+    extract = extraction.extract_file
+    seen = []
+
+    def saved_meanwhile(source, filename=None):
+        result = extract(source, filename)
+        if not seen:
+            _write(path, "Being saved, now complete.\n")
+        seen.append(source)
+        return result
+
+    monkeypatch.setattr(extraction, "extract_file", saved_meanwhile)
+    reader = document_reader.DocumentReader()
+    reader.read(str(path))
+    assert reader.read(str(path)).text.startswith("Being saved, now complete.")
+    assert len(seen) == 2
+    assert reader.read(str(path)).text.startswith("Being saved, now complete.")
+    assert len(seen) == 2
+
+
+def test_concurrent_reads_share_one_extraction(tmp_path, monkeypatch):
+    path = tmp_path / "notes.txt"
+    _write(path, "Shared text.\n")
+    extract = extraction.extract_file
+    started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def slow(source, filename=None):
+        seen.append(source)
+        started.set()
+        release.wait(5)
+        return extract(source, filename)
+
+    monkeypatch.setattr(extraction, "extract_file", slow)
+    reader = document_reader.DocumentReader()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reader.read(str(path)))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    time.sleep(0.05)  # let the other readers queue behind the first extraction
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(seen) == 1
+    assert len(results) == 4
+    assert all(result is results[0] for result in results)
+
+
+def test_refresh_re_extracts_changed_and_forgets_deleted_files(tmp_path, calls):
+    changed, deleted = tmp_path / "changed.txt", tmp_path / "deleted.txt"
+    _write(changed, "Before.\n")
+    _write(deleted, "Soon gone.\n")
+    reader = document_reader.DocumentReader()
+    reader.read(str(changed))
+    reader.read(str(deleted))
+    assert reader.refresh() == 0
+    _write(changed, "After the edit.\n")
+    deleted.unlink()
+    assert reader.refresh() == 1
+    assert reader.stats()["entries"] == 1
+    assert reader.read(str(changed)).text.startswith("After the edit.")
+    assert reader.stats()["hits"] == 1
+    assert len(calls) == 3
+
+
+def test_refresh_thread_warms_changed_files(tmp_path, calls):
+    path = tmp_path / "notes.txt"
+    _write(path, "Before.\n")
+    reader = document_reader.DocumentReader(refresh_seconds=0.02)
+    try:
+        reader.read(str(path))
+        _write(path, "After the edit.\n")
+        deadline = time.monotonic() + 5
+        while reader.stats()["refreshes"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert reader.stats()["refreshes"] == 1
+        assert reader.read(str(path)).text.startswith("After the edit.")
+        assert reader.stats()["hits"] == 1
+    finally:
+        reader.close()
+
+
+def test_least_recently_read_file_is_evicted(tmp_path, calls):
+    paths = [tmp_path / f"{name}.txt" for name in ("a", "b", "c")]
+    for path in paths:
+        _write(path, f"Text of {path.name}.\n")
+    reader = document_reader.DocumentReader(max_entries=2)
+    for path in paths:
+        reader.read(str(path))
+    reader.read(str(paths[0]))
+    assert len(calls) == 4
+    assert reader.stats()["entries"] == 2
@@ -0,0 +1,82 @@
+"""Hit, miss and invalidation paths of the on-disk extraction cache."""
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from backend import extraction
+from backend.extraction_cache import ExtractionCache
+
+PAYLOAD = {"text": "Payment is due within 30 days.", "block_offsets": [0], "block_locations": ["line 1"]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractionCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+
+
+def test_miss_then_hit(cache):
+    assert cache.get("abc-txt-v1") is None
+    cache.put("abc-txt-v1", PAYLOAD)
+    assert cache.get("abc-txt-v1") == PAYLOAD
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_corrupt_entry_is_a_miss(cache):
+    cache.put("abc-txt-v1", PAYLOAD)
+    cache._path("abc-txt-v1").write_bytes(b"not zlib")
+    assert cache.get("abc-txt-v1") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_eviction_drops_least_recently_used(cache):
+    entry = {"text": os.urandom(2048).hex()}
+    cache.put("old", entry)
+    # Room for two entries: the third put evicts one
+    cache.max_bytes = int(cache._path("old").stat().st_size * 2.5)
+    cache.put("recent", entry)
+    # Reading "old" makes it the most recently used entry
+    past = time.time() - 60
+    os.utime(cache._path("recent"), (past, past))
+    assert cache.get("old") == entry
+    cache.put("new", entry)
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("recent") is None
+    assert cache.get("old") == entry
+    assert cache.get("new") == entry
+
+
+def test_extract_upload_reuses_cached_result(cache, monkeypatch):
+    monkeypatch.setattr(extraction, "extraction_cache", cache)
+    data = b"Payment is due within 30 days.\n\nThe supplier shall deliver the goods.\n"
+    first = extraction.extract_upload(data, "contract.txt")
+    assert cache.stats()["misses"] == 1
+    assert extraction.extract_upload(data, "contract.txt") == first
+    assert cache.stats()["hits"] == 1
+
+
+def test_extractor_version_change_invalidates_entries(cache, monkeypatch):
+    monkeypatch.setattr(extraction, "extraction_cache", cache)
+    data = b"Payment is due within 30 days.\n"
+    extraction.extract_upload(data, "contract.txt")
+    monkeypatch.setattr(extraction, "EXTRACTOR_VERSION", extraction.EXTRACTOR_VERSION + 1)
+    extraction.extract_upload(data, "contract.txt")
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["misses"] == 2
+
+
+def test_entry_larger_than_the_budget_is_not_stored(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=64)
+    cache.put("big", {"text": os.urandom(256).hex()})
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_size_is_tracked_across_puts(cache):
+    cache.put("one", PAYLOAD)
+    cache.put("two", {**PAYLOAD, "text": "Delivery by March."})
+    on_disk = sum(p.stat().st_size for p in cache.directory.glob("*.json.z"))
+    assert cache.stats()["bytes"] == on_disk